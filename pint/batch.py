@@ -0,0 +1,165 @@
+"""Fit many pulsars in parallel.
+
+fit_pulsars() fits a list of (par file, tim file) pairs with a pool of
+worker processes, and yields the results as the fits finish.  The solar
+system ephemeris, the IERS table and the observatory clock files are loaded
+by preload() in the parent process before the workers are started, so with
+the (default on Unix) fork start method the workers share them instead of
+reading them once each.
+"""
+from __future__ import absolute_import, print_function, division
+import functools
+import multiprocessing
+import time
+import traceback
+import numpy as np
+import astropy.units as u
+from astropy import log
+
+__all__ = ['preload', 'fit_pulsar', 'fit_pulsars']
+
+
+def preload(ephem="DE421", observatories=(), include_bipm=True,
+            bipm_version='BIPM2015', include_gps=True):
+    """Load the data files shared by the TOA computations of all pulsars.
+
+    Parameters
+    ----------
+    ephem : str
+        The solar system ephemeris.
+    observatories : list of str
+        Observatories whose clock files are read.
+    include_bipm, bipm_version, include_gps :
+        The clock correction options, as for pint.toa.get_TOAs.
+    """
+    from .solar_system_ephemerides import load_kernel
+    from .erfautils import _iers_columns
+    from .observatory import get_observatory
+    load_kernel(ephem)
+    _iers_columns()
+    for obs in observatories:
+        site = get_observatory(obs, include_gps=include_gps,
+                               include_bipm=include_bipm,
+                               bipm_version=bipm_version)
+        if hasattr(site, 'load_clock_files'):
+            site.load_clock_files()
+
+
+def fit_pulsar(par, tim, fitter='auto', maxiter=1, ephem="DE421",
+               include_bipm=True, bipm_version='BIPM2015', include_gps=True,
+               planets=False, columnar=False):
+    """Load, prepare and fit one pulsar.
+
+    Exceptions are caught, so that one failing pulsar does not stop a batch.
+
+    Parameters
+    ----------
+    par, tim : str
+        The par and tim file names.
+    fitter : str
+        'wls', 'gls', or 'auto' to use GLSFitter if the model has noise
+        components and WlsFitter otherwise.
+    maxiter : int
+        Number of fit iterations.
+    ephem, include_bipm, bipm_version, include_gps, planets, columnar :
+        The TOA options, as for pint.toa.get_TOAs.
+
+    Returns
+    -------
+    dict
+        With the input file names, 'psr', the post-fit model as 'parfile',
+        'ntoas', 'chi2', 'chi2_reduced', 'rms' (the post-fit residual RMS in
+        us), 'timings' (seconds spent in the 'load', 'prepare' and 'fit'
+        stages) and 'error' (None, or the traceback of the failure).
+    """
+    from . import toa, fitter as pfitter
+    from .models import get_model
+    result = {'par': par, 'tim': tim, 'psr': None, 'parfile': None,
+              'ntoas': None, 'chi2': None, 'chi2_reduced': None, 'rms': None,
+              'timings': {}, 'error': None}
+    timings = result['timings']
+    try:
+        t0 = time.time()
+        m = get_model(par)
+        result['psr'] = m.PSR.value
+        t = toa.TOAs(tim, columnar=columnar)
+        t1 = time.time()
+        timings['load'] = t1 - t0
+        t.apply_clock_corrections(include_gps=include_gps,
+                                  include_bipm=include_bipm,
+                                  bipm_version=bipm_version)
+        t.compute_TDBs(ephem=ephem)
+        t.compute_posvels(ephem, planets)
+        t2 = time.time()
+        timings['prepare'] = t2 - t1
+        if fitter == 'auto':
+            fitter = 'gls' if 'NoiseComponent' in m.component_types else 'wls'
+        if fitter == 'wls':
+            f = pfitter.WlsFitter(t, m)
+        elif fitter == 'gls':
+            f = pfitter.GLSFitter(t, m)
+        else:
+            raise ValueError("Unknown fitter '%s'." % fitter)
+        f.fit_toas(maxiter=maxiter)
+        f.update_resids()
+        timings['fit'] = time.time() - t2
+        result['parfile'] = f.model.as_parfile()
+        result['ntoas'] = t.ntoas
+        result['chi2'] = float(f.resids.chi2)
+        result['chi2_reduced'] = float(f.resids.chi2_reduced)
+        result['rms'] = float(np.std(f.resids.time_resids.to(u.us).value))
+    except Exception:
+        result['error'] = traceback.format_exc()
+        log.error("Fit of {0} failed:\n{1}".format(par, result['error']))
+    return result
+
+
+def _fit_pair(pair, **kwargs):
+    return fit_pulsar(pair[0], pair[1], **kwargs)
+
+
+def fit_pulsars(pairs, processes=None, observatories=(), **kwargs):
+    """Fit pulsars in parallel and yield their results as they finish.
+
+    Parameters
+    ----------
+    pairs : list of (str, str)
+        The (par file, tim file) of each pulsar.
+    processes : int, optional
+        Number of worker processes, by default the number of CPUs.  With
+        processes=1 the pulsars are fitted in this process.
+    observatories : list of str
+        Observatories whose clock files are loaded before the fits.
+    **kwargs :
+        Options passed to fit_pulsar.
+
+    Yields
+    ------
+    dict
+        The fit_pulsar results, in completion order.
+    """
+    shared = dict((k, kwargs[k]) for k in ('ephem', 'include_bipm',
+                                            'bipm_version', 'include_gps')
+                  if k in kwargs)
+    preload(observatories=observatories, **shared)
+    func = functools.partial(_fit_pair, **kwargs)
+    if processes == 1:
+        for pair in pairs:
+            yield func(pair)
+        return
+    # The workers run preload again, which does nothing if the data were
+    # inherited from this process.
+    pool = multiprocessing.Pool(processes, initializer=preload,
+                                initargs=(shared.get('ephem', "DE421"),
+                                          observatories,
+                                          shared.get('include_bipm', True),
+                                          shared.get('bipm_version',
+                                                     'BIPM2015'),
+                                          shared.get('include_gps', True)))
+    try:
+        for result in pool.imap_unordered(func, pairs):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
@@ -30,3 +30,19 @@ def datapath(fname):
 
     return None
 
+
+def cachepath(subdir=None):
+    """Returns the directory where PINT keeps its caches, creating it if
+    needed.  This is the appdirs user_cache_dir (typically $HOME/.cache/pint
+    on linux), or the given subdirectory of it."""
+    d = appdirs.user_cache_dir(_app,_auth)
+    if subdir is not None:
+        d = os.path.join(d, subdir)
+    if not os.path.isdir(d):
+        try:
+            os.makedirs(d)
+        except OSError:
+            # Somebody else may have made it in the meantime
+            if not os.path.isdir(d):
+                raise
+    return d
@@ -1,6 +1,8 @@
 from __future__ import absolute_import, print_function, division
 from . import utils
+import contextlib
 import numpy as np
+from astropy import log
 import astropy.units as u
 try:
     import astropy.erfa as erfa
@@ -8,6 +10,8 @@ except ImportError:
     import astropy._erfa as erfa
 import astropy.table as table
 from astropy.time import Time
+from astropy.time.utils import day_frac
+from .solar_system_ephemerides import get_tdb_tt_ephem_geocenter
 SECS_PER_DAY = erfa.DAYSEC
 
 from astropy.utils.iers import IERS_A, IERS_A_URL, IERS_B, IERS_B_URL, IERS
@@ -31,6 +35,146 @@ OM = 1.00273781191135448 * 2.0 * np.pi / SECS_PER_DAY
 # arcsec to radians
 asec2rad = 4.84813681109536e-06
 
+# Default accuracy bound (radians) on X, Y and s when they are
+# interpolated, ~0.1 mm at the surface of the Earth.
+DEFAULT_XYS_TOLERANCE = 1e-11
+
+# Default accuracy bound (s) on interpolated TDB-TT
+DEFAULT_DTDB_TOLERANCE = 1e-11
+
+# Accuracy bound used by gcrs_posvel_from_itrf, None to call xys00a for
+# every time (see xys_interpolation).
+_xys_tolerance = None
+
+# IERS columns as plain arrays, filled on first use by _iers_columns()
+_iers_arrays = {}
+
+# Values of the interpolated functions on grid points, one dict per
+# function: {(step, grid index): values}
+_xys_grid = {}
+_dtdb_grid = {}
+
+
+def _iers_columns():
+    """Return the IERS table columns used here as float arrays."""
+    if not _iers_arrays:
+        for col in ('MJD', 'dX_2000A', 'dY_2000A', 'PM_x', 'PM_y'):
+            _iers_arrays[col] = np.asarray(iers_tab[col], dtype=np.float64)
+    return _iers_arrays
+
+
+def _iers_interp(mjds, col):
+    """Interpolate an IERS column (in arcsec) at mjds, in radians."""
+    iers = _iers_columns()
+    return np.interp(mjds, iers['MJD'], iers[col]) * asec2rad
+
+
+def _values_on_grid(func, grid, idx, step):
+    """Return func at the grid points idx * step (JD), as (nvalues, len(idx)).
+
+    Values already in the grid dict are reused, the others are computed
+    in one call to func and added.
+    """
+    missing = [i for i in np.unique(idx) if (step, i) not in grid]
+    if len(grid) + len(missing) > 1000000:
+        grid.clear()
+        missing = list(np.unique(idx))
+    if missing:
+        jd = np.array(missing, dtype=np.float64) * step
+        values = np.atleast_2d(func(jd))
+        for ii, i in enumerate(missing):
+            grid[step, i] = values[:, ii]
+    return np.array([grid[step, i] for i in idx]).T
+
+
+def _interp_on_grid(func, grid, jd1, jd2, step):
+    """Interpolate func at jd1 + jd2 from a grid of spacing step days.
+
+    The values are found with cubic Lagrange interpolation on the four
+    nearest grid points.
+    """
+    # Split the times into grid index and fraction of step
+    i1 = np.floor(jd1 / step)
+    x = (jd1 - i1 * step + jd2) / step
+    i2 = np.floor(x)
+    x -= i2
+    idx = (i1 + i2).astype(np.int64)
+    uidx, inv = np.unique(idx, return_inverse=True)
+    nodes = np.concatenate([uidx - 1, uidx, uidx + 1, uidx + 2])
+    vals = _values_on_grid(func, grid, nodes, step)
+    vals = vals.reshape(len(vals), 4, len(uidx))[:, :, inv]
+    w = np.array([-x * (x - 1) * (x - 2) / 6, (x + 1) * (x - 1) * (x - 2) / 2,
+                  -(x + 1) * x * (x - 2) / 2, (x + 1) * x * (x - 1) / 6])
+    return np.sum(w * vals, axis=1)
+
+
+def _adaptive_interp(func, grid, jd1, jd2, tolerance, step, min_step):
+    """Interpolate func from a grid refined to reach the given tolerance.
+
+    The interpolation is checked against func half-way between the grid
+    points around the requested times, and the grid spacing is halved
+    (down to min_step days) until the difference is below tolerance.
+    """
+    jd1 = np.atleast_1d(jd1)
+    jd2 = np.atleast_1d(jd2)
+    while True:
+        cells = np.unique(np.floor((jd1 + jd2) / step))
+        mid = (cells + 0.5) * step
+        err = np.abs(_interp_on_grid(func, grid, mid, np.zeros_like(mid),
+                                     step) - np.atleast_2d(func(mid))).max()
+        if err <= tolerance or step <= min_step:
+            break
+        step = step / 2
+    if err > tolerance:
+        log.warn("Interpolation error {0} above {1}".format(err, tolerance))
+    return _interp_on_grid(func, grid, jd1, jd2, step)
+
+
+def _xys00a(jd):
+    return np.array(erfa.xys00a(jd, np.zeros_like(jd)))
+
+
+def xys00a_interpolated(jd1, jd2, tolerance=DEFAULT_XYS_TOLERANCE,
+                        step=0.5, min_step=1.0/64):
+    """X, Y and s (as erfa.xys00a) interpolated from a coarse grid.
+
+    The IAU 2000A precession-nutation series is only evaluated on a grid
+    of TT times, which is kept between calls.  The interpolation is
+    checked against xys00a half-way between the grid points around the
+    requested times, and the grid spacing is halved (down to min_step
+    days) until the difference is below tolerance (radians).
+
+    Parameters
+    ----------
+    jd1, jd2 : numpy.ndarray
+        The TT Julian dates.
+    tolerance : float
+        Accuracy bound on X, Y and s in radians.
+    step : float
+        Initial grid spacing in days.
+    min_step : float
+        Smallest grid spacing tried.
+    """
+    return tuple(_adaptive_interp(_xys00a, _xys_grid, jd1, jd2, tolerance,
+                                  step, min_step))
+
+
+@contextlib.contextmanager
+def xys_interpolation(tolerance=DEFAULT_XYS_TOLERANCE):
+    """Context in which gcrs_posvel_from_itrf interpolates X, Y, s.
+
+    See xys00a_interpolated.  tolerance=None calls xys00a for every time,
+    as outside of the context.
+    """
+    global _xys_tolerance
+    old = _xys_tolerance
+    _xys_tolerance = tolerance
+    try:
+        yield
+    finally:
+        _xys_tolerance = old
+
+
 def gcrs_posvel_from_itrf(loc, toas, obsname='obs'):
     """Return a list of PosVel instances for the observatory at the TOA times.
 
@@ -48,49 +192,62 @@ def gcrs_posvel_from_itrf(loc, toas, obsname='obs'):
     a terrestrial observing station] with an extra rotation from c2ixys()
     [Form the celestial to intermediate-frame-of-date matrix given the CIP
     X,Y and the CIO locator s].
+
+    The computation itself is done by gcrs_posvel_from_itrf_jd() on the
+    TT and UT1 Julian dates of the TOAs.
     """
     # If the input is a single TOA (i.e. a row from the table),
     # then put it into a list
     if type(toas) == table.row.Row:
         ttoas = Time([toas['mjd']])
-        N = 1
     elif type(toas) == table.table.Table:
-        N = len(toas)
-        ttoas = toas['mjd']
+        ttoas = Time(list(toas['mjd']))
     else:
         if toas.isscalar:
             ttoas = Time([toas])
         else:
             ttoas = toas
-        N = len(ttoas)
 
     # Get various times from the TOAs as arrays
-    tts = np.asarray([(t.jd1, t.jd2) for t in ttoas.tt]).T
-    ut1s = np.asarray([(t.jd1, t.jd2) for t in ttoas.ut1]).T
-    mjds = np.asarray(ttoas.mjd)
+    tt = ttoas.tt
+    ut1 = ttoas.ut1
+    return gcrs_posvel_from_itrf_jd(loc, tt.jd1, tt.jd2, ut1.jd1, ut1.jd2,
+                                    obsname=obsname,
+                                    xys_tolerance=_xys_tolerance)
+
+
+def gcrs_posvel_from_itrf_jd(loc, tt_jd1, tt_jd2, ut1_jd1, ut1_jd2,
+                             obsname='obs', xys_tolerance=None):
+    """Observatory GCRS position and velocity from TT and UT1 Julian dates.
+
+    This is gcrs_posvel_from_itrf() for times given as arrays of two-part
+    Julian dates.  If xys_tolerance is not None, the CIP X, Y and the CIO
+    locator s are interpolated (see xys00a_interpolated) with this accuracy
+    bound in radians instead of being evaluated for every time.
+    """
+    tt_jd1 = np.atleast_1d(tt_jd1)
+    tt_jd2 = np.atleast_1d(tt_jd2)
+    mjds = (tt_jd1 - erfa.DJM0) + tt_jd2
 
     # Get x, y coords of Celestial Intermediate Pole and CIO locator s
-    X, Y, S = erfa.xys00a(*tts)
+    if xys_tolerance is None:
+        X, Y, S = erfa.xys00a(tt_jd1, tt_jd2)
+    else:
+        X, Y, S = xys00a_interpolated(tt_jd1, tt_jd2, tolerance=xys_tolerance)
 
-    # Get dX and dY from IERS A in arcsec and convert to radians
-    #dX = np.interp(mjds, iers_tab['MJD'], iers_tab['dX_2000A_B']) * asec2rad
-    #dY = np.interp(mjds, iers_tab['MJD'], iers_tab['dY_2000A_B']) * asec2rad
     # Get dX and dY from IERS B in arcsec and convert to radians
-    dX = np.interp(mjds, iers_tab['MJD'], iers_tab['dX_2000A']) * asec2rad
-    dY = np.interp(mjds, iers_tab['MJD'], iers_tab['dY_2000A']) * asec2rad
+    dX = _iers_interp(mjds, 'dX_2000A')
+    dY = _iers_interp(mjds, 'dY_2000A')
 
     # Get GCRS to CIRS matrices
     rc2i = erfa.c2ixys(X+dX, Y+dY, S)
 
     # Gets the TIO locator s'
-    sp = erfa.sp00(*tts)
+    sp = erfa.sp00(tt_jd1, tt_jd2)
 
-    # Get X and Y from IERS A in arcsec and convert to radians
-    #xp = np.interp(mjds, iers_tab['MJD'], iers_tab['PM_X_B']) * asec2rad
-    #yp = np.interp(mjds, iers_tab['MJD'], iers_tab['PM_Y_B']) * asec2rad
     # Get X and Y from IERS B in arcsec and convert to radians
-    xp = np.interp(mjds, iers_tab['MJD'], iers_tab['PM_x']) * asec2rad
-    yp = np.interp(mjds, iers_tab['MJD'], iers_tab['PM_y']) * asec2rad
+    xp = _iers_interp(mjds, 'PM_x')
+    yp = _iers_interp(mjds, 'PM_y')
 
     # Get the polar motion matrices
     rpm = erfa.pom00(xp, yp, sp)
@@ -100,7 +257,7 @@ def gcrs_posvel_from_itrf(loc, toas, obsname='obs'):
     x, y, z = np.dot(xyzm, rpm).T
 
     # Functions of Earth Rotation Angle
-    theta = erfa.era00(*ut1s)
+    theta = erfa.era00(np.atleast_1d(ut1_jd1), np.atleast_1d(ut1_jd2))
     s, c = np.sin(theta), np.cos(theta)
     sx, cx = s * x, c * x
     sy, cy = s * y, c * y
@@ -109,15 +266,109 @@ def gcrs_posvel_from_itrf(loc, toas, obsname='obs'):
     iposs = np.asarray([cx - sy, sx + cy, z]).T
     ivels = np.asarray([OM * (-sx - cy), OM * (cx - sy), \
                         np.zeros_like(x)]).T
-    # There is probably a way to do this with np.einsum or something...
-    # and here it is .
-    poss = np.empty((N, 3), dtype=np.float64)
-    vels = np.empty((N, 3), dtype=np.float64)
     poss = np.einsum('ij,ijk->ik', iposs, rc2i)
     vels = np.einsum('ij,ijk->ik', ivels, rc2i)
     return utils.PosVel(poss.T * u.m, vels.T * u.m / u.s, obj=obsname, origin="earth")
 
 
+def _dtdb_geocenter(jd):
+    return erfa.dtdb(jd, np.zeros_like(jd), 0.0, 0.0, 0.0, 0.0)
+
+
+def dtdb_geocenter_interpolated(jd1, jd2, tolerance=DEFAULT_DTDB_TOLERANCE,
+                                step=0.25, min_step=1.0/64):
+    """Geocentric TDB-TT (s) from the FB90 series interpolated on a grid.
+
+    Same as erfa.dtdb at the geocenter, but the 787 terms series is only
+    evaluated on a grid of TT times kept between calls (see
+    xys00a_interpolated for the meaning of the arguments; tolerance is in
+    seconds).
+    """
+    return _adaptive_interp(_dtdb_geocenter, _dtdb_grid, jd1, jd2, tolerance,
+                            step, min_step)[0]
+
+
+def dtdb_topocentric(jd1, jd2, ut, elong, u, v):
+    """The topocentric terms of erfa.dtdb (Moyer 1981 and Murray 1983).
+
+    These are the only terms of erfa.dtdb depending on the observer, so
+    erfa.dtdb(jd1, jd2, ut, elong, u, v) is the sum of these and of the
+    geocentric value erfa.dtdb(jd1, jd2, 0, 0, 0, 0).  Arguments are the
+    same as for erfa.dtdb: TDB (or TT) Julian dates, UT1 as fraction of a
+    day, longitude (rad) and distances from the Earth spin axis and north
+    of the equatorial plane (km).  Returns seconds.
+    """
+    # Time since J2000.0 in Julian millennia
+    t = ((jd1 - erfa.DJ00) + jd2) / erfa.DJM
+    # Local solar time in radians
+    tsol = np.fmod(ut, 1.0) * erfa.D2PI + elong
+    # Fundamental arguments: Simon et al. 1994
+    w = t / 3600.0
+    elsun = np.fmod(280.46645683 + 1296027711.03429 * w, 360.0) * erfa.DD2R
+    emsun = np.fmod(357.52910918 + 1295965810.481 * w, 360.0) * erfa.DD2R
+    d = np.fmod(297.85019547 + 16029616012.090 * w, 360.0) * erfa.DD2R
+    elj = np.fmod(34.35151874 + 109306899.89453 * w, 360.0) * erfa.DD2R
+    els = np.fmod(50.07744430 + 44046398.47038 * w, 360.0) * erfa.DD2R
+    return (0.00029e-10 * u * np.sin(tsol + elsun - els)
+            + 0.00100e-10 * u * np.sin(tsol - 2.0 * emsun)
+            + 0.00133e-10 * u * np.sin(tsol - d)
+            + 0.00133e-10 * u * np.sin(tsol + elsun - elj)
+            - 0.00229e-10 * u * np.sin(tsol + 2.0 * elsun + emsun)
+            - 0.02200e-10 * v * np.cos(elsun + emsun)
+            + 0.05312e-10 * u * np.sin(tsol - emsun)
+            - 0.13677e-10 * u * np.sin(tsol + 2.0 * elsun)
+            - 1.31840e-10 * v * np.cos(elsun)
+            + 3.17679e-10 * u * np.sin(tsol))
+
+
+def fast_tdb(t, ephem=None, tolerance=DEFAULT_DTDB_TOLERANCE):
+    """Convert an array-valued Time to TDB in a few array operations.
+
+    This gives the same result as t.tdb (to within tolerance, in seconds)
+    but the geocentric TDB-TT is either read from the TDB-TT series of the
+    ephemeris (for DE4XXt kernels, if ephem is given) or interpolated
+    from a cached grid of the FB90 series (see
+    dtdb_geocenter_interpolated).  The topocentric terms for t.location
+    are added as in astropy; like astropy 2.x, a Time without a location
+    is taken to be at geodetic longitude, latitude and height zero.
+
+    Returns
+    -------
+    astropy.time.Time
+        The TDB times, with the location and format of t.
+    """
+    if t.scale == 'tdb':
+        return t
+    tt = t.tt
+    jd1, jd2 = tt.jd1, tt.jd2
+    geo = None
+    if ephem is not None:
+        try:
+            geo = get_tdb_tt_ephem_geocenter(tt, ephem).to(u.s).value
+        except ValueError:
+            log.info("No TDB-TT series in ephemeris {0}, using FB90".format(ephem))
+    if geo is None:
+        geo = dtdb_geocenter_interpolated(jd1, jd2, tolerance=tolerance)
+    # Approximate UT1 with UTC, as astropy does
+    njd1, njd2 = erfa.tttai(jd1, jd2)
+    njd1, njd2 = erfa.taiutc(njd1, njd2)
+    ut = day_frac(njd1 - 0.5, njd2)[1]
+    if t.location is not None:
+        loc = t.location
+        elong = loc.longitude.to(u.radian).value
+        rxy = np.hypot(loc.x, loc.y).to(u.km).value
+        z = loc.z.to(u.km).value
+    else:
+        # EarthLocation.from_geodetic(0, 0, 0), on the WGS84 equator
+        elong, rxy, z = 0.0, 6378.137, 0.0
+    geo = geo + dtdb_topocentric(jd1, jd2, ut, elong, rxy, z)
+    tdb1, tdb2 = erfa.tttdb(jd1, jd2, geo)
+    result = Time(tdb1, tdb2, format='jd', scale='tdb', location=t.location,
+                  precision=t.precision)
+    result.format = t.format
+    return result
+
+
 # This seems to be never used!  It also has no docstring!
 # def astropy_gcrs_posvel_from_itrf(loc, toas, obsname='obs'):
 #     t = Time(toas['tdbld'], scale='tdb', format='mjd')
@@ -4,7 +4,11 @@ import numpy as np
 import pint.toa as toa
 from astropy import log
 import astropy.io.fits as pyfits
-from .fits_utils import read_fits_event_mjds_tuples
+from astropy.time import TimeDelta
+from .fits_utils import read_fits_event_mjds_split
+
+# Default number of events processed at once by iter_event_TOAs
+DEFAULT_CHUNKSIZE = 100000
 
 # fits_extension can be a single name or a comma-separated list of allowed
 # extension names.
@@ -46,15 +50,18 @@ def _default_obs_and_scale(mission, timesys, timeref):
     return obs, scale
 
 
-def _get_columns_from_fits(hdu, cols):
+def _get_columns_from_fits(hdu, cols, rows=slice(None)):
     new_dict = {}
     event_dat = hdu.data
-    default_val = np.zeros(len(event_dat))
+    default_val = None
     # Parse and retrieve default values from the FITS columns listed in config
     for col in cols.keys():
         try:
-            val = event_dat.field(cols[col])
+            val = event_dat.field(cols[col])[rows]
         except ValueError:
+            if default_val is None:
+                nrows = len(range(*rows.indices(len(event_dat))))
+                default_val = np.zeros(nrows)
             val = default_val
         new_dict[col] = val
     return new_dict
@@ -75,12 +82,61 @@ def _get_timesys_and_timeref(hdu):
     return timesys, timeref
 
 
+def _check_event_hdu(hdulist, mission):
+    """Check the event HDU of an event file and return (obs, scale)."""
+    extension = mission_config[mission]["fits_extension"]
+
+    if hdulist[1].name not in extension.split(','):
+        raise RuntimeError('First table in FITS file' +
+                           'must be {}. Found {}'.format(extension,
+                                                         hdulist[1].name))
+
+    timesys, timeref = _get_timesys_and_timeref(hdulist[1])
+
+    if not mission_config[mission]['allow_local'] \
+            and timesys != 'TDB':
+        log.error('Raw spacecraft TOAs not yet supported for ' + mission)
+
+    return _default_obs_and_scale(mission, timesys, timeref)
+
+
+def _event_table_from_rows(hdu, mission, obs, scale, rows=slice(None),
+                           weights=None, minmjd=0.0, maxmjd=np.inf):
+    """Make the TOA table for the given rows of an event HDU.
+
+    The table is filled from the FITS columns directly; the extra columns
+    listed in mission_config (and the weights) become flag columns.  Only
+    the events with minmjd < MJD < maxmjd are kept.  Returns the indices
+    (within rows) of the events kept and the table.
+    """
+    mjd_int, mjd_frac = read_fits_event_mjds_split(hdu, rows=rows)
+    mjds_float = mjd_int + mjd_frac
+    idx = np.flatnonzero(np.logical_and((mjds_float > minmjd),
+                                        (mjds_float < maxmjd)))
+    n = len(idx)
+
+    flag_arrays = _get_columns_from_fits(hdu,
+                                         mission_config[mission]["fits_columns"],
+                                         rows=rows)
+    if weights is not None:
+        flag_arrays["weights"] = np.asarray(weights)
+    for key in flag_arrays:
+        flag_arrays[key] = np.asarray(flag_arrays[key])[idx]
+
+    tbl = toa._make_toa_table(mjd_int[idx], mjd_frac[idx], np.zeros(n),
+                              np.inf * np.ones(n), np.repeat(obs, n), [],
+                              scale=scale, flag_arrays=flag_arrays)
+    return idx, tbl
+
+
 def load_event_TOAs(eventname, mission, weights=None):
     '''
     Read photon event times out of a FITS file as PINT TOA objects.
 
     Correctly handles raw event files, or ones processed with axBary to have
     barycentered  TOAs. Different conditions may apply to different missions.
+    The TOAs are made from the same table as get_event_TOAs, which should
+    be preferred for long event lists.
     
     Parameters
     ----------
@@ -96,44 +152,141 @@ def load_event_TOAs(eventname, mission, weights=None):
     -------
     toalist : list of TOA objects
     '''
-    # Load photon times from event file
-    hdulist = pyfits.open(eventname)
+    return toa._toa_list_from_table(
+        get_event_TOAs(eventname, mission, weights=weights).table)
 
-    extension = mission_config[mission]["fits_extension"]
 
-    if hdulist[1].name not in extension.split(','):
-        raise RuntimeError('First table in FITS file' +
-                           'must be {}. Found {}'.format(extension,
-                                                         hdulist[1].name))
+def get_event_TOAs(eventname, mission, weights=None):
+    '''
+    Read photon event times out of a FITS file as a PINT TOAs object.
 
-    timesys, timeref = _get_timesys_and_timeref(hdulist[1])
+    The TOA table is built from the FITS columns as arrays, without making
+    a TOA object per event.
 
-    if not mission_config[mission]['allow_local'] \
-            and timesys != 'TDB':
-        log.error('Raw spacecraft TOAs not yet supported for ' + mission)
+    Parameters
+    ----------
+    eventname : str
+        File name of the FITS event list
+    mission : str
+        Name of the mission (e.g. RXTE, XMM)
+    weights : array or None
+        The array has to be of the same size as the event list.
+
+    Returns
+    -------
+    toas : TOAs
+    '''
+    hdulist = pyfits.open(eventname, memmap=True)
+    try:
+        obs, scale = _check_event_hdu(hdulist, mission)
+        idx, tbl = _event_table_from_rows(hdulist[1], mission, obs, scale,
+                                          weights=weights)
+    finally:
+        hdulist.close()
+    tbl.meta['filename'] = eventname
 
-    obs, scale = _default_obs_and_scale(mission, timesys, timeref)
+    return toa.TOAs(toatable=tbl)
 
-    # Read time column from FITS file
-    mjds = read_fits_event_mjds_tuples(hdulist[1])
 
-    new_kwargs = _get_columns_from_fits(hdulist[1],
-                                        mission_config[mission]["fits_columns"])
+def iter_event_TOAs(eventname, mission, chunksize=DEFAULT_CHUNKSIZE,
+                    weights=None, minmjd=0.0, maxmjd=np.inf):
+    '''
+    Read photon event times out of a FITS file in blocks of rows.
 
-    hdulist.close()
+    This is the same as get_event_TOAs, but the event file is memory
+    mapped and the TOA table is made for chunksize events at a time, so
+    that very long event lists can be processed with bounded memory (see
+    get_event_phases).
 
-    if weights is not None:
-        new_kwargs["weights"] = weights
+    Parameters
+    ----------
+    eventname : str
+        File name of the FITS event list
+    mission : str
+        Name of the mission (e.g. RXTE, XMM)
+    chunksize : int
+        Number of events per block
+    weights : array or None
+        The array has to be of the same size as the event list.
+    minmjd, maxmjd : float
+        Only the events with minmjd < MJD < maxmjd are kept.
+
+    Yields
+    ------
+    rows : numpy.ndarray
+        The indices in the event list of the events of the block that
+        were kept.
+    toas : TOAs
+        The TOAs of the block, in the same order as rows.
+    '''
+    hdulist = pyfits.open(eventname, memmap=True)
+    try:
+        obs, scale = _check_event_hdu(hdulist, mission)
+        nrows = hdulist[1].header['NAXIS2']
+        for start in range(0, nrows, chunksize):
+            rows = slice(start, min(start + chunksize, nrows))
+            w = weights[rows] if weights is not None else None
+            idx, tbl = _event_table_from_rows(hdulist[1], mission, obs,
+                                              scale, rows=rows, weights=w,
+                                              minmjd=minmjd, maxmjd=maxmjd)
+            tbl.meta['filename'] = eventname
+            yield start + idx, toa.TOAs(toatable=tbl)
+    finally:
+        hdulist.close()
+
+
+def get_event_phases(chunks, model, ephem="DE421", planets=False,
+                     apply_clock_corrections=True, time_offset=None):
+    '''
+    Compute model phases for blocks of photon events.
 
-    toalist = [None] * len(mjds)
-    kw = {}
-    for i in range(len(mjds)):
-        # Create TOA list
-        for key in new_kwargs.keys():
-            kw[key] = new_kwargs[key][i]
-        toalist[i] = toa.TOA(mjds[i], obs=obs, scale=scale, **kw)
+    Each block of TOAs is prepared (clock corrections, TDBs, posvels) and
+    passed to model.phase(), so the memory needed is set by the size of the
+    blocks and not by the whole event list.
 
-    return toalist
+    Parameters
+    ----------
+    chunks : iterable
+        (rows, toas) pairs, as yielded by iter_event_TOAs or
+        pint.fermi_toas.iter_Fermi_TOAs.  toas can be a TOAs object or a
+        list of TOA objects, rows gives the index in the event list of
+        each TOA (in the order of the list or of the TOA table index).
+    model : TimingModel
+        The timing model used to compute the phases.
+    ephem : str
+        Solar system ephemeris.
+    planets : bool
+        Compute the planet positions as well.
+    apply_clock_corrections : bool
+        Apply the observatory clock corrections to the TOAs.
+    time_offset : Quantity or None
+        A time offset added to all the TOAs before computing the phases.
+
+    Yields
+    ------
+    rows : numpy.ndarray
+        The indices of the events in the event list, in the order of the
+        rows of the TOA table.
+    toas : TOAs
+        The prepared TOAs of the block.
+    phase : Phase
+        The integer and fractional model phases of the TOAs.
+    '''
+    for rows, ts in chunks:
+        if len(rows) == 0:
+            continue
+        if not isinstance(ts, toa.TOAs):
+            ts = toa.TOAs(toalist=ts)
+        if apply_clock_corrections:
+            ts.apply_clock_corrections()
+        ts.compute_TDBs(ephem=ephem)
+        ts.compute_posvels(ephem, planets, interpolate=True)
+        if time_offset is not None:
+            ts.adjust_TOAs(TimeDelta(np.ones(ts.ntoas) * time_offset,
+                                     scale='tt'))
+        phase = model.phase(ts.table)
+        # The table is grouped by observatory, map its rows back to the file
+        yield np.asarray(rows)[np.asarray(ts.table['index'])], ts, phase
 
 
 def load_RXTE_TOAs(eventname):
@@ -8,7 +8,8 @@ import pint.residuals
 import astropy.units as u
 from astropy.coordinates import SkyCoord, EarthLocation
 from astropy.extern import six
-from pint.fits_utils import read_fits_event_mjds, read_fits_event_mjds_tuples
+from pint.fits_utils import read_fits_event_mjds
+from pint.fits_utils import read_fits_event_mjds_split
 from pint.observatory import get_observatory
 
 from astropy import log
@@ -49,28 +50,9 @@ def calc_lat_weights(energies, angseps, logeref=4.1, logesig=0.5):
 
     return fgeom * np.exp(-np.power((logE-logeref)/np.sqrt(2.)/logesig,2.))
 
-def load_Fermi_TOAs(ft1name,weightcolumn=None,targetcoord=None,logeref=4.1,
-                    logesig=0.5,minweight=0.0, minmjd=0.0, maxmjd=np.inf):
-    '''
-    TOAlist = load_Fermi_TOAs(ft1name)
-      Read photon event times out of a Fermi FT1 file and return
-      a list of PINT TOA objects.
-      Correctly handles raw FT1 files, or ones processed with gtbary
-      to have barycentered or geocentered TOAs.
-
-      weightcolumn specifies the FITS column name to read the photon weights
-      from.  The special value 'CALC' causes the weights to be computed empirically
-      as in Philippe Bruel's SearchPulsation code.
-      logeref and logesig are parameters for the weight computation and are only
-      used when weightcolumn='CALC'.
-
-      When weights are loaded, or computed, events are filtered by weight >= minweight
-    '''
-    import astropy.io.fits as pyfits
-    # Load photon times from FT1 file
-    hdulist = pyfits.open(ft1name)
-    ft1hdr=hdulist[1].header
-    ft1dat=hdulist[1].data
+def _check_fermi_hdu(hdu):
+    """Return the observatory and time scale of the events in an FT1 HDU."""
+    ft1hdr = hdu.header
 
     # TIMESYS will be 'TT' for unmodified Fermi LAT events (or geocentered), and
     #                 'TDB' for events barycentered with gtbary
@@ -83,66 +65,152 @@ def load_Fermi_TOAs(ft1name,weightcolumn=None,targetcoord=None,logeref=4.1,
     timeref = ft1hdr['TIMEREF']
     log.info("TIMEREF {0}".format(timeref))
 
-    # Read time column from FITS file
-    mjds = read_fits_event_mjds_tuples(hdulist[1])
-    if len(mjds) == 0:
-        log.error('No MJDs read from file!')
-        raise
+    if timesys == 'TDB':
+        log.info("Building barycentered TOAs")
+        return 'Barycenter', 'tdb'
+    elif timeref == 'LOCAL':
+        log.info('Building spacecraft local TOAs')
+        assert timesys == 'TT'
+        try:
+            get_observatory('Fermi')
+        except KeyError:
+            log.error('Fermi observatory not defined. Make sure you have specified an FT2 file!')
+            raise
+        return 'Fermi', 'tt'
+    else:
+        log.info("Building geocentered TOAs")
+        return 'Geocenter', 'tt'
+
+def _fermi_table_from_rows(hdu, obs, scale, rows=slice(None), weightcolumn=None,
+                           targetcoord=None, logeref=4.1, logesig=0.5,
+                           minweight=0.0, minmjd=0.0, maxmjd=np.inf):
+    """Make the TOA table for the given rows of an FT1 HDU.
+
+    The table is filled from the FITS columns as arrays.  When weights are
+    read or computed, events with weight <= minweight are dropped, and
+    only events with minmjd < MJD < maxmjd are kept.  Returns the indices
+    (within rows) of the events kept and the table.
+    """
+    ft1dat = hdu.data
 
-    energies = ft1dat.field('ENERGY')*u.MeV
+    mjd_int, mjd_frac = read_fits_event_mjds_split(hdu, rows=rows)
+    energies = np.asarray(ft1dat.field('ENERGY')[rows], dtype=np.float64)
+
+    # limit the TOAs to ones in selected MJD range
+    mjds_float = mjd_int + mjd_frac
+    keep = np.logical_and((mjds_float > minmjd),(mjds_float < maxmjd))
+
+    flag_arrays = {}
     if weightcolumn is not None:
         if weightcolumn == 'CALC':
-            photoncoords = SkyCoord(ft1dat.field('RA')*u.degree,ft1dat.field('DEC')*u.degree,frame='icrs')
-            weights = calc_lat_weights(ft1dat.field('ENERGY'),
+            photoncoords = SkyCoord(ft1dat.field('RA')[rows]*u.degree,
+                                    ft1dat.field('DEC')[rows]*u.degree,
+                                    frame='icrs')
+            weights = calc_lat_weights(energies,
                 photoncoords.separation(targetcoord), logeref=logeref,
                 logesig=logesig)
         else:
-            weights = ft1dat.field(weightcolumn)
+            weights = np.asarray(ft1dat.field(weightcolumn)[rows],
+                                 dtype=np.float64)
         if minweight > 0.0:
-            idx = np.where(weights>minweight)[0]
-            mjds = mjds[idx]
-            energies = energies[idx]
-            weights = weights[idx]
+            keep &= weights > minweight
+        flag_arrays['weight'] = weights[keep]
+
+    idx = np.flatnonzero(keep)
+    flag_arrays['energy'] = energies[idx]*u.MeV
+    n = len(idx)
+    try:
+        tbl = toa._make_toa_table(mjd_int[idx], mjd_frac[idx], np.zeros(n),
+                                  np.inf * np.ones(n), np.repeat(obs, n), [],
+                                  scale=scale, flag_arrays=flag_arrays)
+    except KeyError:
+        log.error('Error processing Fermi TOAs. You may have forgotten to specify an FT2 file with --ft2')
+        raise
 
-    # limit the TOAs to ones in selected MJD range
-    mjds_float = np.array([r[0] + r[1] for r in mjds])
-    idx = np.logical_and((mjds_float > minmjd),(mjds_float < maxmjd))
-    mjds = mjds[idx]
-    energies = energies[idx]
-    if weightcolumn is not None:
-        weights = weights[idx]
+    return idx, tbl
 
-    if timesys == 'TDB':
-        log.info("Building barycentered TOAs")
-        if weightcolumn is None:
-            toalist=[toa.TOA(m,obs='Barycenter',scale='tdb',energy=e) for m,e in zip(mjds,energies)]
-        else:
-            toalist=[toa.TOA(m,obs='Barycenter',scale='tdb',energy=e,weight=w) for m,e,w in zip(mjds,energies,weights)]
-    else:
-        if timeref == 'LOCAL':
-            log.info('Building spacecraft local TOAs, with MJDs in range {0} to {1}'.format(mjds[0],mjds[-1]))
-            assert timesys == 'TT'
-            try:
-                fermiobs = get_observatory('Fermi')
-            except KeyError:
-                log.error('Fermi observatory not defined. Make sure you have specified an FT2 file!')
-                raise
-
-            try:
-                if weightcolumn is None:
-                    toalist=[toa.TOA(m, obs='Fermi', scale='tt',energy=e)
-                            for m,e in zip(mjds,energies)]
-                else:
-                    toalist=[toa.TOA(m, obs='Fermi', scale='tt',energy=e,weight=w)
-                            for m,e,w in zip(mjds,energies,weights)]
-            except KeyError:
-                log.error('Error processing Fermi TOAs. You may have forgotten to specify an FT2 file with --ft2')
-                raise
-        else:
-            log.info("Building geocentered TOAs")
-            if weightcolumn is None:
-                toalist=[toa.TOA(m, obs='Geocenter', scale='tt',energy=e) for m,e in zip(mjds,energies)]
-            else:
-                toalist=[toa.TOA(m, obs='Geocenter', scale='tt',energy=e,weight=w) for m,e,w in zip(mjds,energies,weights)]
+def load_Fermi_TOAs(ft1name,weightcolumn=None,targetcoord=None,logeref=4.1,
+                    logesig=0.5,minweight=0.0, minmjd=0.0, maxmjd=np.inf):
+    '''
+    TOAlist = load_Fermi_TOAs(ft1name)
+      Read photon event times out of a Fermi FT1 file and return
+      a list of PINT TOA objects.
+      Correctly handles raw FT1 files, or ones processed with gtbary
+      to have barycentered or geocentered TOAs.
 
-    return toalist
+      weightcolumn specifies the FITS column name to read the photon weights
+      from.  The special value 'CALC' causes the weights to be computed empirically
+      as in Philippe Bruel's SearchPulsation code.
+      logeref and logesig are parameters for the weight computation and are only
+      used when weightcolumn='CALC'.
+
+      When weights are loaded, or computed, events are filtered by weight >= minweight
+
+      The TOAs are made from the same table as get_Fermi_TOAs, which should
+      be preferred for long event lists.
+    '''
+    ts = get_Fermi_TOAs(ft1name, weightcolumn=weightcolumn,
+                        targetcoord=targetcoord, logeref=logeref,
+                        logesig=logesig, minweight=minweight, minmjd=minmjd,
+                        maxmjd=maxmjd)
+    return toa._toa_list_from_table(ts.table)
+
+def get_Fermi_TOAs(ft1name,weightcolumn=None,targetcoord=None,logeref=4.1,
+                   logesig=0.5,minweight=0.0, minmjd=0.0, maxmjd=np.inf):
+    '''
+    Read photon event times out of a Fermi FT1 file as a PINT TOAs object.
+
+    This takes the same arguments as load_Fermi_TOAs, and the TOA table is
+    built from the FT1 columns as arrays, without making a TOA object per
+    photon.  The photon energies (and weights, if requested) are stored
+    in the 'energy' and 'weight' flags.
+    '''
+    import astropy.io.fits as pyfits
+    hdulist = pyfits.open(ft1name, memmap=True)
+    try:
+        if hdulist[1].header['NAXIS2'] == 0:
+            log.error('No MJDs read from file!')
+            raise ValueError('No events in {0}'.format(ft1name))
+        obs, scale = _check_fermi_hdu(hdulist[1])
+        idx, tbl = _fermi_table_from_rows(hdulist[1], obs, scale,
+                                          weightcolumn=weightcolumn,
+                                          targetcoord=targetcoord,
+                                          logeref=logeref, logesig=logesig,
+                                          minweight=minweight, minmjd=minmjd,
+                                          maxmjd=maxmjd)
+    finally:
+        hdulist.close()
+    tbl.meta['filename'] = ft1name
+
+    return toa.TOAs(toatable=tbl)
+
+def iter_Fermi_TOAs(ft1name,weightcolumn=None,targetcoord=None,logeref=4.1,
+                    logesig=0.5,minweight=0.0, minmjd=0.0, maxmjd=np.inf,
+                    chunksize=100000):
+    '''
+    Read photon event times out of a Fermi FT1 file in blocks of rows.
+
+    This takes the same arguments as get_Fermi_TOAs, but the FT1 file is
+    memory mapped and the TOA table is made for chunksize events at a time.
+    For each block, yields the indices of the events kept (in the FT1 file)
+    and their TOAs, as expected by pint.event_toas.get_event_phases.
+    '''
+    import astropy.io.fits as pyfits
+    hdulist = pyfits.open(ft1name, memmap=True)
+    try:
+        obs, scale = _check_fermi_hdu(hdulist[1])
+        nrows = hdulist[1].header['NAXIS2']
+        for start in range(0, nrows, chunksize):
+            rows = slice(start, min(start + chunksize, nrows))
+            idx, tbl = _fermi_table_from_rows(hdulist[1], obs, scale,
+                                              rows=rows,
+                                              weightcolumn=weightcolumn,
+                                              targetcoord=targetcoord,
+                                              logeref=logeref,
+                                              logesig=logesig,
+                                              minweight=minweight,
+                                              minmjd=minmjd, maxmjd=maxmjd)
+            tbl.meta['filename'] = ft1name
+            yield start + idx, toa.TOAs(toatable=tbl)
+    finally:
+        hdulist.close()
@@ -10,22 +10,8 @@ except ImportError:
     from astropy._erfa import DAYSEC as SECS_PER_DAY
 from .utils import fortran_float
 
-def read_fits_event_mjds_tuples(event_hdu,timecolumn='TIME'):
-    """Read a set of MJDs from a FITS HDU, with proper converstion of times to MJD
-
-    The FITS time format is defined here:
-    https://heasarc.gsfc.nasa.gov/docs/journal/timing3.html
-
-    Returns
-    -------
-    mjds: MJDs returned are tuples of two doubles (jd1, jd2), as use by
-        astropy Time() objects.
-
-    """
-
-    event_hdr=event_hdu.header
-    event_dat=event_hdu.data
-
+def _read_timezero_and_mjdref(event_hdr):
+    """Return TIMEZERO (in s) and MJDREF from an event header as long doubles."""
     # Collect TIMEZERO
     # IMPORTANT: TIMEZERO is in SECONDS (not days)!
     try:
@@ -48,14 +34,61 @@ def read_fits_event_mjds_tuples(event_hdu,timecolumn='TIME'):
             MJDREF = np.longdouble(event_hdr['MJDREFI']) + np.longdouble(event_hdr['MJDREFF'])
     log.info("MJDREF = {0}".format(MJDREF))
 
+    return TIMEZERO, MJDREF
+
+def read_fits_event_mjds_tuples(event_hdu,timecolumn='TIME',rows=slice(None)):
+    """Read a set of MJDs from a FITS HDU, with proper converstion of times to MJD
+
+    The FITS time format is defined here:
+    https://heasarc.gsfc.nasa.gov/docs/journal/timing3.html
+
+    Only the given rows (a slice or index array) are read, by default all.
+
+    Returns
+    -------
+    mjds: MJDs returned are tuples of two doubles (jd1, jd2), as use by
+        astropy Time() objects.
+
+    """
+
+    TIMEZERO, MJDREF = _read_timezero_and_mjdref(event_hdu.header)
+
     # Should check timecolumn units to be sure they are seconds!
 
     # MJD = (TIMECOLUMN + TIMEZERO)/SECS_PER_DAY + MJDREF
-    mjds = np.array([(MJDREF, tt) for tt in (event_dat.field(timecolumn)
-        + TIMEZERO)/SECS_PER_DAY])
+    times = (event_hdu.data.field(timecolumn)[rows] + TIMEZERO)/SECS_PER_DAY
+    mjds = np.empty((len(times), 2), dtype=times.dtype)
+    mjds[:,0] = MJDREF
+    mjds[:,1] = times
 
     return mjds
 
+def read_fits_event_mjds_split(event_hdu,timecolumn='TIME',rows=slice(None)):
+    """Read a set of MJDs from a FITS HDU as integer and fractional days
+
+    This is the same as read_fits_event_mjds_tuples, but the MJDs are split
+    into two arrays of doubles holding the integer and the fractional part
+    of the day, as used by pint.toa._make_toa_table.  The sum is done in
+    long double so no precision is lost for long observations.
+
+    Returns
+    -------
+    mjd_int, mjd_frac: numpy.ndarray
+    """
+
+    TIMEZERO, MJDREF = _read_timezero_and_mjdref(event_hdu.header)
+
+    # Should check timecolumn units to be sure they are seconds!
+
+    ref_int = np.floor(MJDREF)
+    times = np.asarray(event_hdu.data.field(timecolumn)[rows],
+                       dtype=np.longdouble)
+    days = (times + TIMEZERO)/SECS_PER_DAY + (MJDREF - ref_int)
+    days_int = np.floor(days)
+
+    return (np.asarray(ref_int + days_int, dtype=np.float64),
+            np.asarray(days - days_int, dtype=np.float64))
+
 def read_fits_event_mjds(event_hdu,timecolumn='TIME'):
     """Read a set of MJDs from a FITS HDU, with proper converstion of times to MJD
 
@@ -1,10 +1,14 @@
 from __future__ import absolute_import, print_function, division
-import copy, numbers
+import copy, numbers, collections, itertools
 import numpy as np
 import astropy.units as u
 import abc
 import scipy.optimize as opt, scipy.linalg as sl
+import scipy.sparse as sps
+from astropy import table
 from .residuals import resids
+from .phase import Phase
+from . import least_squares
 
 
 class Fitter(object):
@@ -133,8 +137,12 @@ class WlsFitter(Fitter):
         super(WlsFitter, self).__init__(toas=toas, model=model)
         self.method = 'weighted_least_square'
 
-    def fit_toas(self, maxiter=1, threshold=False):
-        """Run a linear weighted least-squared fitting method"""
+    def fit_toas(self, maxiter=1, threshold=False, method='qr'):
+        """Run a linear weighted least-squared fitting method
+
+        method is 'qr' (column-pivoted QR decomposition) or 'svd', see
+        pint.least_squares.lstsq.
+        """
         chi2 = 0
         for i in range(maxiter):
             fitp = self.get_fitparams()
@@ -147,48 +155,21 @@ class WlsFitter(Fitter):
             residuals = self.resids.time_resids.to(u.s).value
             Nvec = self.toas.get_errors().to(u.s).value
 
-            # "Whiten" design matrix and residuals by dividing by uncertainties
-            M = M/Nvec.reshape((-1,1))
-            residuals = residuals / Nvec
-
-            # For each column in design matrix except for col 0 (const. pulse
-            # phase), subtract the mean value, and scale by the column RMS.
-            # This helps avoid numerical problems later.  The scaling factors need
-            # to be saved to recover correct parameter units.
-            # NOTE, We remove subtract mean value here, since it did not give us a
-            # fast converge fitting.
-            # M[:,1:] -= M[:,1:].mean(axis=0)
-            fac = M.std(axis=0)
-            fac[0] = 1.0
-            M /= fac
-
-            # Singular value decomp of design matrix:
-            #   M = U s V^T
-            # Dimensions:
-            #   M, U are Ntoa x Nparam
-            #   s is Nparam x Nparam diagonal matrix encoded as 1-D vector
-            #   V^T is Nparam x Nparam
-            U, s, Vt = sl.svd(M, full_matrices=False)
-
-            # Note, here we could do various checks like report
-            # matrix condition number or zero out low singular values.
-            #print 'log_10 cond=', np.log10(s.max()/s.min())
-            # Note, Check the threshold from data precision level.Borrowed from
-            # np Curve fit.
-            if threshold:
-                threshold_val = np.finfo(np.longdouble).eps * max(M.shape) * s[0]
-                s[s<threshold_val] = 0.0
-            # Sigma = np.dot(Vt.T / s, U.T)
-            # The post-fit parameter covariance matrix
-            #   Sigma = V s^-2 V^T
-            Sigma = np.dot(Vt.T / (s**2), Vt)
-            # Parameter uncertainties.  Scale by fac recovers original units.
-            errs = np.sqrt(np.diag(Sigma)) / fac
+            # "Whiten" design matrix and residuals by dividing by
+            # uncertainties, and normalize the design matrix columns to
+            # avoid numerical problems.  This is done in place, the
+            # scaling factors recover the parameter units.
+            M, residuals = least_squares.whiten(M, residuals, Nvec)
+            fac = least_squares.normalize_columns(M)
 
-            # The delta-parameter values
-            #   dpars = V s^-1 U^T r
+            # The delta-parameter values and their covariance matrix
+            #   Sigma = (M^T M)^-1
             # Scaling by fac recovers original units
-            dpars = np.dot(Vt.T, np.dot(U.T,residuals)/s) / fac
+            dpars, Sigma = least_squares.lstsq(M, residuals, method=method,
+                                               threshold=threshold,
+                                               overwrite=True)
+            errs = np.sqrt(np.diag(Sigma)) / fac
+            dpars /= fac
             for ii, pn in enumerate(fitp.keys()):
                 uind = params.index(pn)             # Index of designmatrix
                 un = 1.0 / (units[uind])     # Unit in designmatrix
@@ -204,6 +185,303 @@ class WlsFitter(Fitter):
 
         return chi2
 
+class LMFitter(Fitter):
+    """A damped Gauss-Newton (Levenberg-Marquardt) fitter.
+
+    Each iteration computes the design matrix once, then tries the steps
+    (J^T J + lambda I) dp = J^T r, with J the whitened design matrix
+    with normalized columns, increasing lambda until chi2 decreases.
+    The SVD of J is reused for all the values of lambda, so a rejected
+    step costs one model evaluation only.
+    """
+    def __init__(self, toas=None, model=None):
+        super(LMFitter, self).__init__(toas=toas, model=model)
+        self.method = 'levenberg_marquardt'
+
+    def _step_values(self, fitp, fitpv, params, units, scale_by_F0, dpars):
+        """Return the fit parameter values after a step dpars."""
+        values = {}
+        for pn in fitp.keys():
+            uind = params.index(pn)             # Index of designmatrix
+            un = 1.0 / (units[uind])     # Unit in designmatrix
+            if scale_by_F0:
+                un *= u.s
+            pv, dpv = fitpv[pn] * fitp[pn].units, dpars[uind] * un
+            values[pn] = np.longdouble((pv+dpv) / fitp[pn].units)
+        return values
+
+    def fit_toas(self, maxiter=20, ftol=1e-6, xtol=1e-3, lambda0=1e-3,
+                 lambda_max=1e10, threshold=False):
+        """Fit until convergence and return the chi2.
+
+        Parameters
+        ----------
+        maxiter : int
+            Maximum number of iterations (design matrix evaluations).
+        ftol : float
+            Converged when an accepted step decreases chi2 by less than
+            ftol * chi2.
+        xtol : float
+            Converged when no parameter changes by more than xtol times its
+            uncertainty.
+        lambda0 : float
+            Initial damping, 0 gives plain Gauss-Newton steps first.
+        lambda_max : float
+            The fit stops when the damping needed exceeds lambda_max.
+        threshold : bool
+            Ignore the singular values of the design matrix that are below
+            the numerical precision.
+
+        The iteration counts and the convergence status are stored in
+        self.fitresult, a scipy.optimize.OptimizeResult.
+        """
+        fitp = self.get_fitparams()
+        self.update_resids()
+        chi2 = self.resids.chi2
+        lam = lambda0
+        nfev, nit = 1, 0
+        converged, message = False, "Maximum number of iterations reached."
+        while nit < maxiter:
+            nit += 1
+            fitpv = self.get_fitparams_num()
+            M, params, units, scale_by_F0 = self.get_designmatrix()
+            residuals = self.resids.time_resids.to(u.s).value
+            Nvec = self.toas.get_errors().to(u.s).value
+            M, residuals = least_squares.whiten(M, residuals, Nvec)
+            fac = least_squares.normalize_columns(M)
+            U, s, Vt = sl.svd(M, full_matrices=False, overwrite_a=True)
+            if threshold:
+                s[s < least_squares.threshold_value(s[0], U.shape)] = 0.0
+            Utr = np.dot(U.T, residuals)
+            # The parameter covariance at the current linearization
+            with np.errstate(divide='ignore'):
+                errs = np.sqrt(np.diag(np.dot(Vt.T / (s**2), Vt))) / fac
+
+            accepted = False
+            while not accepted:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    w = np.where(s > 0, s / (s**2 + lam), 0.0)
+                dpars = np.dot(Vt.T, Utr * w) / fac
+                self.set_params(self._step_values(fitp, fitpv, params, units,
+                                                  scale_by_F0, dpars))
+                self.update_resids()
+                nfev += 1
+                new_chi2 = self.resids.chi2
+                if new_chi2 <= chi2:
+                    accepted = True
+                    lam = lam / 10
+                else:
+                    # Reject the step
+                    self.set_params(fitpv)
+                    lam = max(10 * lam, 1e-3)
+                    if lam > lambda_max:
+                        self.update_resids()
+                        nfev += 1
+                        break
+            if not accepted:
+                message = "No step decreasing chi2 was found."
+                break
+            dchi2, chi2 = chi2 - new_chi2, new_chi2
+            pchange = [np.abs(dpars[params.index(pn)]) / errs[params.index(pn)]
+                       for pn in fitp.keys()]
+            if dchi2 <= ftol * chi2 or max(pchange + [0]) <= xtol:
+                converged, message = True, "Converged."
+                break
+
+        self.set_param_uncertainties(dict((pn, errs[params.index(pn)])
+                                          for pn in fitp.keys()))
+        self.fitresult = opt.OptimizeResult(
+            x=np.array([getattr(self.model, pn).value for pn in fitp.keys()]),
+            success=converged, message=message, nit=nit, nfev=nfev,
+            njev=nit, fun=chi2)
+        return chi2
+
+class IncrementalWlsFitter(Fitter):
+    """A weighted least square fitter that takes the TOAs in blocks.
+
+    Each block of TOAs is reduced to the triangular factor R of its whitened
+    design matrix, the projection z = Q^T r of its whitened residuals and
+    the residual sum of squares rss outside of the range of the design
+    matrix.  A fit stacks the blocks' factors and solves the (nblocks *
+    nparam x nparam) problem, so adding or removing TOAs only costs time
+    proportional to the TOAs added.  With all the blocks linearized at the
+    same parameters, fit_toas gives the same step as a WlsFitter fit of all
+    the TOAs.
+
+    After a fit the blocks are not recomputed: their residuals are updated
+    linearly (z -> z - R dpars, rss is unchanged).  Use relinearize() to
+    recompute some or all of the blocks at the current model parameters.
+
+    The toas attribute holds the TOAs of all the blocks, merged into one
+    TOAs, and resids and resids_init are the residuals of those TOAs for
+    the current and the initial model.  They are only made when they are
+    used after the blocks or the model changed, so adding TOAs stays cheap
+    as long as they are not looked at.
+
+    Parameters
+    ----------
+    toas : a pint TOAs instance, optional
+        A first block of TOAs.
+    model : a pint timing model instance
+        The initial timing model for fitting.
+    """
+    def __init__(self, toas=None, model=None):
+        super(IncrementalWlsFitter, self).__init__(toas=toas, model=model)
+        self.method = 'incremental_weighted_least_square'
+        self.blocks = collections.OrderedDict()
+        self._block_ids = itertools.count()
+        self._phase_ref = None
+        self._columns = None
+        if toas is not None:
+            self.add_toas(toas)
+
+    @property
+    def toas(self):
+        """The TOAs of all the blocks."""
+        if self._toas is None and getattr(self, 'blocks', None):
+            blocks = [b[0] for b in self.blocks.values()]
+            self._toas = copy.copy(blocks[0])
+            self._toas.table = table.vstack(
+                [t.table for t in blocks],
+                metadata_conflicts='silent').group_by('obs')
+            self._toas.table_selects = []
+            self._toas.table_changed()
+        return self._toas
+
+    @toas.setter
+    def toas(self, toas):
+        self._toas = toas
+        self._resids = self._resids_init = None
+
+    @property
+    def resids(self):
+        """The residuals of all the TOAs for the current model."""
+        if self._resids is None and self.toas is not None:
+            self._resids = resids(toas=self.toas, model=self.model)
+        return self._resids
+
+    @resids.setter
+    def resids(self, r):
+        self._resids = r
+
+    @property
+    def resids_init(self):
+        """The residuals of all the TOAs for the initial model."""
+        if self._resids_init is None and self.toas is not None:
+            self._resids_init = resids(toas=self.toas, model=self.model_init)
+        return self._resids_init
+
+    @resids_init.setter
+    def resids_init(self, r):
+        self._resids_init = r
+
+    def _blocks_changed(self):
+        """Drop the merged TOAs and residuals, they are made again on use."""
+        self.toas = None
+
+    def add_toas(self, toas, key=None):
+        """Add a block of TOAs and return its key.
+
+        The block is linearized at the current model parameters.
+        """
+        if key is None:
+            key = next(self._block_ids)
+        if key in self.blocks:
+            raise ValueError("TOA block %r already exists." % (key,))
+        self.blocks[key] = self._block_factor(toas)
+        self._blocks_changed()
+        return key
+
+    def remove_toas(self, key):
+        """Remove a block of TOAs, e.g. for jackknife tests, and return it."""
+        toas = self.blocks.pop(key)[0]
+        self._blocks_changed()
+        return toas
+
+    def relinearize(self, keys=None):
+        """Recompute blocks (all by default) at the current parameters."""
+        if keys is None:
+            keys = list(self.blocks.keys())
+        for key in keys:
+            self.blocks[key] = self._block_factor(self.blocks[key][0])
+
+    def _block_factor(self, toas):
+        """Return (toas, R, z, rss) for a block of TOAs."""
+        M, params, units, scale_by_F0 = self.model.designmatrix(
+            toas.table, incfrozen=False, incoffset=True)
+        columns = (params, units, scale_by_F0)
+        if self._columns is None:
+            self._columns = columns
+        elif self._columns[0] != params:
+            raise ValueError("The fit parameters changed, the TOA blocks "
+                             "need to be added again.")
+        # Residuals in seconds.  All the blocks use the phase of the first
+        # TOA as reference, their weighted mean is absorbed by the Offset.
+        phase = self.model.phase(toas.table)
+        if self._phase_ref is None:
+            self._phase_ref = Phase(phase.int[0], phase.frac[0])
+        residuals = (phase - self._phase_ref).frac.value / \
+            self.model.F0.value
+        Nvec = toas.get_errors().to(u.s).value
+        M, residuals = least_squares.whiten(M, residuals, Nvec)
+        Q, R = sl.qr(M, mode='economic', overwrite_a=True)
+        z = np.dot(Q.T, residuals)
+        rss = max(np.dot(residuals, residuals) - np.dot(z, z), 0.0)
+        return (toas, R, z, rss)
+
+    def fit_toas(self, maxiter=1, threshold=False, method='qr'):
+        """Run a linear weighted least-squared fit of all the TOA blocks.
+
+        Returns the linearized post-fit chi2.  method is passed to
+        pint.least_squares.lstsq.
+        """
+        if not self.blocks:
+            raise ValueError("No TOAs to fit.")
+        params, units, scale_by_F0 = self._columns
+        chi2 = 0
+        for i in range(maxiter):
+            fitp = self.get_fitparams()
+            fitpv = self.get_fitparams_num()
+            fitperrs = self.get_fitparams_uncertainty()
+            blocks = list(self.blocks.values())
+            # Combine the blocks: the R factor of the stacked R factors is
+            # the R factor of the full whitened design matrix.
+            Q, R = sl.qr(np.vstack([b[1] for b in blocks]), mode='economic')
+            z = np.dot(Q.T, np.concatenate([b[2] for b in blocks]))
+
+            # Scale the columns as WlsFitter does, the column norms of M
+            # are the ones of R.
+            fac = least_squares.normalize_columns(R)
+            dpars, Sigma = least_squares.lstsq(R, z, method=method,
+                                               threshold=threshold,
+                                               overwrite=True)
+            errs = np.sqrt(np.diag(Sigma)) / fac
+            dpars /= fac
+            for ii, pn in enumerate(fitp.keys()):
+                uind = params.index(pn)             # Index of designmatrix
+                un = 1.0 / (units[uind])     # Unit in designmatrix
+                if scale_by_F0:
+                    un *= u.s
+                pv, dpv = fitpv[pn] * fitp[pn].units, dpars[uind] * un
+                fitpv[pn] = np.longdouble((pv+dpv) / fitp[pn].units)
+                fitperrs[pn] = errs[uind]
+            self.set_params(fitpv)
+            self.set_param_uncertainties(fitperrs)
+
+            # Update the blocks linearly; the Offset is not a model
+            # parameter, so it stays in the residuals.
+            step = dpars.copy()
+            step[params.index('Offset')] = 0.0
+            chi2 = 0
+            for key, (toas, Rb, zb, rss) in self.blocks.items():
+                zb = zb - np.dot(Rb, step)
+                self.blocks[key] = (toas, Rb, zb, rss)
+                chi2 += rss + np.dot(zb - Rb[:, 0] * dpars[0],
+                                     zb - Rb[:, 0] * dpars[0])
+        # The model changed, the residuals are made again on use
+        self.resids = None
+        return chi2
+
 class GLSFitter(Fitter):
     """
        A class for weighted least square fitting method. The design matrix is
@@ -214,7 +492,13 @@ class GLSFitter(Fitter):
         self.method = 'generalized_least_square'
 
     def fit_toas(self, maxiter=1, threshold=False, full_cov=False):
-        """Run a Generalized least-squared fitting method"""
+        """Run a Generalized least-squared fitting method
+
+        With full_cov=True the TOA covariance matrix of the noise model is
+        used directly.  It is handled as a diagonal plus low-rank matrix
+        (see pint.woodbury) when the noise components allow it, and as a
+        dense matrix otherwise.
+        """
         chi2 = 0
         for i in range(maxiter):
             fitp = self.get_fitparams()
@@ -228,59 +512,56 @@ class GLSFitter(Fitter):
             self.update_resids()
             residuals = self.resids.time_resids.to(u.s).value
 
-            # get any noise design matrices and weight vectors
+            # normalize the design matrix
+            norm = least_squares.normalize_columns(M)
+
+            # get any noise design matrices and weight vectors; the noise
+            # basis columns are not normalized.  The ECORR basis is sparse,
+            # in which case the full design matrix is kept sparse too.
             if not full_cov:
-                Mn = self.model.noise_model_designmatrix(self.toas.table)
-                phi = self.model.noise_model_basis_weight(self.toas.table)
                 phiinv = np.zeros(M.shape[1])
-                if Mn is not None and phi is not None:
+                basis = self.model.noise_model_basis(self.toas.table)
+                if basis is not None:
+                    Mn, phi = basis
                     phiinv = np.concatenate((phiinv, 1/phi))
-                    M = np.hstack((M, Mn))
-
-            # normalize the design matrix
-            norm = np.sqrt(np.sum(M**2, axis=0))
-            ntmpar = len(fitp)
-            if M.shape[1] > ntmpar:
-                norm[ntmpar:] = 1
-            if np.any(norm == 0):
-                print("Warning: one or more of the design-matrix columns is null.")
-            M /= norm
+                    norm = np.concatenate((norm, np.ones(Mn.shape[1])))
+                    if sps.issparse(Mn):
+                        M = sps.hstack((sps.csr_matrix(M), Mn)).tocsr()
+                    else:
+                        M = np.hstack((M, Mn))
 
             # compute covariance matrices
             if full_cov:
-                cov = self.model.covariance_matrix(self.toas.table)
-                cf = sl.cho_factor(cov)
-                cm = sl.cho_solve(cf, M)
+                cov = self.model.woodbury_covariance(self.toas.table)
+                if cov is not None:
+                    cov_solve = cov.solve
+                else:
+                    cf = sl.cho_factor(
+                        self.model.covariance_matrix(self.toas.table))
+                    cov_solve = lambda x: sl.cho_solve(cf, x)
+                cm = cov_solve(M)
                 mtcm = np.dot(M.T, cm)
                 mtcy = np.dot(cm.T, residuals)
 
             else:
                 Nvec = self.model.scaled_sigma(self.toas.table).to(u.s).value**2
                 cinv = 1 / Nvec
-                mtcm = np.dot(M.T, cinv[:,None]*M)
+                if sps.issparse(M):
+                    mtcm = M.T.dot(sps.diags(cinv).dot(M)).toarray()
+                else:
+                    mtcm = np.dot(M.T, cinv[:,None]*M)
                 mtcm += np.diag(phiinv)
-                mtcy = np.dot(M.T, cinv*residuals)
-
-
-            try:
-                c = sl.cho_factor(mtcm)
-                xhat = sl.cho_solve(c, mtcy)
-                xvar = sl.cho_solve(c, np.eye(len(mtcy)))
-            except:
-                U, s, Vt = sl.svd(mtcm, full_matrices=False)
-
-                if threshold:
-                    threshold_val = np.finfo(np.longdouble).eps * max(M.shape) * s[0]
-                    s[s<threshold_val] = 0.0
+                mtcy = M.T.dot(cinv*residuals)
 
-                xvar = np.dot(Vt.T / s, Vt)
-                xhat = np.dot(Vt.T, np.dot(U.T, mtcy)/s)
 
+            xhat, xvar = least_squares.normal_solve(mtcm, mtcy,
+                                                    threshold=threshold,
+                                                    nrows=M.shape[0])
 
             # compute linearized chisq
-            newres = residuals - np.dot(M, xhat)
+            newres = residuals - M.dot(xhat)
             if full_cov:
-                chi2 = np.dot(newres, sl.cho_solve(cf, newres))
+                chi2 = np.dot(newres, cov_solve(newres))
             else:
                 chi2 = np.dot(newres, cinv*newres)
 
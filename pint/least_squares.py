@@ -0,0 +1,121 @@
+"""Linear algebra shared by the least-squares fitters.
+
+The fitters work on the whitened design matrix, i.e. the design matrix with
+each row divided by the TOA uncertainty, with normalized columns.  All the
+functions here work in float64, in place where possible, so that a single
+(ntoas x nparams) buffer is used per iteration.
+"""
+from __future__ import absolute_import, print_function, division
+import numpy as np
+import scipy.linalg as sl
+from astropy import log
+
+__all__ = ['whiten', 'normalize_columns', 'threshold_value', 'lstsq',
+           'normal_solve']
+
+
+def whiten(M, r, sigma):
+    """Divide the rows of M (in place) and r by the uncertainties sigma.
+
+    Returns the whitened M and r.
+    """
+    M /= sigma[:, None]
+    return M, r / sigma
+
+
+def normalize_columns(M, skip=None):
+    """Divide (in place) the columns of M by their norms.
+
+    The columns from skip on (e.g. noise bases, which are not normalized)
+    are left unchanged.  Returns the normalization factors, which divide
+    the solution to get it back in the original units.
+    """
+    ncols = M.shape[1] if skip is None else skip
+    fac = np.ones(M.shape[1])
+    fac[:ncols] = np.sqrt(np.sum(M[:, :ncols]**2, axis=0))
+    if np.any(fac == 0):
+        log.warn("One or more of the design-matrix columns is null.")
+        fac[fac == 0] = 1.0
+    M[:, :ncols] /= fac[:ncols]
+    return fac
+
+
+def threshold_value(s, shape):
+    """Singular values below this are at the numerical precision of a
+    float64 matrix of the given shape with largest singular value s."""
+    return np.finfo(np.float64).eps * max(shape) * s
+
+
+def lstsq(M, r, method='qr', threshold=False, overwrite=False):
+    """Solve the linear least-squares problem min |M x - r|.
+
+    Parameters
+    ----------
+    M : array
+        The whitened, normalized, design matrix.
+    r : array
+        The whitened residuals.
+    method : str
+        'qr' for a column-pivoted QR decomposition, or 'svd'.
+    threshold : bool
+        Ignore the directions of parameter space at the numerical
+        precision (small singular values, or small diagonal elements of the
+        triangular QR factor); these get zero step and zero variance.
+    overwrite : bool
+        Allow the decomposition to overwrite M.
+
+    Returns
+    -------
+    x : array
+        The solution.
+    Sigma : array
+        The covariance matrix of the solution, (M^T M)^-1.
+    """
+    nparams = M.shape[1]
+    if method == 'qr':
+        Q, R, piv = sl.qr(M, mode='economic', pivoting=True,
+                          overwrite_a=overwrite)
+        d = np.abs(np.diag(R))
+        rank = len(d)
+        if threshold and rank:
+            rank = np.sum(d >= threshold_value(d[0], M.shape))
+        Rk = R[:rank, :rank]
+        x = np.zeros(nparams)
+        x[piv[:rank]] = sl.solve_triangular(Rk, np.dot(Q[:, :rank].T, r))
+        Rinv = sl.solve_triangular(Rk, np.eye(rank))
+        Sigma = np.zeros((nparams, nparams))
+        Sigma[np.ix_(piv[:rank], piv[:rank])] = np.dot(Rinv, Rinv.T)
+    elif method == 'svd':
+        U, s, Vt = sl.svd(M, full_matrices=False, overwrite_a=overwrite)
+        w = np.zeros_like(s)
+        keep = s > 0
+        if threshold:
+            keep &= s >= threshold_value(s[0], M.shape)
+        w[keep] = 1.0 / s[keep]
+        x = np.dot(Vt.T, w * np.dot(U.T, r))
+        Sigma = np.dot(Vt.T * w**2, Vt)
+    else:
+        raise ValueError("Unknown method '%s'." % method)
+    return x, Sigma
+
+
+def normal_solve(A, b, threshold=False, nrows=None):
+    """Solve the normal equations A x = b.
+
+    A Cholesky decomposition of A is used, with an SVD as a fallback if A
+    is not numerically positive definite.  With threshold, the singular
+    values at the precision of a matrix with nrows rows are ignored.
+
+    Returns the solution and A^-1.
+    """
+    try:
+        cf = sl.cho_factor(A)
+        return sl.cho_solve(cf, b), sl.cho_solve(cf, np.eye(len(b)))
+    except sl.LinAlgError:
+        U, s, Vt = sl.svd(A, full_matrices=False)
+        w = np.zeros_like(s)
+        keep = s > 0
+        if threshold:
+            keep &= s >= threshold_value(s[0], (nrows or len(b), len(b)))
+        w[keep] = 1.0 / s[keep]
+        return np.dot(Vt.T, w * np.dot(U.T, b)), np.dot(Vt.T * w, Vt)
@@ -0,0 +1,120 @@
+"""Likelihood of the noise model parameters.
+
+The GLS marginal likelihood, with the timing model parameters analytically
+marginalized over (flat priors), is
+
+    log L = -1/2 [r^T N^-1 r - d^T Sigma^-1 d + log|N| + log|phi|
+                  + log|Sigma| + n log(2 pi)]
+
+with r the timing residuals, N the diagonal of the scaled TOA variances,
+T = [M, F] the timing model design matrix followed by the noise bases,
+phi their weights (infinite for the timing model columns),
+d = T^T N^-1 r and Sigma = phi^-1 + T^T N^-1 T.
+"""
+from __future__ import absolute_import, print_function, division
+import numpy as np
+import astropy.units as u
+import scipy.linalg as sl
+import scipy.sparse as sps
+from .residuals import resids
+
+__all__ = ['NoiseLikelihood']
+
+
+class NoiseLikelihood(object):
+    """GLS marginal likelihood as a function of the noise parameters.
+
+    The residuals and the timing model design matrix are computed once, at
+    creation, for the current timing model parameters.  Each likelihood
+    evaluation then only recomputes the scaled TOA uncertainties and the
+    noise bases and weights.  The products T^T N^-1 T and T^T N^-1 r are
+    kept and reused as long as the white noise (EFAC, EQUAD) and the size
+    of the noise bases do not change, so that a change of the ECORR or red
+    noise parameters costs O(ntoas * k + k^3) for k basis columns.
+
+    Parameters
+    ----------
+    toas : a pint TOAs instance
+        The input toas.
+    model : a pint timing model instance
+        The timing model.  Its noise parameters are modified in place by
+        loglikelihood().
+    params : list of str, optional
+        The names of the noise parameters loglikelihood() takes values for.
+        Defaults to the noise component parameters with a value.
+    """
+    def __init__(self, toas, model, params=None):
+        self.toas = toas
+        self.model = model
+        if params is None:
+            params = []
+            if 'NoiseComponent' in model.component_types:
+                for nc in model.NoiseComponent_list:
+                    params += [p for p in nc.params
+                               if getattr(nc, p).value is not None]
+        self.params = list(params)
+        self.residuals = resids(toas=toas, model=model).time_resids.to(u.s).value
+        M = model.designmatrix(toas.table, incfrozen=False, incoffset=True)[0]
+        norm = np.sqrt(np.sum(M**2, axis=0))
+        norm[norm == 0] = 1
+        self.M = M / norm
+        self._white = None
+
+    def set_values(self, values):
+        """Set the noise parameters, given in the order of self.params."""
+        if len(values) != len(self.params):
+            raise ValueError("Expected %d values, got %d."
+                             % (len(self.params), len(values)))
+        for pn, v in zip(self.params, values):
+            getattr(self.model, pn).value = v
+
+    def basis(self):
+        """Return the full basis T = [M, F] and the noise weights phi."""
+        noise = self.model.noise_model_basis(self.toas.table)
+        if noise is None:
+            return self.M, np.zeros(0)
+        F, phi = noise
+        if sps.issparse(F):
+            T = sps.hstack((sps.csr_matrix(self.M), F)).tocsr()
+        else:
+            T = np.hstack((self.M, F))
+        return T, phi
+
+    def _white_products(self, Nvec, T):
+        """Return r^T N^-1 r, log|N|, T^T N^-1 r and T^T N^-1 T."""
+        if self._white is not None:
+            N0, shape0, products = self._white
+            if shape0 == T.shape and np.array_equal(N0, Nvec):
+                return products
+        r = self.residuals
+        Ninv = 1.0 / Nvec
+        if sps.issparse(T):
+            TNT = T.T.dot(sps.diags(Ninv).dot(T)).toarray()
+        else:
+            TNT = np.dot(T.T, Ninv[:, None] * T)
+        products = (np.dot(r, Ninv * r), np.sum(np.log(Nvec)),
+                    T.T.dot(Ninv * r), TNT)
+        self._white = (Nvec, T.shape, products)
+        return products
+
+    def loglikelihood(self, values=None):
+        """Return the log-likelihood.
+
+        If given, values are set as the noise parameters first.
+        """
+        if values is not None:
+            self.set_values(values)
+        Nvec = self.model.scaled_sigma(self.toas.table).to(u.s).value**2
+        T, phi = self.basis()
+        rNr, logdet_N, d, TNT = self._white_products(Nvec, T)
+        Sigma = TNT.copy()
+        ntm = self.M.shape[1]
+        idx = np.arange(ntm, T.shape[1])
+        Sigma[idx, idx] += 1.0 / phi
+        cf = sl.cho_factor(Sigma)
+        logdet_Sigma = 2 * np.sum(np.log(np.diag(cf[0])))
+        dSd = np.dot(d, sl.cho_solve(cf, d))
+        return -0.5 * (rNr - dSd + logdet_N + np.sum(np.log(phi)) +
+                       logdet_Sigma + len(Nvec) * np.log(2 * np.pi))
+
+    __call__ = loglikelihood
@@ -34,6 +34,8 @@ class Astrometry(DelayComponent):
             description="Parallax"))
 
         self.delay_funcs_component += [self.solar_system_geometric_delay,]
+        self.register_value_func(self.solar_system_geometric_delay,
+                                 self.solar_system_geometric_delay_value)
         self.category = 'astrometry'
         self.register_deriv_funcs(self.d_delay_astrometry_d_PX, 'PX')
 
@@ -51,9 +53,15 @@ class Astrometry(DelayComponent):
 
     def barycentric_radio_freq(self, toas):
         """Return radio frequencies (MHz) of the toas corrected for Earth motion"""
+        return self.barycentric_radio_freq_value(toas) * u.MHz
+
+    def barycentric_radio_freq_value(self, toas):
+        """Barycentric radio frequencies in MHz, as a plain array."""
         L_hat = self.ssb_to_psb_xyz_ICRS(epoch=toas['tdbld'].astype(numpy.float64))
-        v_dot_L_array = numpy.sum(toas['ssb_obs_vel']*L_hat, axis=1)
-        return toas['freq'] * (1.0 - v_dot_L_array / const.c)
+        ssb_obs_vel = utils.column_value(toas['ssb_obs_vel'], u.km / u.s)
+        v_dot_L_array = numpy.sum(ssb_obs_vel * numpy.asarray(L_hat), axis=1)
+        return utils.column_value(toas['freq'], u.MHz) * \
+            (1.0 - v_dot_L_array / const.c.to(u.km / u.s).value)
 
     def solar_system_geometric_delay(self, toas, acc_delay=None):
         """Returns geometric delay (in sec) due to position of site in
@@ -62,16 +70,32 @@ class Astrometry(DelayComponent):
         NOTE: currently assumes XYZ location of TOA relative to SSB is
         available as 3-vector toa.xyz, in units of light-seconds.
         """
+        return self.solar_system_geometric_delay_value(toas) * u.second
+
+    def solar_system_geometric_delay_value(self, toas, acc_delay=None):
+        """Geometric delay in seconds, as a plain array.
+
+        The unitless version of solar_system_geometric_delay; positions are
+        taken in light-seconds.
+        """
         L_hat = self.ssb_to_psb_xyz_ICRS(epoch=toas['tdbld'].astype(numpy.float64))
-        re_dot_L = numpy.sum(toas['ssb_obs_pos']*L_hat, axis=1)
-        delay = -re_dot_L.to(ls).value
+        ssb_obs_pos = utils.column_value(toas['ssb_obs_pos'], ls)
+        re_dot_L = numpy.sum(ssb_obs_pos * numpy.asarray(L_hat), axis=1)
+        delay = -re_dot_L
         if self.PX.value != 0.0 \
-           and numpy.count_nonzero(toas['ssb_obs_pos']) > 0:
-            L = ((1.0 / self.PX.value) * u.kpc)
-            # TODO: numpy.sum currently loses units in some cases...
-            re_sqr = numpy.sum(toas['ssb_obs_pos']**2, axis=1) * toas['ssb_obs_pos'].unit**2
-            delay += (0.5 * (re_sqr / L) * (1.0 - re_dot_L**2 / re_sqr)).to(ls).value
-        return delay * u.second
+           and numpy.count_nonzero(ssb_obs_pos) > 0:
+            L = (1.0 / self.PX.value) * u.kpc.to(ls)
+            re_sqr = numpy.sum(ssb_obs_pos**2, axis=1)
+            delay += 0.5 * (re_sqr / L) * (1.0 - re_dot_L**2 / re_sqr)
+        return delay
+
+    def d_delay_d_toa(self, toas, acc_delay=None, d_acc_delay_d_toa=0.0):
+        """Rate of the geometric delay, -v.L/c, from the velocity of the
+        site relative to the SSB."""
+        L_hat = self.ssb_to_psb_xyz_ICRS(epoch=toas['tdbld'].astype(numpy.float64))
+        ssb_obs_vel = utils.column_value(toas['ssb_obs_vel'], u.km / u.s)
+        v_dot_L = numpy.sum(ssb_obs_vel * numpy.asarray(L_hat), axis=1)
+        return -v_dot_L / const.c.to(u.km / u.s).value
 
     def get_d_delay_quantities(self, toas):
         """Calculate values needed for many d_delay_d_param functions """
@@ -17,6 +17,8 @@ from ..utils import taylor_horner, split_prefixed_name
 # This value is cited from Duncan Lorimer, Michael Kramer, Handbook of Pulsar
 # Astronomy, Second edition, Page 86, Note 1
 DMconst = 1.0/2.41e-4 * u.MHz * u.MHz * u.s * u.cm**3 / u.pc
+# DMconst for DM in pc cm^-3 and frequencies in MHz, giving seconds
+DMconst_value = DMconst.to(u.MHz**2 * u.s * u.cm**3 / u.pc).value
 
 class Dispersion(DelayComponent):
     """This class provides a base dispersion timing model. The dm varience will
@@ -38,6 +40,8 @@ class Dispersion(DelayComponent):
 
         self.dm_value_funcs = [self.base_dm,]
         self.delay_funcs_component += [self.dispersion_delay,]
+        self.register_value_func(self.dispersion_delay,
+                                 self.dispersion_delay_value)
         self.category = 'dispersion'
 
     def setup(self):
@@ -92,17 +96,24 @@ class Dispersion(DelayComponent):
         return dmdelay
 
     def dispersion_delay(self, toas, acc_delay=None):
+        return self.dispersion_delay_value(toas) * u.second
+
+    def dispersion_delay_value(self, toas, acc_delay=None):
+        """Dispersion delay in seconds, as a plain array.
+
+        The unitless version of dispersion_delay.
+        """
         try:
-            bfreq = self.barycentric_radio_freq(toas)
+            bfreq = self.barycentric_radio_freq_value(toas)
         except AttributeError:
             warn("Using topocentric frequency for dedispersion!")
-            bfreq = toas['freq']
+            bfreq = ut.column_value(toas['freq'], u.MHz)
 
-        dm = np.zeros(len(toas)) * self.DM.units
+        dm = np.zeros(len(toas))
         for dm_f in self.dm_value_funcs:
-            dm += dm_f(toas)
+            dm += dm_f(toas).to(self.DM.units).value
 
-        return self.dispersion_time_delay(dm, bfreq)
+        return dm * DMconst_value / bfreq**2.0
 
     def print_par(self,):
         # TODO we need to have a better design for print out the parameters in
@@ -124,29 +135,52 @@ class Dispersion(DelayComponent):
     def d_delay_d_DMs(self, toas, param_name, acc_delay=None): # NOTE we should have a better name for this.
         """Derivatives for constant DM
         """
+        return self._d_delay_d_DMs(toas, [param_name,])[param_name]
+
+    def _bfreq(self, toas):
         try:
-            bfreq = self.barycentric_radio_freq(toas)
+            return self.barycentric_radio_freq(toas)
         except AttributeError:
             warn("Using topocentric frequency for dedispersion!")
-            bfreq = toas['freq']
-        par = getattr(self, param_name)
-        unit = par.units
-        if param_name == 'DM':
-            order = 0
-        else:
-            pn, idxf, idxv = split_prefixed_name(param_name)
-            order = idxv
+            return toas['freq']
+
+    def _d_delay_d_DMs(self, toas, param_names):
+        """Derivatives wrt DM and its time derivatives, as a dict."""
+        bfreq = self._bfreq(toas)
         dms = self.get_DM_terms()
-        dm_terms = np.longdouble(np.zeros(len(dms)))
-        dm_terms[order] = np.longdouble(1.0)
         if self.DMEPOCH.value is None:
             DMEPOCH = toas['tdbld'][0]
         else:
             DMEPOCH = self.DMEPOCH.value
         dt = (toas['tdbld'] - DMEPOCH) * u.day
         dt_value = (dt.to(u.yr)).value
-        d_dm_d_dm_param = taylor_horner(dt_value, dm_terms)* (self.DM.units/par.units)
-        return DMconst * d_dm_d_dm_param/ bfreq**2.0
+        result = {}
+        for param_name in param_names:
+            par = getattr(self, param_name)
+            if param_name == 'DM':
+                order = 0
+            else:
+                pn, idxf, idxv = split_prefixed_name(param_name)
+                order = idxv
+            dm_terms = np.longdouble(np.zeros(len(dms)))
+            dm_terms[order] = np.longdouble(1.0)
+            d_dm_d_dm_param = taylor_horner(dt_value, dm_terms)* (self.DM.units/par.units)
+            result[param_name] = DMconst * d_dm_d_dm_param/ bfreq**2.0
+        return result
+
+    def d_delay_d_params(self, toas, params, acc_delay=None):
+        """Derivatives for several dispersion parameters at once.
+
+        The barycentric frequencies are computed once for all the DM
+        parameters.
+        """
+        dm_params = [pn for pn in params
+                     if self.deriv_funcs[pn] == [self.d_delay_d_DMs,]]
+        result = self._d_delay_d_DMs(toas, dm_params) if dm_params else {}
+        others = [pn for pn in params if pn not in dm_params]
+        result.update(super(Dispersion, self).d_delay_d_params(toas, others,
+                                                               acc_delay))
+        return result
 
 class DispersionDMX(Dispersion):
     """This class provides a DMX model based on the class of Dispersion.
@@ -219,27 +253,43 @@ class DispersionDMX(Dispersion):
         return dm
 
     def d_delay_d_DMX(self, toas, param_name, acc_delay=None):
-        condition = {}
+        return self._d_delay_d_DMXs(toas, [param_name,])[param_name]
+
+    def _d_delay_d_DMXs(self, toas, param_names):
+        """Derivatives wrt DMX parameters, as a dict.
+
+        The TOA selection and the barycentric frequencies are computed once
+        for all the parameters.
+        """
         if not hasattr(self, 'dmx_toas_selector'):
             self.dmx_toas_selector = TOASelect(is_range=True)
-        param = getattr(self, param_name)
-        dmx_index = param.index
         DMXR1_mapping = self.get_prefix_mapping_component('DMXR1_')
         DMXR2_mapping = self.get_prefix_mapping_component('DMXR2_')
-        r1 = getattr(self, DMXR1_mapping[dmx_index]).quantity
-        r2 = getattr(self, DMXR2_mapping[dmx_index]).quantity
-        condition = {param_name:(r1.mjd, r2.mjd)}
+        condition = {}
+        for param_name in param_names:
+            dmx_index = getattr(self, param_name).index
+            r1 = getattr(self, DMXR1_mapping[dmx_index]).quantity
+            r2 = getattr(self, DMXR2_mapping[dmx_index]).quantity
+            condition[param_name] = (r1.mjd, r2.mjd)
         select_idx = self.dmx_toas_selector.get_select_index(condition, toas['mjd_float'])
 
-        try:
-            bfreq = self.barycentric_radio_freq(toas)
-        except AttributeError:
-            warn("Using topocentric frequency for dedispersion!")
-            bfreq = toas['freq']
-        dmx = np.zeros(len(toas))
-        for k, v in select_idx.items():
-           dmx[v] = 1.0
-        return DMconst * dmx / bfreq**2.0
+        bfreq = self._bfreq(toas)
+        result = {}
+        for param_name in param_names:
+            dmx = np.zeros(len(toas))
+            dmx[select_idx[param_name]] = 1.0
+            result[param_name] = DMconst * dmx / bfreq**2.0
+        return result
+
+    def d_delay_d_params(self, toas, params, acc_delay=None):
+        """Derivatives for several dispersion parameters at once."""
+        dmx_params = [pn for pn in params
+                      if self.deriv_funcs[pn] == [self.d_delay_d_DMX,]]
+        result = self._d_delay_d_DMXs(toas, dmx_params) if dmx_params else {}
+        others = [pn for pn in params if pn not in dmx_params]
+        result.update(super(DispersionDMX, self).d_delay_d_params(toas, others,
+                                                                  acc_delay))
+        return result
 
     def print_par(self,):
         result = ''
@@ -63,6 +63,8 @@ class Glitch(PhaseComponent):
                        unitTplt=lambda x: 'day',
                        type_match='float'))
         self.phase_funcs_component += [self.glitch_phase]
+        self.phase_derivs_wrt_delay += [self.d_glitch_phase_d_delay,]
+        self.register_value_func(self.glitch_phase, self.glitch_phase_value)
         self.category = 'glitch'
 
     def setup(self):
@@ -137,6 +139,61 @@ class Glitch(PhaseComponent):
                      1./6. * dt[affected]*dt[affected] * dF2) + decayterm
             return phs.to(u.cycle)
 
+    def glitch_phase_value(self, toas, delay):
+        """Glitch phase in cycles, as a plain longdouble array.
+
+        The unitless version of glitch_phase, delay is in seconds.
+        """
+        phs = numpy.zeros(len(toas), dtype=numpy.longdouble)
+        return phs + self.sweep_phase(self.sweep_inputs(toas, delay), {})
+
+    def sweep_params(self):
+        return [p + '%d' % idx for p in self.glitch_prop
+                for idx in set(self.glitch_indices)]
+
+    def sweep_inputs(self, toas, delay):
+        """Affected TOAs and their time since each glitch, in seconds."""
+        inputs = {}
+        glepnames = [x for x in self.params if x.startswith('GLEP_')]
+        for glepnm in glepnames:
+            glep = getattr(self, glepnm)
+            dt = (numpy.asarray(toas['tdbld']) - glep.value) * SECS_PER_DAY - delay
+            affected = dt > 0.0
+            inputs[glep.index] = (affected, dt[affected])
+        return inputs
+
+    def sweep_phase(self, inputs, values):
+        """Glitch phase for a PhaseSweep, see glitch_phase."""
+        phs = 0.0
+        for idx, (affected, dt) in inputs.items():
+            v = lambda p: self.sweep_value(values, p + '%d' % idx)
+            dF0D = v('GLF0D_')
+            tau = v('GLTD_') * SECS_PER_DAY
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                decayterm = numpy.where(dF0D != 0.0, dF0D * tau *
+                                        (1.0 - numpy.exp(-dt / tau)), 0.0)
+            dphs = v('GLPH_') + dt * (v('GLF0_') + 0.5 * dt * (v('GLF1_') +
+                   1. / 3. * dt * v('GLF2_'))) + decayterm
+            glphs = numpy.zeros(dphs.shape[:-1] + affected.shape,
+                                dtype=numpy.longdouble)
+            glphs[..., affected] = dphs
+            phs = phs + glphs
+        return phs
+
+    def d_glitch_phase_d_delay(self, toas, delay):
+        """Derivative of the glitch phase wrt delay, i.e. minus the
+        frequency change of the glitches."""
+        dpdd = numpy.zeros(len(toas), dtype=numpy.longdouble)
+        inputs = self.sweep_inputs(toas, delay.to(u.second).value)
+        for idx, (affected, dt) in inputs.items():
+            v = lambda p: getattr(self, p + '%d' % idx).value
+            dfreq = v('GLF0_') + dt * (v('GLF1_') + 0.5 * dt * v('GLF2_'))
+            if v('GLF0D_') != 0.0:
+                dfreq = dfreq + v('GLF0D_') * \
+                    numpy.exp(-dt / (v('GLTD_') * SECS_PER_DAY))
+            dpdd[affected] -= dfreq
+        return dpdd * u.cycle / u.second
+
     def d_phase_d_GLPH(self, toas, param, delay):
         """Calculate the derivative wrt GLPH_"""
         p, ids, idv = split_prefixed_name(param)
@@ -68,6 +68,7 @@ class PhaseJump(PhaseComponent):
         super(PhaseJump, self).__init__()
         self.add_param(p.maskParameter(name = 'JUMP', units='second'))
         self.phase_funcs_component += [self.jump_phase,]
+        self.register_value_func(self.jump_phase, self.jump_phase_value)
         self.category = 'phase_jump'
 
     def setup(self):
@@ -93,6 +94,38 @@ class PhaseJump(PhaseComponent):
             jphase[mask] += jump_par.quantity * self.F0.quantity
         return jphase
 
+    def jump_phase_value(self, toas, delay):
+        """Jump phase in cycles, as a plain array.
+
+        The unitless version of jump_phase.
+        """
+        jphase = numpy.zeros(len(toas))
+        return jphase + self.sweep_phase(self.sweep_inputs(toas, delay), {})
+
+    def sweep_params(self):
+        return list(self.jumps)
+
+    def sweep_inputs(self, toas, delay):
+        """Boolean masks of the TOAs selected by each jump."""
+        masks = []
+        for jump in self.jumps:
+            mask = numpy.zeros(len(toas), dtype=bool)
+            mask[getattr(self, jump).select_toa_mask(toas)] = True
+            masks.append(mask)
+        return masks
+
+    def sweep_phase(self, inputs, values):
+        """Jump phase for a PhaseSweep, see jump_phase."""
+        jphase = 0.0
+        f0 = self.sweep_value(values, 'F0')
+        for jump, mask in zip(self.jumps, inputs):
+            jval = self.sweep_value(values, jump) * f0
+            jp = numpy.zeros(numpy.shape(jval)[:-1] + mask.shape,
+                             dtype=numpy.longdouble)
+            jp[..., mask] = jval
+            jphase = jphase + jp
+        return jphase
+
     def d_phase_d_jump(self, toas, jump_param, delay):
         jpar = getattr(self, jump_param)
         d_phase_d_j = numpy.zeros(len(toas))
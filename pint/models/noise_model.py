@@ -3,7 +3,9 @@
 from __future__ import absolute_import, print_function, division
 from .timing_model import Component,  MissingParameter
 from . import parameter as p
+import hashlib
 import numpy as np
+import scipy.sparse as sps
 import astropy.units as u
 
 
@@ -177,30 +179,29 @@ class EcorrNoise(NoiseComponent):
 
         A quantization matrix maps TOAs to observing epochs.
         The weights used are the square of the ECORR values.
-
+        The matrix is returned as a scipy.sparse CSR matrix, since each TOA
+        belongs to one epoch at most.
         """
         t = (toas['tdbld'].quantity * u.day).to(u.s).value
-        ecorrs = self.get_ecorrs()
-        Umats = []
-        for ec in ecorrs:
-            mask = ec.select_toa_mask(toas)
-            Umats.append(create_quantization_matrix(t[mask]))
-        nc = np.sum(U.shape[1] for U in Umats)
-        Umat = np.zeros((len(t), nc))
-        weight = np.zeros(nc)
-        nctot = 0
-        for ct, ec in enumerate(ecorrs):
+        rows, cols, weight = [], [], []
+        for ec in self.get_ecorrs():
             mask = ec.select_toa_mask(toas)
-            nn = Umats[ct].shape[1]
-            Umat[mask, nctot:nn+nctot] = Umats[ct]
-            weight[nctot:nn+nctot] = ec.quantity.to(u.s).value ** 2
-            nctot += nn
-        return (Umat, weight)
+            epoch, nepoch = quantization_epochs(t[mask])
+            in_epoch = epoch >= 0
+            rows.append(mask[in_epoch])
+            cols.append(epoch[in_epoch] + len(weight))
+            weight.extend([ec.quantity.to(u.s).value ** 2] * nepoch)
+        if rows:
+            rows = np.concatenate(rows)
+            cols = np.concatenate(cols)
+        Umat = sps.csr_matrix((np.ones(len(rows)), (rows, cols)),
+                              shape=(len(t), len(weight)))
+        return (Umat, np.array(weight))
 
     def ecorr_cov_matrix(self, toas):
         """Full ECORR covariance matrix."""
         U, Jvec = self.ecorr_basis_weight_pair(toas)
-        return np.dot(U * Jvec[None,:], U.T)
+        return U.dot(sps.diags(Jvec)).dot(U.T).toarray()
 
 
 class PLRedNoise(NoiseComponent):
@@ -237,6 +238,7 @@ class PLRedNoise(NoiseComponent):
 
         self.covariance_matrix_funcs += [self.pl_rn_cov_matrix, ]
         self.basis_funcs += [self.pl_rn_basis_weight_pair, ]
+        self._fourier_cache = None
 
     def setup(self):
         super(PLRedNoise, self).setup()
@@ -260,40 +262,70 @@ class PLRedNoise(NoiseComponent):
         the dataset.
 
         """
+        Fmat, f = self.pl_rn_basis(toas)
+        return (Fmat, self.pl_rn_weight(f))
+
+    def pl_rn_basis(self, toas):
+        """Return the Fourier design matrix and its frequencies.
 
+        The basis only depends on the TOA times and on the number of
+        frequencies, so the last one computed is kept and reused as long as
+        these do not change.  It should not be modified in place.
+        """
         t = (toas['tdbld'].quantity * u.day).to(u.s).value
+        nf = self.get_pl_vals()[2]
+        key = (nf, len(t), hashlib.sha1(np.ascontiguousarray(t)).hexdigest())
+        if self._fourier_cache is None or self._fourier_cache[0] != key:
+            Fmat, f = create_fourier_design_matrix(t, nf)
+            self._fourier_cache = (key, Fmat, f)
+        return self._fourier_cache[1:]
+
+    def pl_rn_weight(self, f):
+        """Return the red noise weights at the Fourier basis frequencies."""
         amp, gam, nf = self.get_pl_vals()
-        Fmat, f = create_fourier_design_matrix(t, nf)
-        weight = powerlaw(f, amp, gam) * f[0]
-        return (Fmat, weight)
+        return powerlaw(f, amp, gam) * f[0]
 
     def pl_rn_cov_matrix(self, toas):
         Fmat, phi = self.pl_rn_basis_weight_pair(toas)
         return np.dot(Fmat * phi[None,:], Fmat.T)
 
 
-def create_quantization_matrix(toas, dt=1, nmin=2):
-    """Create quantization matrix mapping TOAs to observing epochs."""
-    isort = np.argsort(toas)
-
-    bucket_ref = [toas[isort[0]]]
-    bucket_ind = [[isort[0]]]
-
-    for i in isort[1:]:
-        if toas[i] - bucket_ref[-1] < dt:
-            bucket_ind[-1].append(i)
-        else:
-            bucket_ref.append(toas[i])
-            bucket_ind.append([i])
-
-    # find only epochs with more than 1 TOA
-    bucket_ind2 = [ind for ind in bucket_ind if len(ind) >= nmin]
-
-    U = np.zeros((len(toas),len(bucket_ind2)),'d')
-    for i,l in enumerate(bucket_ind2):
-        U[l,i] = 1
+def quantization_epochs(toas, dt=1, nmin=2):
+    """Assign TOAs to observing epochs.
 
-    return U
+    An epoch starts at the earliest TOA not yet assigned and includes all
+    the TOAs less than dt after it.  Returns the epoch index of each TOA,
+    -1 for the TOAs of epochs with less than nmin TOAs, and the number of
+    epochs.  Epochs are numbered in time order.
+    """
+    toas = np.asarray(toas)
+    n = len(toas)
+    isort = np.argsort(toas)
+    ts = toas[isort]
+    # One searchsorted per epoch finds the end of each bucket
+    starts = []
+    start = 0
+    while start < n:
+        starts.append(start)
+        start = max(np.searchsorted(ts, ts[start] + dt, side='left'),
+                    start + 1)
+    counts = np.diff(np.append(starts, n)).astype(int)
+    good = counts >= nmin
+    epoch_sorted = np.repeat(np.where(good, np.cumsum(good) - 1, -1), counts)
+    epoch = np.empty(n, dtype=int)
+    epoch[isort] = epoch_sorted
+    return epoch, int(np.sum(good))
+
+def create_quantization_matrix(toas, dt=1, nmin=2, sparse=False):
+    """Create quantization matrix mapping TOAs to observing epochs.
+
+    With sparse=True a scipy.sparse CSR matrix is returned.
+    """
+    epoch, nepoch = quantization_epochs(toas, dt, nmin)
+    rows = np.nonzero(epoch >= 0)[0]
+    U = sps.csr_matrix((np.ones(len(rows)), (rows, epoch[rows])),
+                       shape=(len(toas), nepoch))
+    return U if sparse else U.toarray()
 
 def create_fourier_design_matrix(t, nmodes, Tspan=None):
     """
@@ -320,11 +352,32 @@ def create_fourier_design_matrix(t, nmodes, Tspan=None):
     Ffreqs[0::2] = f
     Ffreqs[1::2] = f
 
-    F[:,::2] = np.sin(2*np.pi*t[:,None]*f[None,:])
-    F[:,1::2] = np.cos(2*np.pi*t[:,None]*f[None,:])
+    for k, sin_k, cos_k in harmonics(2*np.pi*t/T, nmodes):
+        F[:,2*k-2] = sin_k
+        F[:,2*k-1] = cos_k
 
     return F, Ffreqs
 
+def harmonics(theta, nmax):
+    """Generate sin(k*theta) and cos(k*theta) for k = 1, ..., nmax.
+
+    Yields (k, sin(k*theta), cos(k*theta)).  Only sin(theta) and
+    cos(theta) are evaluated, the higher harmonics follow from the angle
+    addition recurrence
+
+        sin((k+1)x) = sin(kx) cos(x) + cos(kx) sin(x)
+        cos((k+1)x) = cos(kx) cos(x) - sin(kx) sin(x)
+
+    The rounding errors grow linearly with k, to about k times the machine
+    precision.
+    """
+    s1 = np.sin(theta)
+    c1 = np.cos(theta)
+    sk, ck = s1, c1
+    for k in range(1, nmax + 1):
+        yield k, sk, ck
+        sk, ck = sk * c1 + ck * s1, ck * c1 - sk * s1
+
 def powerlaw(f, A=1e-16, gamma=5):
     """Power-law PSD.
 
@@ -14,8 +14,15 @@ import astropy.constants as const
 from astropy.coordinates.angles import Angle
 import re
 import numbers
+import itertools
 from . import priors
 from ..toa_select import TOASelect
+from ..toa import flag_column_name
+
+# Source of the parameter versions.  Every change of a parameter value takes
+# a new number from this counter, so versions are never reused even across
+# copies of a parameter.
+_version_counter = itertools.count(1)
 
 
 class Parameter(object):
@@ -177,8 +184,10 @@ class Parameter(object):
                                  ' allowed.')
             else:
                 self._quantity = val
+                self._version = next(_version_counter)
                 return
         self._quantity = self.set_quantity(val)
+        self._version = next(_version_counter)
 
     def prior_pdf(self,value=None, logpdf=False):
         """Return the prior probability, evaluated at the current value of
@@ -222,6 +231,16 @@ class Parameter(object):
             else:
                 self.value = val
         self._quantity = self.set_quantity(val)
+        self._version = next(_version_counter)
+
+    @property
+    def version(self):
+        """A number that changes every time the parameter value is set.
+
+        Timing model caches use it to find out whether results computed
+        from this parameter are still valid.
+        """
+        return self._version
 
     @property
     def uncertainty(self):
@@ -993,6 +1012,10 @@ class prefixParameter(object):
     def value(self, val):
         self.param_comp.value = val
 
+    @property
+    def version(self):
+        return self.param_comp.version
+
     @property
     def uncertainty(self):
         return self.param_comp.uncertainty
@@ -1351,11 +1374,20 @@ class maskParameter(floatParameter):
         # We need to consider some more complicated situation
         key = self.key.replace('-', '')
         if key not in column_match.keys(): # This only works for the one with flags.
-            section_name = key+'_section'
-            if section_name not in toas.keys():
-                flag_col = [x.get(key, None) for x in toas['flags']]
-                toas[section_name] = flag_col
-            col = toas[section_name]
+            flag_col = flag_column_name(key)
+            if flag_col not in toas.keys():
+                # No TOA has this flag
+                return numpy.array([], dtype=int)
+            col = toas[flag_col]
+            if col.dtype.kind not in 'US':
+                # Numerical flag, compare with the key values as numbers
+                try:
+                    condition = {self.name: tuple(float(v) for v in
+                                                  self.key_value)}
+                    if len(self.key_value) == 1:
+                        condition[self.name] = condition[self.name][0]
+                except ValueError:
+                    pass
         else:
             col = toas[column_match[key]]
         select_idx = self.toa_selector.get_select_index(condition, col)
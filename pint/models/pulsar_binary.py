@@ -186,6 +186,31 @@ class PulsarBinary(DelayComponent):
         self.update_binary_object(toas, acc_delay)
         return self.binary_instance.d_binarydelay_d_par(param)
 
+    def d_delay_d_params(self, toas, params, acc_delay=None):
+        """Return the binary model delay derivatives for several parameters.
+
+        The binary object is updated only once for all the parameters, and
+        the derivatives share the binary model intermediate quantities.
+        """
+        self.update_binary_object(toas, acc_delay)
+        return self.binary_instance.d_binarydelay_d_params(params)
+
+    def d_delay_d_toa(self, toas, acc_delay=None, d_acc_delay_d_toa=0.0):
+        """Rate of the binary delay.
+
+        The binary delay depends on time through t - T0 (TASC for the ELL1
+        models) with t the barycentric time, so its rate is minus the
+        derivative wrt T0, times the rate of t.
+        """
+        self.update_binary_object(toas, acc_delay)
+        if 'TASC' in self.binary_instance.binary_params:
+            epoch = 'TASC'
+        else:
+            epoch = 'T0'
+        d_delay_d_epoch = self.binary_instance.d_binarydelay_d_par(epoch)
+        return -d_delay_d_epoch.to(u.Unit('')).value * \
+            (1.0 - d_acc_delay_d_toa)
+
     def print_par(self,):
         result = "BINARY {0}\n".format(self.binary_model_name)
         for p in self.params:
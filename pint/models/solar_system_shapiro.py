@@ -7,6 +7,7 @@ import astropy.constants as const
 from astropy import log
 from . import parameter as p
 from .timing_model import DelayComponent
+from ..utils import column_value
 from .. import Tsun, Tmercury, Tvenus, Tearth, Tmars, \
         Tjupiter, Tsaturn, Turanus, Tneptune
 
@@ -18,6 +19,8 @@ class SolarSystemShapiro(DelayComponent):
         self.add_param(p.boolParameter(name="PLANET_SHAPIRO",
              value=False, description="Include planetary Shapiro delays (Y/N)"))
         self.delay_funcs_component += [self.solar_system_shapiro_delay,]
+        self.register_value_func(self.solar_system_shapiro_delay,
+                                 self.solar_system_shapiro_delay_value)
 
     def setup(self):
         super(SolarSystemShapiro, self).setup()
@@ -45,15 +48,22 @@ class SolarSystemShapiro(DelayComponent):
           psr_dir : unit vector in direction of pulsar
           T_obj : mass of object in seconds (GM/c^3)
         """
-        # TODO: numpy.sum currently loses units in some cases...
-        r = (numpy.sqrt(numpy.sum(obj_pos**2, axis=1))) * obj_pos.unit
+        return SolarSystemShapiro.ss_obj_shapiro_delay_value(
+            column_value(obj_pos, u.km), numpy.asarray(psr_dir), T_obj)
+
+    @staticmethod
+    def ss_obj_shapiro_delay_value(obj_pos, psr_dir, T_obj):
+        """Shapiro delay in seconds for a solar system object, with obj_pos
+        a plain array in km.  See ss_obj_shapiro_delay.
+        """
+        r = numpy.sqrt(numpy.sum(obj_pos**2, axis=1))
         rcostheta = numpy.sum(obj_pos*psr_dir, axis=1)
         # This formula copied from tempo2 code.  The sign of the
         # cos(theta) term has been changed since we are using the
         # opposite convention for object position vector (from
         # observatory to object in this code).
         # Tempo2 uses the postion vector sign differently between the sun and planets
-        return -2.0 * T_obj * numpy.log((r-rcostheta)/const.au).value
+        return -2.0 * T_obj * numpy.log((r-rcostheta)/const.au.to(u.km).value)
 
     def solar_system_shapiro_delay(self, toas, acc_delay=None):
         """
@@ -68,7 +78,13 @@ class SolarSystemShapiro(DelayComponent):
         If planets are to be included, TOAs.compute_posvels() must
         have been called with the planets=True argument.
         """
-        # Start out with 0 delay with units of seconds
+        return self.solar_system_shapiro_delay_value(toas) * u.second
+
+    def solar_system_shapiro_delay_value(self, toas, acc_delay=None):
+        """Solar system Shapiro delay in seconds, as a plain array.
+
+        The unitless version of solar_system_shapiro_delay.
+        """
         delay = numpy.zeros(len(toas))
         for ii, key in enumerate(toas.groups.keys):
             grp = toas.groups[ii]
@@ -77,11 +93,14 @@ class SolarSystemShapiro(DelayComponent):
             if key['obs'].lower() == 'barycenter':
                 log.info("Skipping Shapiro delay for Barycentric TOAs")
                 continue
-            psr_dir = self.ssb_to_psb_xyz_ICRS(epoch=grp['tdbld'].astype(numpy.float64))
-            delay[loind:hiind] += self.ss_obj_shapiro_delay(grp['obs_sun_pos'],
-                                    psr_dir, self._ss_mass_sec['sun'])
+            psr_dir = numpy.asarray(self.ssb_to_psb_xyz_ICRS(
+                epoch=grp['tdbld'].astype(numpy.float64)))
+            delay[loind:hiind] += self.ss_obj_shapiro_delay_value(
+                column_value(grp['obs_sun_pos'], u.km), psr_dir,
+                self._ss_mass_sec['sun'])
             if self.PLANET_SHAPIRO.value:
                 for pl in ('jupiter', 'saturn', 'venus', 'uranus'):
-                    delay[loind:hiind] += self.ss_obj_shapiro_delay(grp['obs_'+pl+'_pos'],
-                                                   psr_dir, self._ss_mass_sec[pl])
-        return delay * u.second
+                    delay[loind:hiind] += self.ss_obj_shapiro_delay_value(
+                        column_value(grp['obs_'+pl+'_pos'], u.km), psr_dir,
+                        self._ss_mass_sec[pl])
+        return delay
@@ -37,6 +37,8 @@ class Spindown(PhaseComponent):
                        time_scale='tdb'))
 
         self.phase_funcs_component += [self.spindown_phase,]
+        self.register_value_func(self.spindown_phase,
+                                 self.spindown_phase_value)
         self.category = 'spindown'
         self.phase_derivs_wrt_delay += [self.d_spindown_phase_d_delay,]
 
@@ -102,6 +104,29 @@ class Spindown(PhaseComponent):
         dt_pepoch = (time_to_longdouble(self.PEPOCH.value) - self.TZRMJDld) * u.day
         return dt_tzrmjd, dt_pepoch
 
+    def get_dt_value(self, toas, delay):
+        """Return the time from the phase 0 epoch and from PEPOCH to the
+        phase 0 epoch, in seconds, as get_dt() but with plain arrays.
+
+        delay is a plain array in seconds.
+        """
+        if self.TZRMJD.value is None:
+            self.TZRMJD.value = toas['tdb'][0] - delay[0] * u.second
+        if not hasattr(self, "TZRMJDld"):
+            self.TZRMJDld = time_to_longdouble(self.TZRMJD.value)
+        dt_tzrmjd = (numpy.asarray(toas['tdbld']) - self.TZRMJDld) * \
+            SECS_PER_DAY - delay
+        dt_pepoch = (time_to_longdouble(self.PEPOCH.value) - self.TZRMJDld) * \
+            SECS_PER_DAY
+        return dt_tzrmjd, dt_pepoch
+
+    def spindown_phase_value(self, toas, delay):
+        """Spindown phase in cycles, as a plain longdouble array.
+
+        The unitless version of spindown_phase, delay is in seconds.
+        """
+        return self.sweep_phase(self.sweep_inputs(toas, delay), {})
+
     def spindown_phase(self, toas, delay):
         """Spindown phase function.
 
@@ -121,6 +146,20 @@ class Spindown(PhaseComponent):
             phs_pepoch = taylor_horner(-dt_pepoch.to(u.second), fterms)
             return (phs_tzrmjd - phs_pepoch).to(u.cycle)
 
+    def sweep_params(self):
+        return ["F%d" % ii for ii in range(self.num_spin_terms)]
+
+    def sweep_inputs(self, toas, delay):
+        dt_tzrmjd, dt_pepoch = self.get_dt_value(toas, delay)
+        return dt_tzrmjd - dt_pepoch, -dt_pepoch
+
+    def sweep_phase(self, inputs, values):
+        """Spindown phase for a PhaseSweep, see spindown_phase."""
+        dt, dt0 = inputs
+        fterms = [0.0] + [self.sweep_value(values, ft) for ft in
+                          self.sweep_params()]
+        return taylor_horner(dt, fterms) - taylor_horner(dt0, fterms)
+
     def print_par(self,):
         result = ''
         f_terms = ["F%d" % ii for ii in
@@ -3,6 +3,8 @@ from __future__ import absolute_import, print_function, division
 import numpy as np
 import functools
 import collections
+import contextlib
+import inspect
 from astropy import log
 import re
 from pint import utils as ut
@@ -121,6 +123,8 @@ class PSR_BINARY(object):
         self.binary_delay_funcs = []
         self.d_binarydelay_d_par_funcs = []
         self.orbits_cls = OrbitPB(self, ['PB', 'PBDOT', 'XPBDOT', 'T0'])
+        # Results of the methods, while in cached_intermediates()
+        self._memo = None
 
     @property
     def t(self):
@@ -254,10 +258,81 @@ class PSR_BINARY(object):
         result = self.d_binarydelay_d_par_funcs[0](par)
         if len(self.d_binarydelay_d_par_funcs) > 1:
             for df in self.d_binarydelay_d_par_funcs[1:]:
-                result += df(par)
+                result = result + df(par)
 
         return result
 
+    def d_binarydelay_d_params(self, params):
+        """Get the binary delay derivatives respect to several parameters.
+
+        The intermediate quantities (E, nu, omega...) and their partial
+        derivatives are computed once and shared by all the parameters, see
+        cached_intermediates().
+        Parameter
+        ---------
+        params : list of str
+            Parameter names.
+        Return
+        ----------
+        A dict of the derivatives, indexed by parameter name.
+        """
+        with self.cached_intermediates():
+            return dict((par, self.d_binarydelay_d_par(par))
+                        for par in params)
+
+    # Methods that change the model, or that only wrap the cached ones.
+    _uncached_methods = ['update_input', 'set_param_values',
+                         'add_binary_params', 'add_inter_vars',
+                         'search_alias', 'get_tt0', 'binary_delay',
+                         'd_binarydelay_d_par', 'd_binarydelay_d_params',
+                         'cached_intermediates']
+
+    @contextlib.contextmanager
+    def cached_intermediates(self):
+        """Compute each intermediate quantity only once in this context.
+
+        Within the context the methods of the model (the intermediate
+        variables, their d_*_d_* derivatives and prtl_der) remember their
+        results for each set of arguments, so that the derivatives of the
+        delay with respect to several parameters do not recompute the
+        shared quantities.  The TOAs and the parameters must not be changed
+        within the context.
+        """
+        if self._memo is not None:
+            yield
+            return
+        self._memo = {}
+        cached = []
+        try:
+            for name, attr in inspect.getmembers(type(self)):
+                if name.startswith('_') or name in self._uncached_methods or \
+                   not inspect.isroutine(attr):
+                    continue
+                self.__dict__[name] = self._cached_method(name,
+                                                          getattr(self, name))
+                cached.append(name)
+            yield
+        finally:
+            for name in cached:
+                del self.__dict__[name]
+            self._memo = None
+
+    def _cached_method(self, name, method):
+        memo = self._memo
+        @functools.wraps(method)
+        def cached_method(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            try:
+                result = memo[key]
+            except KeyError:
+                result = memo[key] = method(*args, **kwargs)
+            except TypeError:
+                # Unhashable arguments, e.g. arrays
+                return method(*args, **kwargs)
+            # Callers may modify the results in place
+            return result.copy() if hasattr(result, 'copy') else result
+        return cached_method
+
     def prtl_der(self,y,x):
         """Find the partial derivatives in binary model
            pdy/pdx
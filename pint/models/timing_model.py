@@ -2,14 +2,17 @@
 # Defines the basic timing model interface classes
 from __future__ import absolute_import, print_function, division
 import functools
+import hashlib
+from collections import OrderedDict
 from .parameter import Parameter, strParameter
-from ..phase import Phase
+from ..phase import Phase, PhaseAccumulator
+from ..woodbury import WoodburyCovariance
 from astropy import log
-import astropy.time as time
 import numpy as np
 import pint.utils as utils
 import astropy.units as u
 from astropy.table import Table
+import scipy.sparse as sps
 import copy
 import abc
 import six
@@ -24,6 +27,9 @@ ignore_params = ['START', 'FINISH', 'SOLARN0', 'EPHEM', 'CLK', 'UNITS',
                  'NITS', 'IBOOT','BINARY']
 ignore_prefix = ['DMXF1_','DMXF2_','DMXEP_'] # DMXEP_ for now.
 
+# Number of TOA tables whose component delays are kept by TimingModel.delay
+DELAY_CACHE_SIZE = 4
+
 
 class TimingModel(object):
     """
@@ -88,6 +94,8 @@ class TimingModel(object):
         self.name = name
         self.component_types = []
         self.top_level_params = []
+        self.use_delay_cache = True
+        self._delay_cache = OrderedDict()
         self.add_param_from_top(strParameter(name="PSR",
             description="Source name",
             aliases=["PSRJ", "PSRB"]), '')
@@ -287,6 +295,7 @@ class TimingModel(object):
                 self.component_types.append(types)
         for ct in comp_types.keys():
             setattr(self, ct+'_list', comp_types[ct])
+        self.clear_delay_cache()
 
     def add_component(self, component, order=None, force=False):
         """
@@ -460,8 +469,23 @@ class TimingModel(object):
 
         Return the total delay which will be subtracted from the given
         TOA to get time of emission at the pulsar.
+
+        Note
+        ----
+        When .use_delay_cache is True, the delay of each component is kept
+        and reused as long as the TOAs and the parameters of that component
+        and of all the components before it are unchanged.
+        """
+        return self._delay_value(toas, cutoff_component, include_last) * \
+            u.second
+
+    def _delay_value(self, toas, cutoff_component='', include_last=True):
+        """Total delay for the TOAs, as a plain array in seconds.
+
+        This is the internal version of delay(); the components' unitless
+        delay functions are used where available.
         """
-        delay = np.zeros(len(toas)) * u.second
+        delay = np.zeros(len(toas))
         if cutoff_component == '':
             idx = len(self.DelayComponent_list)
         else:
@@ -473,19 +497,78 @@ class TimingModel(object):
             else:
                 raise KeyError("No delay component named '%s'." % cutoff_component)
 
-        for df in self.delay_funcs[0:idx]:
-            delay += df(toas, delay)
+        cache = self._get_delay_cache(toas)
+        chain_key = None
+        for cp in self.DelayComponent_list[0:idx]:
+            name = cp.__class__.__name__
+            if cache is not None:
+                # A component delay depends on its own parameters and on the
+                # delay accumulated before it, so the key includes the keys
+                # of all the previous components.
+                chain_key = (chain_key, name, cp.param_versions())
+                if name in cache and cache[name][0] == chain_key:
+                    delay += cache[name][1]
+                    continue
+            cp_delay = np.zeros(len(toas))
+            for df in cp.delay_funcs_component:
+                cp_delay += cp.call_value_func(df, toas, delay + cp_delay,
+                                               u.second)
+            if cache is not None:
+                cache[name] = (chain_key, cp_delay)
+            delay += cp_delay
         return delay
 
+    def clear_delay_cache(self):
+        """Discard all the component delays kept by TimingModel.delay."""
+        self._delay_cache = OrderedDict()
+
+    def _get_delay_cache(self, toas):
+        """Return the component delay cache for a TOA table.
+
+        The TOA table is identified by its version (see
+        TOAs.table_changed), its length and a hash of all its columns
+        except the Time object ones, so TOAs modified in place (flags,
+        positions, times) get a fresh cache.  None is returned if caching
+        is disabled.
+        """
+        if not getattr(self, 'use_delay_cache', False):
+            return None
+        try:
+            cols = [toas[c] for c in toas.colnames]
+            version = toas.meta.get('version')
+        except AttributeError:
+            return None
+        h = hashlib.sha1()
+        for name, c in zip(toas.colnames, cols):
+            data = np.asarray(c)
+            if data.dtype.kind == 'O':
+                continue
+            h.update(name.encode())
+            h.update(np.ascontiguousarray(data).tobytes())
+        key = (version, len(toas), h.hexdigest())
+        caches = getattr(self, '_delay_cache', None)
+        if caches is None:
+            caches = self._delay_cache = OrderedDict()
+        if key in caches:
+            cache = caches.pop(key)
+        else:
+            cache = {}
+            while len(caches) >= DELAY_CACHE_SIZE:
+                caches.popitem(last=False)
+        caches[key] = cache
+        return cache
+
     def phase(self, toas):
         """Return the model-predicted pulse phase for the given TOAs."""
         # First compute the delays to "pulsar time"
-        delay = self.delay(toas)
-        phase = Phase(np.zeros(len(toas)) , np.zeros(len(toas)))
-        # Then compute the relevant pulse phases
-        for pf in self.phase_funcs:
-            phase += Phase(pf(toas, delay))
-        return phase
+        delay = self._delay_value(toas)
+        # Then compute the relevant pulse phases, accumulating the integer
+        # and fractional parts in place
+        phase = PhaseAccumulator(len(toas))
+        for cp in self.PhaseComponent_list:
+            for pf in cp.phase_funcs_component:
+                phase.add(cp.call_value_func(pf, toas, delay, u.cycle))
+        return phase.phase()
 
     def covariance_matrix(self, toas):
         """This a function to get the TOA covariance matrix for noise models.
@@ -496,13 +579,32 @@ class TimingModel(object):
         result = np.zeros((ntoa, ntoa))
         # When there is no noise model.
         if len(self.covariance_matrix_funcs) == 0:
-            result += np.diag(toas['error'].quantity.value**2)
+            result += np.diag(toas['error'].quantity.to(u.s).value**2)
             return result
 
         for nf in self.covariance_matrix_funcs:
             result += nf(toas)
         return result
 
+    def woodbury_covariance(self, toas):
+        """Return the TOA covariance matrix as a WoodburyCovariance.
+
+        The covariance is built from the scaled TOA uncertainties and the
+        noise bases, without forming the ntoa x ntoa matrix.  None is
+        returned if a noise component has covariance terms that are not
+        given through scaled_sigma_funcs or basis_funcs.
+        """
+        if 'NoiseComponent' in self.component_types:
+            for nc in self.NoiseComponent_list:
+                if len(nc.covariance_matrix_funcs) != \
+                   len(nc.scaled_sigma_funcs) + len(nc.basis_funcs):
+                    return None
+        cov = WoodburyCovariance(self.scaled_sigma(toas).to(u.s).value**2)
+        for bf in self.basis_funcs:
+            U, phi = bf(toas)
+            cov.add_basis(U, phi)
+        return cov
+
     def scaled_sigma(self, toas):
         """This a function to get the scaled TOA uncertainties noise models.
            If there is no noise model component provided, a vector with
@@ -520,25 +622,41 @@ class TimingModel(object):
         return result
 
     def noise_model_designmatrix(self, toas):
-        result = []
-        if len(self.basis_funcs) == 0:
-            return None
+        basis = self.noise_model_basis(toas)
+        return None if basis is None else basis[0]
 
-        for nf in self.basis_funcs:
-            result.append(nf(toas)[0])
-        return np.hstack((r for r in result))
+    def noise_model_basis_weight(self, toas):
+        basis = self.noise_model_basis(toas)
+        return None if basis is None else basis[1]
 
+    def noise_model_basis(self, toas):
+        """Return the noise design matrix and basis weights in one pass.
 
-    def noise_model_basis_weight(self, toas):
-        result = []
+        The design matrix is a scipy.sparse CSR matrix if one of the noise
+        bases is sparse (e.g. the ECORR quantization matrix), and a dense
+        array otherwise.  None is returned without noise bases.
+        """
         if len(self.basis_funcs) == 0:
             return None
-
+        bases, weights = [], []
         for nf in self.basis_funcs:
-            result.append(nf(toas)[1])
-        return np.hstack((r for r in result))
+            U, phi = nf(toas)
+            bases.append(U)
+            weights.append(phi)
+        if any(sps.issparse(U) for U in bases):
+            Mn = sps.hstack(bases).tocsr()
+        else:
+            Mn = np.hstack(bases)
+        return Mn, np.hstack(weights)
 
+    def phase_sweep(self, toas, params):
+        """Return a PhaseSweep evaluating phases for values of params.
 
+        The delays are frozen for the TOAs, so params may only include
+        parameters of the phase components, e.g. spin frequencies, glitch
+        or jump parameters.
+        """
+        return PhaseSweep(self, toas, params)
 
     def get_barycentric_toas(self, toas, cutoff_component=''):
         """This is a convenient function for calculate the barycentric TOAs.
@@ -566,84 +684,132 @@ class TimingModel(object):
         """Return the derivative of phase wrt TOA
         Parameter
         ---------
-        toas : PINT TOAs class
+        toas : PINT TOAs class or TOA table
             The toas when the derivative of phase will be evaluated at.
         sample_step : float optional
-            Finite difference steps. If not specified, it will take 1/10 of the
-            spin period.
+            Not used, kept for compatibility with the former finite
+            difference calculation.
+
+        Note
+        ----
+        With the emission time t_e = toa - delay(toa), the chain rule gives
+        d_phase/d_toa = d_phase/d_t_e * (1 - d_delay/d_toa), see
+        d_phase_d_tpulsar() and d_delay_d_toa().
         """
-        copy_toas = copy.deepcopy(toas)
-        if sample_step is None:
-            pulse_period = 1.0 / (self.F0.quantity)
-            sample_step = pulse_period * 1000
-        sample_dt = [-sample_step, 2 * sample_step]
-
-        sample_phase = []
-        for dt in sample_dt:
-            dt_array = ([dt.value] * copy_toas.ntoas*dt._unit)
-            deltaT = time.TimeDelta(dt_array)
-            copy_toas.adjust_TOAs(deltaT)
-            phase = self.phase(copy_toas.table)
-            sample_phase.append(phase)
-        #Use finite difference method.
-        # phase'(t) = (phase(t+h)-phase(t-h))/2+ 1/6*F2*h^2 + ..
-        # The error should be near 1/6*F2*h^2
-        dp = (sample_phase[1] - sample_phase[0])
-        d_phase_d_toa = dp.int / (2*sample_step) + dp.frac / (2*sample_step)
-        del copy_toas
-        with u.set_enabled_equivalencies(dimensionless_cycles):
-            return d_phase_d_toa.to(u.Hz)
+        table = getattr(toas, 'table', toas)
+        d_delay = self.d_delay_d_toa(table)
+        return self.d_phase_d_tpulsar(table) * (1.0 - d_delay)
 
     def d_phase_d_tpulsar(self, toas):
         """Return the derivative of phase wrt time at the pulsar.
 
-        NOT implemented yet.
+        This is minus the sum of the phase derivatives wrt delay
+        (d_phase_d_delay_funcs), in Hz.
         """
-        pass
+        delay = self.delay(toas)
+        dpdd = np.longdouble(np.zeros(len(toas))) * u.cycle/u.second
+        for dpddf in self.d_phase_d_delay_funcs:
+            dpdd += dpddf(toas, delay)
+        with u.set_enabled_equivalencies(dimensionless_cycles):
+            return (-dpdd).to(u.Hz)
+
+    def d_delay_d_toa(self, toas):
+        """Return the derivative of the total delay wrt the TOA.
+
+        The components' d_delay_d_toa() are summed, each being given the
+        delay accumulated before it and its derivative.  Returns a plain
+        (dimensionless) array.
+        """
+        d_delay = np.zeros(len(toas))
+        for cp in self.DelayComponent_list:
+            acc_delay = self.delay(toas, cp.__class__.__name__, False)
+            d_delay += cp.d_delay_d_toa(toas, acc_delay, d_delay.copy())
+        return d_delay
 
     def d_phase_d_param(self, toas, delay, param):
         """ Return the derivative of phase with respect to the parameter.
         """
+        return self.d_phase_d_params(toas, delay, [param,])[param]
+
+    def d_phase_d_params(self, toas, delay, params):
+        """Return the derivatives of phase with respect to several parameters.
+
+        The phase components compute the derivatives of all their
+        parameters in one call (see PhaseComponent.d_phase_d_params).  For
+        the parameters entering through the delay the chain rule is used,
+        with d_phase_d_delay computed once for all of them.
+
+        Returns a dict of derivatives indexed by parameter name.  The
+        derivatives are float64 arrays: they only enter the (float64) design
+        matrix, so they do not need the extended precision of the phase.
+        """
         # TODO need to do correct chain rule stuff wrt delay derivs, etc
         # Is it safe to assume that any param affecting delay only affects
         # phase indirectly (and vice-versa)??
-        par = getattr(self, param)
-        result = np.longdouble(np.zeros(len(toas))) * u.cycle/par.units
-        param_phase_derivs = []
         phase_derivs = self.phase_deriv_funcs
-        delay_derivs = self.delay_deriv_funcs
-        if param in list(phase_derivs.keys()):
-            for df in phase_derivs[param]:
-                result += df(toas, param, delay).to(result.unit,
-                            equivalencies=u.dimensionless_angles())
-        else:
+        phase_params = [p for p in params if p in phase_derivs]
+        delay_params = [p for p in params if p not in phase_derivs]
+        result = {}
+        for param in phase_params:
+            par = getattr(self, param)
+            result[param] = np.zeros(len(toas)) * u.cycle/par.units
+        for cp in self.PhaseComponent_list:
+            cp_params = [p for p in phase_params if p in cp.deriv_funcs]
+            if not cp_params:
+                continue
+            for param, d in cp.d_phase_d_params(toas, cp_params, delay).items():
+                result[param] += d.to(result[param].unit,
+                                      equivalencies=u.dimensionless_angles())
+        if delay_params:
             # Apply chain rule for the parameters in the delay.
             # total_phase = Phase1(delay(param)) + Phase2(delay(param))
             # d_total_phase_d_param = d_Phase1/d_delay*d_delay/d_param +
             #                         d_Phase2/d_delay*d_delay/d_param
             #                       = (d_Phase1/d_delay + d_Phase2/d_delay) *
             #                         d_delay_d_param
-
-            d_delay_d_p = self.d_delay_d_param(toas, param)
-            dpdd_result = np.longdouble(np.zeros(len(toas))) * u.cycle/u.second
+            d_delay_d_p = self.d_delay_d_params(toas, delay_params)
+            dpdd_result = np.zeros(len(toas)) * u.cycle/u.second
             for dpddf in self.d_phase_d_delay_funcs:
                 dpdd_result += dpddf(toas, delay)
-            result = dpdd_result * d_delay_d_p
-        return result.to(result.unit, equivalencies=u.dimensionless_angles())
+            for param in delay_params:
+                result[param] = dpdd_result * \
+                    d_delay_d_p[param].astype(np.float64, copy=False)
+        for param in params:
+            result[param] = result[param].to(result[param].unit,
+                equivalencies=u.dimensionless_angles())
+        return result
 
     def d_delay_d_param(self, toas, param, acc_delay=None):
         """
         Return the derivative of delay with respect to the parameter.
         """
-        par = getattr(self, param)
-        result = np.longdouble(np.zeros(len(toas)) * u.s/par.units)
+        return self.d_delay_d_params(toas, [param,], acc_delay)[param]
+
+    def d_delay_d_params(self, toas, params, acc_delay=None):
+        """Return the derivatives of delay with respect to several parameters.
+
+        Each delay component computes the derivatives of all its
+        parameters in one call (see DelayComponent.d_delay_d_params), so
+        the intermediate results are shared between parameters.
+
+        Returns a dict of derivatives indexed by parameter name.
+        """
         delay_derivs = self.delay_deriv_funcs
-        if param not in list(delay_derivs.keys()):
-            raise AttributeError("Derivative function for '%s' is not provided"
-                                 " or not registered. "%param)
-        for df in delay_derivs[param]:
-            result += df(toas, param, acc_delay).to(result.unit, \
-                        equivalencies=u.dimensionless_angles())
+        result = {}
+        for param in params:
+            if param not in delay_derivs:
+                raise AttributeError("Derivative function for '%s' is not provided"
+                                     " or not registered. "%param)
+            par = getattr(self, param)
+            result[param] = np.longdouble(np.zeros(len(toas)) * u.s/par.units)
+        for cp in self.DelayComponent_list:
+            cp_params = [p for p in params if p in cp.deriv_funcs]
+            if not cp_params:
+                continue
+            for param, d in cp.d_delay_d_params(toas, cp_params,
+                                                acc_delay).items():
+                result[param] += d.to(result[param].unit, \
+                            equivalencies=u.dimensionless_angles())
         return result
 
     def d_phase_d_param_num(self, toas, param, step=1e-2):
@@ -723,6 +889,9 @@ class TimingModel(object):
         #    tt -= df(toas)
 
         M = np.zeros((ntoas, nparams))
+        # All the derivatives are computed in one pass over the components
+        derivs = self.d_phase_d_params(toas, delay,
+                                       [p for p in params if p != 'Offset'])
         for ii, param in enumerate(params):
             if param == 'Offset':
                 M[:,ii] = 1.0
@@ -733,7 +902,7 @@ class TimingModel(object):
                 # from the conventional definition of least square definition (Data - model)
                 # We decide to add minus sign here in the design matrix, so the fitter
                 # keeps the conventional way.
-                q = - self.d_phase_d_param(toas, delay,param)
+                q = - derivs[param]
                 M[:,ii] = q
                 units.append(u.Unit("")/ getattr(self, param).units)
 
@@ -859,6 +1028,7 @@ class Component(object):
         self._parent = None
         self.category = ''
         self.deriv_funcs = {}
+        self.value_funcs = {}
         self.component_special_params = []
         
     def setup(self,):
@@ -879,6 +1049,46 @@ class Component(object):
                 raise AttributeError("'%s' object has no attribute '%s'." %
                                     (self.__class__.__name__, name))
 
+    def register_value_func(self, func, value_func):
+        """Register a unitless version of a delay or phase function.
+
+        value_func takes the same arguments as func, with the delay as a
+        plain array in seconds, and returns the delay in seconds or the
+        phase in cycles as a plain array.  The TimingModel calls it instead
+        of func, so no Quantity is built inside the model evaluation.
+        Subclasses overriding func need to override value_func too.
+        """
+        self.value_funcs[func.__name__] = value_func
+
+    def call_value_func(self, func, toas, delay, unit):
+        """Call a delay or phase function with and returning plain arrays.
+
+        The unitless version of func is used if one is registered,
+        otherwise delay is given to func in seconds and the result is
+        converted to unit.
+        """
+        value_func = self.value_funcs.get(func.__name__)
+        if value_func is not None:
+            return value_func(toas, delay)
+        with u.set_enabled_equivalencies(dimensionless_cycles):
+            return func(toas, delay * u.second).to(unit).value
+
+    def param_versions(self):
+        """Return a tuple identifying the current values of the parameters.
+
+        The tuple changes whenever one of the component's parameters is
+        set (see Parameter.version), or a mask parameter selects other TOAs.
+        """
+        versions = []
+        for p in self.params:
+            par = getattr(self, p)
+            key_value = getattr(par, 'key_value', None)
+            if key_value is not None:
+                versions.append((par.version, par.key, tuple(key_value)))
+            else:
+                versions.append(par.version)
+        return tuple(versions)
+
     def add_param(self, param):
         """
         Add a parameter into the Component
@@ -992,6 +1202,19 @@ class Component(object):
         else:
             self.deriv_funcs[pn] += [func,]
 
+    def _call_deriv_funcs(self, toas, params, arg):
+        """Call the registered derivative functions for each parameter.
+
+        The results of several functions for the same parameter are summed.
+        Returns a dict indexed by parameter name.
+        """
+        result = {}
+        for param in params:
+            for df in self.deriv_funcs[param]:
+                d = df(toas, param, arg)
+                result[param] = d if param not in result else result[param] + d
+        return result
+
     def is_in_parfile(self,para_dict):
         """ Check if this subclass included in parfile.
             Parameters
@@ -1056,6 +1279,26 @@ class DelayComponent(Component):
         super(DelayComponent, self).__init__()
         self.delay_funcs_component = []
 
+    def d_delay_d_params(self, toas, params, acc_delay=None):
+        """Derivatives of this component's delay wrt several parameters.
+
+        By default the registered derivative functions are called for each
+        parameter.  Components override this to compute the derivatives of
+        all their parameters at once, sharing intermediate results.
+        Returns a dict indexed by parameter name.
+        """
+        return self._call_deriv_funcs(toas, params, acc_delay)
+
+    def d_delay_d_toa(self, toas, acc_delay=None, d_acc_delay_d_toa=0.0):
+        """Derivative of this component's delay wrt the TOA, at fixed
+        parameters, as a plain (dimensionless) array.
+
+        d_acc_delay_d_toa is the derivative of acc_delay.  The default is
+        zero, which suits delays changing slowly compared to the
+        astrometric and binary ones.
+        """
+        return np.zeros(len(toas))
+
 
 class PhaseComponent(Component):
     def __init__(self,):
@@ -1063,6 +1306,123 @@ class PhaseComponent(Component):
         self.phase_funcs_component = []
         self.phase_derivs_wrt_delay = []
 
+    def d_phase_d_params(self, toas, params, delay):
+        """Derivatives of this component's phase wrt several parameters.
+
+        See DelayComponent.d_delay_d_params.
+        """
+        return self._call_deriv_funcs(toas, params, delay)
+
+    def sweep_params(self):
+        """Names of the parameters PhaseSweep can vary for this component.
+
+        Components supporting PhaseSweep override this, sweep_inputs() and
+        sweep_phase().
+        """
+        return []
+
+    def sweep_inputs(self, toas, delay):
+        """Precompute the quantities sweep_phase() needs for a set of TOAs.
+
+        delay is a plain array in seconds.  The inputs may only depend on
+        the TOAs, the delay and parameters that are not in sweep_params().
+        None means sweeps are not supported.
+        """
+        return None
+
+    def sweep_phase(self, inputs, values):
+        """Phase, in cycles, for the parameter values of a PhaseSweep.
+
+        values is a dict of (nbatch, 1) longdouble arrays, in the units of
+        the parameters; missing parameters take their current value (see
+        sweep_value()).  The result broadcasts to (nbatch, ntoas).
+        """
+        raise NotImplementedError
+
+    def sweep_value(self, values, param):
+        """Value of param in values, or its current value in the model."""
+        if param in values:
+            return values[param]
+        return np.longdouble(getattr(self, param).value)
+
+
+class PhaseSweep(object):
+    """Evaluate model phases for many values of phase-only parameters.
+
+    The delays, and the inputs of the phase components supporting sweeps
+    (see PhaseComponent.sweep_params), are computed once for the TOAs.
+    Phases for new values of the swept parameters then cost a few
+    polynomial evaluations.  This is meant for grid searches and samplers
+    that only vary spin, glitch or jump parameters.
+
+    Parameters
+    ----------
+    model : TimingModel
+        The timing model; its current values are used for all the
+        parameters that are not swept.
+    toas : TOA table
+        The TOAs the phases are computed for.
+    params : list of str
+        The swept parameters.  ValueError is raised if one of them can not
+        be varied without recomputing the delays or the sweep inputs.
+    """
+    def __init__(self, model, toas, params):
+        self.params = list(params)
+        self.ntoas = len(toas)
+        delay = model._delay_value(toas)
+        remaining = set(self.params)
+        self.components = []
+        self.fixed_phase = np.zeros(self.ntoas, dtype=np.longdouble)
+        for cp in model.PhaseComponent_list:
+            inputs = cp.sweep_inputs(toas, delay)
+            if inputs is None:
+                cp_params = remaining & set(cp.params)
+                if cp_params:
+                    raise ValueError("Component '%s' does not support phase "
+                                     "sweeps of %s." % (cp.__class__.__name__,
+                                     ', '.join(sorted(cp_params))))
+                for pf in cp.phase_funcs_component:
+                    self.fixed_phase += cp.call_value_func(pf, toas, delay,
+                                                           u.cycle)
+            else:
+                self.components.append((cp, inputs))
+                remaining -= set(cp.sweep_params())
+        if remaining:
+            raise ValueError("Parameters %s can not be varied in a phase "
+                             "sweep." % ', '.join(sorted(remaining)))
+
+    def phase(self, values):
+        """Return the model phases for the given parameter values.
+
+        Parameters
+        ----------
+        values : array_like
+            Values of the swept parameters, in the order of .params and in
+            the units of the parameters.  A 2-d array of shape (nbatch,
+            nparams) evaluates a whole batch of parameter vectors.
+
+        Return
+        ------
+        Phase object with arrays of shape (ntoas,), or (nbatch, ntoas) for
+        a batch of parameter vectors.
+        """
+        values = np.asarray(values, dtype=np.longdouble)
+        single = values.ndim == 1
+        values = np.atleast_2d(values)
+        if values.shape[1] != len(self.params):
+            raise ValueError("Expected %d parameter values, got %d."
+                             % (len(self.params), values.shape[1]))
+        vdict = dict((p, values[:, ii, np.newaxis])
+                     for ii, p in enumerate(self.params))
+        phase = PhaseAccumulator((len(values), self.ntoas))
+        phase.add(self.fixed_phase)
+        for cp, inputs in self.components:
+            phase.add(cp.sweep_phase(inputs, vdict))
+        phase = phase.phase()
+        if single:
+            phase = Phase.from_parts(phase.int[0].value, phase.frac[0].value)
+        return phase
+
 
 class TimingModelError(Exception):
     """Generic base class for timing model errors."""
@@ -2,6 +2,8 @@
 # Base class for PINT observatories
 from __future__ import absolute_import, print_function, division
 import six
+from astropy.time import Time
+from ..erfautils import fast_tdb
 
 
 class Observatory(object):
@@ -142,7 +144,7 @@ class Observatory(object):
     def get_TDBs(self, t,  method='astropy', ephem=None, options=None):
         """This is a high level function for converting TOAs to TDB time scale.
             Different method can be applied to obtain the result. Current supported
-            methods are ['astropy', 'ephemeris']
+            methods are ['astropy', 'ephemeris', 'fast']
             Parameters
             ----------
             t: astropy.time.Time object
@@ -152,6 +154,10 @@ class Observatory(object):
 
                 - 'astropy': Astropy time.Time object built-in converter, use FB90.
                 - 'ephemeris': JPL ephemeris included TDB-TT correction.
+                - 'fast': same as 'astropy' for whole arrays at once, with the
+                  geocentric TDB-TT from the ephemeris TDB-TT series if ephem
+                  is given, or from a cached interpolation of FB90.  See
+                  pint.erfautils.fast_tdb.
             ephme: str, optional
                 The ephemeris to get he TDB-TT correction. Required for the
                 'ephemeris' method.
@@ -174,12 +180,17 @@ class Observatory(object):
                 raise ValueError("A ephemeris file should be provided to get"
                                      " the TDB-TT corrections.")
             return self._get_TDB_ephem(t, ephem)
+        elif meth == "fast":
+            return self._get_TDB_fast(t, ephem)
         else:
             raise ValueError("Unknown method '%s'." % method)
 
     def _get_TDB_astropy(self, t):
         return t.tdb
 
+    def _get_TDB_fast(self, t, ephem=None):
+        return fast_tdb(t, ephem=ephem)
+
     def _get_TDB_ephem(self, t, ephem):
         """This is a function that reads the ephem TDB-TT column. This column is
             provided by DE4XXt version of ephemeris.
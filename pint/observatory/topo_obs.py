@@ -160,29 +160,33 @@ class TopoObs(Observatory):
     def earth_location_itrf(self, time=None):
         return self._loc_itrf
 
-    def clock_corrections(self, t):
-        # Read clock file if necessary
+    def load_clock_files(self):
+        """Read the clock files used by clock_corrections, if necessary."""
         # TODO provide some method for re-reading the clock file?
         if self._clock is None:
             log.info('Observatory {0}, loading clock file {1}'.format(self.name, self.clock_fullpath))
             self._clock = ClockFile.read(self.clock_fullpath,
                     format=self.clock_fmt, obscode=self.tempo_code)
+        if self.include_gps and self._gps_clock is None:
+            log.info('Observatory {0}, loading GPS clock file {1}'.format(self.name, self.gps_fullpath))
+            self._gps_clock = ClockFile.read(self.gps_fullpath,
+                    format='tempo2')
+        if self.include_bipm and self._bipm_clock is None:
+            try:
+                log.info('Observatory {0}, loading BIPM clock file {1}'.format(self.name, self.bipm_fullpath))
+                self._bipm_clock = ClockFile.read(self.bipm_fullpath,
+                                                  format='tempo2')
+            except:
+                raise ValueError("Can not find TT BIPM file '%s'. " % self.bipm_version)
+
+    def clock_corrections(self, t):
+        # Read clock file if necessary
+        self.load_clock_files()
         corr = self._clock.evaluate(t)
         if self.include_gps:
-            if self._gps_clock is None:
-                log.info('Observatory {0}, loading GPS clock file {1}'.format(self.name, self.gps_fullpath))
-                self._gps_clock = ClockFile.read(self.gps_fullpath,
-                        format='tempo2')
             corr += self._gps_clock.evaluate(t)
         if self.include_bipm:
             tt2tai = 32.184 * 1e6 * u.us
-            if self._bipm_clock is None:
-                try:
-                    log.info('Observatory {0}, loading BIPM clock file {1}'.format(self.name, self.bipm_fullpath))
-                    self._bipm_clock = ClockFile.read(self.bipm_fullpath,
-                                                      format='tempo2')
-                except:
-                    raise ValueError("Can not find TT BIPM file '%s'. " % self.bipm_version)
             corr += self._bipm_clock.evaluate(t) - tt2tai
         return corr
 
@@ -12,6 +12,41 @@ import numpy
 import astropy.units as u
 from pint import dimensionless_cycles
 
+def phase_parts(arg1, arg2=None):
+    """Split a phase into integer and fractional parts.
+
+    arg1 and arg2 are plain arrays in cycles, as the arguments of Phase.
+    Returns the (int, frac) arrays, with frac reduced to [-0.5, 0.5].
+    """
+    arg1 = numpy.asarray(arg1)
+    if arg1.shape == ():
+        arg1 = arg1.reshape((1,))
+    if arg2 is None:
+        ff, ii = numpy.modf(arg1)
+    else:
+        arg2 = numpy.asarray(arg2)
+        if arg2.shape == ():
+            arg2 = arg2.reshape((1,))
+        arg1S = numpy.modf(arg1)
+        arg2S = numpy.modf(arg2)
+        ii = arg1S[1]+arg2S[1]
+        ff = arg2S[0]
+    index = numpy.where(ff < -0.5)
+    ff[index] += 1.0
+    ii[index] -= 1
+    index = numpy.where(ff > 0.5 )
+    ff[index] -= 1.0
+    ii[index] += 1
+    return ii, ff
+
+
+def add_phase_parts(int1, frac1, int2, frac2):
+    """Add two phases given as (int, frac) plain arrays, see Phase.__add__."""
+    ff = frac1 + frac2
+    ii = numpy.modf(ff)[1]
+    return phase_parts(int1 + int2 + ii, ff - ii)
+
+
 class Phase(namedtuple('Phase', 'int frac')):
     """
     Phase class array version
@@ -20,43 +55,73 @@ class Phase(namedtuple('Phase', 'int frac')):
     def __new__(cls, arg1, arg2=None):
         # Assume inputs are numerical, could add an extra
         # case to parse strings as input.
-        # if it is not a list, convert to a list
-        if not hasattr(arg1, 'unit'):
-            arg1 = arg1 * u.cycle
-        if arg1.shape == ():
-            arg1 = arg1.reshape((1,))
+        # Quantities are converted to plain values in cycles, the
+        # splitting is done by phase_parts.
         with u.set_enabled_equivalencies(dimensionless_cycles):
-            arg1 = arg1.to(u.Unit(""))
-            # Since modf does not like dimensioned quantity
-            if arg2 is None:
-                ff,ii = numpy.modf(arg1)
-            else:
-                if not hasattr(arg2, 'unit'):
-                    arg2 = arg2 * u.cycle
-                if arg2.shape == ():
-                    arg2 = arg2.reshape((1,))
-                arg2 = arg2.to(u.Unit(""))
-                arg1S = numpy.modf(arg1)
-                arg2S = numpy.modf(arg2)
-                ii = arg1S[1]+arg2S[1]
-                ff = arg2S[0]
-            index = numpy.where(ff < -0.5)
-            ff[index] += 1.0
-            ii[index] -= 1
-            index = numpy.where(ff > 0.5 )
-            ff[index] -= 1.0
-            ii[index] += 1
-            return super(Phase, cls).__new__(cls, ii.to(u.cycle), ff.to(u.cycle))
+            if hasattr(arg1, 'unit'):
+                arg1 = arg1.to(u.Unit("")).value
+            if hasattr(arg2, 'unit'):
+                arg2 = arg2.to(u.Unit("")).value
+        ii, ff = phase_parts(arg1, arg2)
+        return super(Phase, cls).__new__(cls, ii * u.cycle, ff * u.cycle)
+
+    @classmethod
+    def from_parts(cls, ii, ff):
+        """Make a Phase from plain int and frac arrays, in cycles, that are
+        already normalized (frac in [-0.5, 0.5])."""
+        return super(Phase, cls).__new__(cls, ii * u.cycle, ff * u.cycle)
 
     def __neg__(self):
         return Phase(-self.int, -self.frac)
 
     def __add__(self, other):
-        ff = self.frac + other.frac
-        with u.set_enabled_equivalencies(dimensionless_cycles):
-            ii = numpy.modf(ff.to(u.Unit("")))[1]
-            ii = ii.to(u.cycle)
-            return Phase(self.int + other.int + ii, ff - ii)
+        ii, ff = add_phase_parts(self.int.value, self.frac.value,
+                                 other.int.value, other.frac.value)
+        return Phase(ii, ff)
 
     def __sub__(self, other):
         return self.__add__(other.__neg__())
+
+
+class PhaseAccumulator(object):
+    """Sum of phases kept as plain integer and fractional arrays.
+
+    Phases are added in place, as plain arrays or scalars in cycles, and
+    the fractional part is only reduced to [-0.5, 0.5] once, when the
+    result is requested with phase().  This avoids building a Phase for
+    every term of a sum.
+
+    Parameters
+    ----------
+    shape : int or tuple
+        Shape of the phase arrays.
+    dtype : numpy dtype, optional
+        Type of the fractional part, longdouble by default.
+    """
+    def __init__(self, shape, dtype=numpy.longdouble):
+        self.int = numpy.zeros(shape, dtype=numpy.int64)
+        self.frac = numpy.zeros(shape, dtype=dtype)
+
+    def add(self, phase):
+        """Add a phase in cycles, given as a plain array or scalar."""
+        ff, ii = numpy.modf(phase)
+        self.int += numpy.asarray(ii).astype(numpy.int64)
+        self.frac += ff
+
+    def add_phase(self, phase):
+        """Add a Phase object."""
+        with u.set_enabled_equivalencies(dimensionless_cycles):
+            self.int += phase.int.to(u.Unit("")).value.astype(numpy.int64)
+            self.frac += phase.frac.to(u.Unit("")).value
+
+    def normalize(self):
+        """Move the whole cycles of the fractional part to the integer part."""
+        carry = numpy.rint(self.frac)
+        self.int += carry.astype(numpy.int64)
+        self.frac -= carry
+
+    def phase(self):
+        """Return the accumulated phase as a Phase object."""
+        self.normalize()
+        return Phase.from_parts(self.int.astype(self.frac.dtype),
+                                self.frac.copy())
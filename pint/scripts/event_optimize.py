@@ -215,12 +215,23 @@ class emcee_fitter(Fitter):
         self.fitkeys, self.fitvals, self.fiterrs = \
             get_fit_keyvals(self.model, phs, phserr)
         self.n_fit_params = len(self.fitvals)
+        # When only phase parameters (spin, glitch...) are fit, the delays
+        # do not change and the phases can be computed from a PhaseSweep.
+        try:
+            self.sweep = self.model.phase_sweep(self.toas.table,
+                                                self.fitkeys[:-1])
+        except ValueError:
+            self.sweep = None
 
     def get_event_phases(self):
         """
         Return pulse phases based on the current model
         """
-        phss = self.model.phase(self.toas.table)[1]
+        if self.sweep is not None:
+            phss = self.sweep.phase([getattr(self.model, key).value
+                                     for key in self.fitkeys[:-1]])[1]
+        else:
+            phss = self.model.phase(self.toas.table)[1]
         # ensure all postive
         return np.where(phss < 0.0*u.cycle, phss + 1.0*u.cycle, phss)
 
@@ -449,7 +460,7 @@ def main(argv=None):
 
     if weightcol is not None:
         if weightcol=='CALC':
-            weights = np.asarray([x['weight'] for x in ts.table['flags']])
+            weights = ts.get_flag_value('weight').filled(0.0)
             print("Original weights have min / max weights %.3f / %.3f" % \
                 (weights.min(), weights.max()))
             # Rescale the weights, if requested (by having wgtexp != 0.0)
@@ -458,9 +469,8 @@ def main(argv=None):
                 wmx, wmn = weights.max(), weights.min()
                 # make the highest weight = 1, but keep min weight the same
                 weights = wmn + ((weights - wmn) * (1.0 - wmn) / (wmx - wmn))
-            for ii, x in enumerate(ts.table['flags']):
-                x['weight'] = weights[ii]
-        weights = np.asarray([x['weight'] for x in ts.table['flags']])
+            ts.set_flag_value('weight', weights)
+        weights = ts.get_flag_value('weight').filled(0.0)
         print("There are %d events, with min / max weights %.3f / %.3f" % \
             (len(weights), weights.min(), weights.max()))
     else:
@@ -2,16 +2,15 @@
 from __future__ import absolute_import, print_function, division
 import os,sys
 import numpy as np
-import pint.toa as toa
 import pint.models
 import pint.residuals
 import astropy.units as u
-from pint.fermi_toas import load_Fermi_TOAs
+from pint.fermi_toas import iter_Fermi_TOAs
+from pint.event_toas import get_event_phases, DEFAULT_CHUNKSIZE
 from pint.plot_utils import phaseogram
 from pint.observatory.fermi_obs import FermiObs
 import argparse
 import astropy.io.fits as pyfits
-from astropy.time import Time
 from pint.eventstats import hmw, hm, h2sig
 from astropy.coordinates import SkyCoord
 
@@ -34,6 +33,8 @@ def main(argv=None):
     parser.add_argument("--outfile",help="Output figure file name (default is to overwrite input file)", default=None)
     parser.add_argument("--planets",help="Use planetary Shapiro delay in calculations (default=False)", default=False, action="store_true")
     parser.add_argument("--ephem",help="Planetary ephemeris to use (default=DE421)", default="DE421")
+    parser.add_argument("--chunksize",help="Number of events processed at once (default={0})".format(DEFAULT_CHUNKSIZE),
+                        type=int, default=DEFAULT_CHUNKSIZE)
     args = parser.parse_args(argv)
 
     # If outfile is specified, that implies addphase
@@ -52,43 +53,37 @@ def main(argv=None):
         # Instantiate FermiObs once so it gets added to the observatory registry
         FermiObs(name='Fermi',ft2name=args.ft2)
 
-    # Read event file and return list of TOA objects
-    tl  = load_Fermi_TOAs(args.eventfile, weightcolumn=args.weightcol,
-                          targetcoord=tc)
-
+    # Events are read, prepared and phased in blocks of args.chunksize, so
+    # only the output columns are kept for the whole file.
+    nevents = pyfits.getheader(args.eventfile,ext=1)['NAXIS2']
+    phases = np.zeros(nevents)
+    mjds = np.zeros(nevents)
+    weights = np.zeros(nevents)
+    used = np.zeros(nevents, dtype=bool)
     # Discard events outside of MJD range
-    if args.maxMJD is not None:
-        tlnew = []
-        print("pre len : ",len(tl))
-        maxT = Time(float(args.maxMJD),format='mjd')
-        print("maxT : ",maxT)
-        for tt in tl:
-            if tt.mjd < maxT:
-                tlnew.append(tt)
-        tl=tlnew
-        print("post len : ",len(tlnew))
-
-    # Now convert to TOAs object and compute TDBs and posvels
-    ts = toa.TOAs(toalist=tl)
-    ts.filename = args.eventfile
-    ts.compute_TDBs()
-    ts.compute_posvels(ephem=args.ephem,planets=args.planets)
+    maxmjd = np.inf if args.maxMJD is None else float(args.maxMJD)
+    chunks = iter_Fermi_TOAs(args.eventfile, weightcolumn=args.weightcol,
+                             targetcoord=tc, maxmjd=maxmjd,
+                             chunksize=args.chunksize)
+    for rows, ts, (iphss, phss) in get_event_phases(chunks, modelin,
+            ephem=args.ephem, planets=args.planets,
+            apply_clock_corrections=False):
+        # ensure all postive
+        phases[rows] = np.where(phss < 0.0 * u.cycle, phss.value + 1.0,
+                                phss.value)
+        mjds[rows] = ts.get_mjds().value
+        weights[rows] = ts.get_flag_value('weight').filled(0.0)
+        used[rows] = True
 
-    print(ts.get_summary())
-    mjds = ts.get_mjds()
-    print(mjds.min(),mjds.max())
+    print("Used {0} of {1} events".format(np.count_nonzero(used), nevents))
+    print(mjds[used].min(),mjds[used].max())
 
-    # Compute model phase for each TOA
-    phss = modelin.phase(ts.table)[1]
-    # ensure all postive
-    phases = np.where(phss < 0.0 * u.cycle, phss + 1.0 * u.cycle, phss)
-    mjds = ts.get_mjds()
-    weights = np.array([w['weight'] for w in ts.table['flags']])
-    h = float(hmw(phases,weights))
+    h = float(hmw(phases[used],weights[used]))
     print("Htest : {0:.2f} ({1:.2f} sigma)".format(h,h2sig(h)))
     if args.plot:
-        log.info("Making phaseogram plot with {0} photons".format(len(mjds)))
-        phaseogram(mjds,phases,weights,bins=100,plotfile = args.plotfile)
+        log.info("Making phaseogram plot with {0} photons".format(np.count_nonzero(used)))
+        phaseogram(mjds[used]*u.day,phases[used],weights[used],bins=100,
+                   plotfile = args.plotfile)
 
     if args.addphase:
         # Read input FITS file (again).
@@ -100,8 +95,8 @@ def main(argv=None):
         event_hdu = hdulist[1]
         event_hdr=event_hdu.header
         event_dat=event_hdu.data
-        if len(event_dat) != len(phases):
-            raise RuntimeError('Mismatch between length of FITS table ({0}) and length of phase array ({1})!'.format(len(event_dat),len(phases)))
+        if not np.all(used):
+            raise RuntimeError('Mismatch between length of FITS table ({0}) and length of phase array ({1})!'.format(len(event_dat),np.count_nonzero(used)))
         if 'PULSE_PHASE' in event_hdu.columns.names:
             log.info('Found existing PULSE_PHASE column, overwriting...')
             # Overwrite values in existing Column
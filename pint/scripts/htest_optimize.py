@@ -254,16 +254,15 @@ def main(argv=None):
 
     if weightcol is not None:
         if weightcol=='CALC':
-            weights = np.asarray([x['weight'] for x in ts.table['flags']])
+            weights = ts.get_flag_value('weight').filled(0.0)
             print("Original weights have min / max weights %.3f / %.3f" % \
                 (weights.min(), weights.max()))
             weights **= wgtexp
             wmx, wmn = weights.max(), weights.min()
                 # make the highest weight = 1, but keep min weight the same
             weights = wmn + ((weights - wmn) * (1.0 - wmn) / (wmx - wmn))
-            for ii, x in enumerate(ts.table['flags']):
-                x['weight'] = weights[ii]
-        weights = np.asarray([x['weight'] for x in ts.table['flags']])
+            ts.set_flag_value('weight', weights)
+        weights = ts.get_flag_value('weight').filled(0.0)
         print("There are %d events, with min / max weights %.3f / %.3f" % \
             (len(weights), weights.min(), weights.max()))
     else:
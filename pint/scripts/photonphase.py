@@ -2,17 +2,14 @@
 from __future__ import absolute_import, print_function, division
 import os,sys
 import numpy as np
-import pint.toa as toa
 import pint.models
 import pint.residuals
 import astropy.units as u
-from pint.event_toas import load_NICER_TOAs
-from pint.event_toas import load_RXTE_TOAs
-from pint.event_toas import load_XMM_TOAs
+from pint.event_toas import iter_event_TOAs, get_event_phases
+from pint.event_toas import DEFAULT_CHUNKSIZE
 from pint.plot_utils import phaseogram_binned
 from pint.observatory.nicer_obs import NICERObs
 from pint.observatory.rxte_obs import RXTEObs
-from astropy.time import Time, TimeDelta
 from pint.eventstats import hmw, hm, h2sig
 from astropy.coordinates import SkyCoord
 from astropy import log
@@ -34,6 +31,8 @@ def main(argv=None):
     parser.add_argument("--ephem",help="Planetary ephemeris to use (default=DE421)", default="DE421")
     parser.add_argument("--plot",help="Show phaseogram plot.", action='store_true', default=False)
     parser.add_argument("--fix",help="Apply 1.0 second offset for NICER", action='store_true', default=False)
+    parser.add_argument("--chunksize",help="Number of events processed at once (default={0})".format(DEFAULT_CHUNKSIZE),
+                        type=int, default=DEFAULT_CHUNKSIZE)
     args = parser.parse_args(argv)
 
     # If outfile is specified, that implies addphase
@@ -54,23 +53,17 @@ def main(argv=None):
         if args.orbfile is not None:
             log.info('Setting up NICER observatory')
             NICERObs(name='NICER',FPorbname=args.orbfile,tt2tdb_mode='none')
-        # Read event file and return list of TOA objects
-        try:
-            tl  = load_NICER_TOAs(args.eventfile)
-        except KeyError:
-            log.error("Observatory not recognized.  This probably means you need to provide an orbit file or barycenter the event file.")
-            sys.exit(1)
+        mission = 'nicer'
     elif hdr['TELESCOP'] == 'XTE':
         # Instantiate RXTEObs once so it gets added to the observatory registry
         if args.orbfile is not None:
             # Determine what observatory type is.
             log.info('Setting up RXTE observatory')
             RXTEObs(name='RXTE',FPorbname=args.orbfile,tt2tdb_mode='none')
-        # Read event file and return list of TOA objects
-        tl  = load_RXTE_TOAs(args.eventfile)
+        mission = 'rxte'
     elif hdr['TELESCOP'].startswith('XMM'):
         # Not loading orbit file here, since that is not yet supported.
-        tl  = load_XMM_TOAs(args.eventfile)
+        mission = 'xmm'
     else:
         log.error("FITS file not recognized, TELESCOPE = {0}, INSTRUMENT = {1}".format(
             hdr['TELESCOP'], hdr['INSTRUME']))
@@ -79,42 +72,50 @@ def main(argv=None):
     # Read in model
     modelin = pint.models.get_model(args.parfile)
 
+    # Events are read, prepared and phased in blocks of args.chunksize, so
+    # only the output columns are kept for the whole file.
+    nevents = hdr['NAXIS2']
+    phases = np.zeros(nevents)
+    iphases = np.zeros(nevents, dtype=np.int64)
+    mjds = np.zeros(nevents)
+    tdbs = np.zeros(nevents)
+    used = np.zeros(nevents, dtype=bool)
     # Discard events outside of MJD range
+    maxmjd = np.inf
     if args.maxMJD is not None:
-        tlnew = []
-        print("pre len : ",len(tl))
-        maxT = Time(float(args.maxMJD),format='mjd')
-        print("maxT : ",maxT)
-        for tt in tl:
-            if tt.mjd < maxT:
-                tlnew.append(tt)
-        tl=tlnew
-        print("post len : ",len(tlnew))
-
-    # Now convert to TOAs object and compute TDBs and posvels
-    if len(tl) == 0:
-        log.error("No TOAs, exiting!")
-        sys.exit(0)
+        maxmjd = float(args.maxMJD)
+        print("maxMJD : ", maxmjd)
+    chunks = iter_event_TOAs(args.eventfile, mission,
+                             chunksize=args.chunksize, maxmjd=maxmjd)
     # Could add a check here to only compute planet positions if PLANET_SHAPIRO is true.
     # For now, just being lazy and always computing planet positions.
-    ts = toa.get_TOAs_list(tl,ephem=args.ephem,planets=True)
-    ts.filename = args.eventfile
-    if args.fix:
-        ts.adjust_TOAs(TimeDelta(np.ones(len(ts.table))*-1.0*u.s,scale='tt'))
+    time_offset = -1.0*u.s if args.fix else None
+    try:
+        for rows, ts, (iphss, phss) in get_event_phases(chunks, modelin,
+                ephem=args.ephem, planets=True, time_offset=time_offset):
+            # ensure all postive
+            negmask = phss < 0.0 * u.cycle
+            phases[rows] = np.where(negmask, phss.value + 1.0, phss.value)
+            iphases[rows] = (iphss - negmask*u.cycle).value
+            mjds[rows] = ts.get_mjds().value
+            if args.barytime:
+                tdbs[rows] = [t.mjd for t in ts.table['tdb']]
+            used[rows] = True
+    except KeyError:
+        log.error("Observatory not recognized.  This probably means you need to provide an orbit file or barycenter the event file.")
+        sys.exit(1)
 
-    print(ts.get_summary())
-    mjds = ts.get_mjds()
-    print(mjds.min(),mjds.max())
+    if not np.any(used):
+        log.error("No TOAs, exiting!")
+        sys.exit(0)
+    print("Used {0} of {1} events".format(np.count_nonzero(used), nevents))
+    print(mjds[used].min(),mjds[used].max())
 
-    # Compute model phase for each TOA
-    iphss,phss = modelin.phase(ts.table)
-    # ensure all postive
-    negmask = phss < 0.0 * u.cycle
-    phases = np.where(negmask, phss + 1.0 * u.cycle, phss)
-    h = float(hm(phases))
+    h = float(hm(phases[used]))
     print("Htest : {0:.2f} ({1:.2f} sigma)".format(h,h2sig(h)))
     if args.plot:
-        phaseogram_binned(mjds,phases,bins=100,plotfile = args.plotfile)
+        phaseogram_binned(mjds[used]*u.day,phases[used],bins=100,
+                          plotfile = args.plotfile)
 
     if args.addphase:
         # Read input FITS file (again).
@@ -123,13 +124,12 @@ def main(argv=None):
             hdulist = pyfits.open(args.eventfile,mode='update')
         else:
             hdulist = pyfits.open(args.eventfile)
-        if len(hdulist[1].data) != len(phases):
-            raise RuntimeError('Mismatch between length of FITS table ({0}) and length of phase array ({1})!'.format(len(hdulist[1].data),len(phases)))
+        if not np.all(used):
+            raise RuntimeError('Mismatch between length of FITS table ({0}) and length of phase array ({1})!'.format(len(hdulist[1].data),np.count_nonzero(used)))
         data_to_add = {'PULSE_PHASE':[phases,'D']}
         if args.absphase:
-            data_to_add['ABS_PHASE'] = [iphss-negmask*u.cycle,'K']
+            data_to_add['ABS_PHASE'] = [iphases,'K']
         if args.barytime:
-            tdbs = np.asarray([t.mjd for t in ts.table['tdb']])
             data_to_add['BARY_TIME'] = [tdbs,'D']
         for key in data_to_add.keys():
             if key in hdulist[1].columns.names:
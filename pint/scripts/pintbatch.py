@@ -0,0 +1,54 @@
+#!/usr/bin/env python -W ignore::FutureWarning -W ignore::UserWarning -W ignore::DeprecationWarning
+"""Fit many pulsars in parallel with PINT
+
+Reads a list of par and tim file pairs, one pair per line, fits them with a
+pool of worker processes and writes the post-fit par files.  A summary line
+with the fit results and the time spent loading, preparing and fitting is
+printed for each pulsar as soon as its fit is done.
+"""
+from __future__ import absolute_import, print_function, division
+import os, sys
+import pint.batch
+import argparse
+
+from astropy import log
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit many pulsars in parallel with PINT")
+    parser.add_argument("listfile",help="File with one 'parfile timfile' pair per line")
+    parser.add_argument("--outdir",help="Directory for the post-fit par files (default=None)", default=None)
+    parser.add_argument("--processes",help="Number of worker processes (default=number of CPUs)", type=int, default=None)
+    parser.add_argument("--fitter",help="Fitter to use (default=auto)", choices=['auto', 'wls', 'gls'], default='auto')
+    parser.add_argument("--ephem",help="Solar system ephemeris (default=DE421)", default="DE421")
+    parser.add_argument("--obs",help="Observatories whose clock files are loaded up front", nargs='*', default=[])
+    args = parser.parse_args(argv)
+
+    pairs = []
+    for line in open(args.listfile):
+        fields = line.split('#')[0].split()
+        if len(fields) == 2:
+            pairs.append(tuple(fields))
+        elif fields:
+            log.warn("Ignoring line '{0}'".format(line.strip()))
+
+    nfailed = 0
+    print("%-12s %6s %10s %8s %10s %8s %8s %8s" % ('PSR', 'NTOA', 'chi2_red',
+          'RMS(us)', 'load(s)', 'prep(s)', 'fit(s)', 'status'))
+    for res in pint.batch.fit_pulsars(pairs, processes=args.processes,
+                                      observatories=args.obs,
+                                      fitter=args.fitter, ephem=args.ephem):
+        tm = res['timings']
+        if res['error'] is not None:
+            nfailed += 1
+            print("%-12s %6s %10s %8s %10s %8s %8s %8s" % (res['psr'] or
+                  os.path.basename(res['par']), '', '', '', '', '', '', 'FAILED'))
+            continue
+        print("%-12s %6d %10.3f %8.3f %10.2f %8.2f %8.2f %8s" % (res['psr'],
+              res['ntoas'], res['chi2_reduced'], res['rms'], tm['load'],
+              tm['prepare'], tm['fit'], 'ok'))
+        sys.stdout.flush()
+        if args.outdir is not None:
+            fn = os.path.join(args.outdir, os.path.basename(res['par']))
+            with open(fn, "w") as fout:
+                fout.write(res['parfile'] + "\n")
+    return 1 if nfailed else 0
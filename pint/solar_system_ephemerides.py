@@ -1,6 +1,7 @@
 from __future__ import absolute_import, print_function, division
 import numpy as np
 import os
+import contextlib
 import astropy.units as u
 import astropy.coordinates as coor
 from astropy.extern.six.moves import urllib
@@ -33,49 +34,316 @@ jpl_obj_code = {'ssb': 0,
                 'pluto': 9}
 
 
-def _load_kernel_link(ephem, link=''):
-    load_kernel = False # a flag for checking if the kernel has been loaded
-    search_list = [link, jpl_kernel_http, jpl_kernel_ftp]
-    if link != '':
-        search_list.append('')
-    for l in search_list:
-        if l == '':
-            ephem_link = ephem # Astropy default ephem does not like .bsp in the end.
-        else:
-            ephem_link = l+"%s.bsp" % ephem
-        if load_kernel:
-            break
-        try:
-            coor.solar_system_ephemeris.set(ephem_link)
-            load_kernel = True
-        except:
-            try:
-                aut.data.download_file(ephem_link, timeout=50, cache=True)
-                coor.solar_system_ephemeris.set(ephem_link)
-                load_kernel = True
-            except:
-                load_kernel = False
-    return load_kernel
-
-
-def _load_kernel_local(ephem, path=''):
-    load_kernel = False # a flag for checking if the kernel has been loaded
+# Kernels opened so far, {file name: jplephem SPK}.  jplephem memory-maps
+# the segment data, so a kernel is read from disk only once per process
+# and worker processes forked afterwards share the mapped pages.
+_kernels = {}
+
+# File name found for each (ephem, path, link) request
+_kernel_files = {}
+
+
+def _kernel_file_local(ephem, path=''):
+    """Return the local file name of the kernel for ephem, or None."""
     if path.endswith("%s.bsp" % ephem):
         custom_path = path
     else:
         custom_path = os.path.join(path, "%s.bsp" % ephem)
-    search_list = [custom_path, datapath("%s.bsp" % ephem)]
-    for p in search_list:
-        if load_kernel:
-            break
-        try:# Bipass the astropy kernel loading system.
-            coor.solar_system_ephemeris._kernel = SPK.open(p)
-            coor.solar_system_ephemeris._value = p
-            coor.solar_system_ephemeris._kernel.origin = coor.solar_system_ephemeris._value
-            load_kernel = True
-        except:
-            load_kernel = False
-    return load_kernel
+    for p in [custom_path, datapath("%s.bsp" % ephem)]:
+        if p is not None and os.path.isfile(p):
+            return p
+    return None
+
+
+def _kernel_file_link(ephem, link=''):
+    """Return the file name of the kernel for ephem downloaded from a link.
+
+    Kernels already in the astropy download cache are used without any
+    network access.  Returns None if the kernel can not be downloaded.
+    """
+    search_list = [l + "%s.bsp" % ephem
+                   for l in [link, jpl_kernel_http, jpl_kernel_ftp] if l != '']
+    for url in search_list:
+        if aut.data.is_url_in_cache(url):
+            return aut.data.download_file(url, cache=True)
+    for url in search_list:
+        try:
+            return aut.data.download_file(url, timeout=50, cache=True)
+        except Exception:
+            continue
+    return None
+
+
+def _find_kernel_file(ephem, path=None, link=None):
+    """Find (and if needed download) the kernel file for ephem.
+
+    If a local path is provided, only local files are considered and the
+    network is never used.  Otherwise the link (and the default JPL
+    servers) are tried first, then the PINT data directory.
+    """
+    if path is not None:
+        fn = _kernel_file_local(ephem, path=path)
+        if fn is None:
+            raise ValueError("Can not load the ephemeris file '%s.bsp' from the"
+                             " local directory %s." % (ephem, path))
+        return fn
+    # Do not look for a download when the kernel is in the data directory
+    # and no link was asked for.
+    fn = None
+    if link is None:
+        fn = _kernel_file_local(ephem)
+    if fn is None:
+        fn = _kernel_file_link(ephem, link='' if link is None else link)
+    if fn is None:
+        fn = _kernel_file_local(ephem)
+    if fn is None:
+        raise ValueError("Can not load the ephemeris file '%s.bsp'. " % ephem)
+    return fn
+
+
+def load_kernel(ephem, path=None, link=None):
+    """Return the jplephem SPK kernel for an ephemeris.
+
+    Each kernel file is opened only once per process and shared by all
+    the calls (and by processes forked afterwards).  The kernel is also
+    made the current astropy.coordinates.solar_system_ephemeris, so
+    astropy functions use the same file.
+
+    Parameters
+    ----------
+    ephem: str
+        Ephemeris name, e.g. 'de421'.
+    path: str optional
+        A local ephemeris file or directory.  If given, the network is
+        never used.
+    link: str optional
+        The link where to download the ephemeris.
+    """
+    ephem = ephem.lower()
+    key = (ephem, path, link)
+    fn = _kernel_files.get(key)
+    if fn is None:
+        fn = _find_kernel_file(ephem, path=path, link=link)
+        _kernel_files[key] = fn
+    kernel = _kernels.get(fn)
+    if kernel is None or kernel.daf.file.closed:
+        log.info("Loading ephemeris kernel {0}".format(fn))
+        kernel = SPK.open(fn)
+        kernel.origin = fn
+        _kernels[fn] = kernel
+    # Bypass the astropy kernel loading system.
+    if coor.solar_system_ephemeris._kernel is not kernel:
+        coor.solar_system_ephemeris._kernel = kernel
+        coor.solar_system_ephemeris._value = fn
+    return kernel
+
+
+def loaded_kernel_files():
+    """Return the file names of the ephemeris kernels opened so far."""
+    return sorted(_kernels.keys())
+
+
+# Chains of SPK segments giving each body with respect to the SSB (the
+# same as the ones used by astropy.coordinates).
+ssb_kernel_segments = {'sun': [(0, 10)],
+                       'mercury': [(0, 1), (1, 199)],
+                       'venus': [(0, 2), (2, 299)],
+                       'earth-moon-barycenter': [(0, 3)],
+                       'earth': [(0, 3), (3, 399)],
+                       'moon': [(0, 3), (3, 301)],
+                       'mars': [(0, 4)],
+                       'jupiter': [(0, 5)],
+                       'saturn': [(0, 6)],
+                       'uranus': [(0, 7)],
+                       'neptune': [(0, 8)],
+                       'pluto': [(0, 9)]}
+
+# Spacing, in days, of the grid used by PosVelInterpolator.  With cubic
+# Hermite interpolation the error on the Earth position is < 0.1 mm.
+DEFAULT_POSVEL_STEP = 1.0 / 32
+
+# Step of the interpolation used by objPosVel_wrt_SSB, None to evaluate
+# the kernel at every time (see posvel_interpolation).
+_posvel_interp_step = None
+
+
+class PosVelInterpolator(object):
+    """Interpolate solar system body positions from an SPK kernel.
+
+    The kernel is evaluated (through jplephem, reading the Chebyshev
+    coefficients directly) on a regular grid of spacing step days, one
+    block of grid points per Julian day, and positions and velocities at
+    the requested times are obtained by cubic Hermite interpolation.  The
+    blocks are kept, so TOAs from the same days (e.g. photons, or repeated
+    calls) only cost the interpolation.
+
+    Parameters
+    ----------
+    kernel : jplephem.spk.SPK
+        The ephemeris kernel.
+    step : float
+        Grid spacing in days.  1/step must be an integer.
+    max_blocks : int
+        Maximum number of days kept in the cache for each body.
+    """
+    def __init__(self, kernel, step=DEFAULT_POSVEL_STEP, max_blocks=100000):
+        self.kernel = kernel
+        self.nstep = int(round(1.0 / step))
+        self.step = 1.0 / self.nstep
+        self.max_blocks = max_blocks
+        # {objname: {julian day: (nstep+1, 6) array of pos (km), vel (km/day)}}
+        self._blocks = {}
+
+    def _evaluate(self, objname, jd1, jd2):
+        """Evaluate the kernel for objname, wrt the SSB, at jd1 + jd2 (TDB)."""
+        try:
+            segments = ssb_kernel_segments[objname]
+        except KeyError:
+            raise KeyError("Solar system body '%s' is not supported." % objname)
+        pos = np.zeros((3, len(jd1)))
+        vel = np.zeros((3, len(jd1)))
+        for pair in segments:
+            p, v = self.kernel[pair].compute_and_differentiate(jd1, jd2)
+            pos += p
+            vel += v
+        return np.concatenate([pos, vel]).T
+
+    def _get_blocks(self, objname, days):
+        """Return the grid values for the given (unique) days."""
+        blocks = self._blocks.setdefault(objname, {})
+        missing = [d for d in days if d not in blocks]
+        if missing:
+            if len(blocks) + len(missing) > self.max_blocks:
+                blocks.clear()
+            npts = self.nstep + 1
+            jd1 = np.repeat(np.array(missing, dtype=np.float64), npts)
+            jd2 = np.tile(np.arange(npts) * self.step, len(missing))
+            values = self._evaluate(objname, jd1, jd2)
+            for ii, d in enumerate(missing):
+                blocks[d] = values[ii * npts:(ii + 1) * npts]
+        return np.array([blocks[d] for d in days])
+
+    def posvel(self, objnames, t):
+        """Positions and velocities of several bodies wrt the SSB.
+
+        Parameters
+        ----------
+        objnames : list of str
+            Names of the bodies (see ssb_kernel_segments).
+        t : astropy.time.Time
+            The TDB times.
+
+        Returns
+        -------
+        pos, vel : numpy.ndarray
+            Arrays of shape (len(objnames), 3, len(t)), in km and km/s.
+        """
+        if t.scale != 'tdb':
+            t = t.tdb
+        jd1 = np.atleast_1d(t.jd1)
+        jd2 = np.atleast_1d(t.jd2)
+        # Split the times into Julian day and fraction of day
+        d1 = np.floor(jd1)
+        frac = (jd1 - d1) + jd2
+        d2 = np.floor(frac)
+        frac -= d2
+        days, inv = np.unique(d1 + d2, return_inverse=True)
+        x = frac * self.nstep
+        k = np.minimum(np.floor(x).astype(int), self.nstep - 1)
+        x -= k
+        x2 = x * x
+        x3 = x2 * x
+        # Cubic Hermite basis functions and their derivatives
+        h00 = 2 * x3 - 3 * x2 + 1
+        h10 = x3 - 2 * x2 + x
+        h01 = -2 * x3 + 3 * x2
+        h11 = x3 - x2
+        dh00 = 6 * x2 - 6 * x
+        dh10 = 3 * x2 - 4 * x + 1
+        dh11 = 3 * x2 - 2 * x
+        # Stack the grids of all the bodies: (nobj, ndays, nstep+1, 6)
+        grid = np.array([self._get_blocks(o, days) for o in objnames])
+        v0 = grid[:, inv, k]
+        v1 = grid[:, inv, k + 1]
+        p0, m0 = v0[..., :3], v0[..., 3:] * self.step
+        p1, m1 = v1[..., :3], v1[..., 3:] * self.step
+        pos = (h00[:, None] * p0 + h10[:, None] * m0 + h01[:, None] * p1 +
+               h11[:, None] * m1)
+        vel = (dh00[:, None] * (p0 - p1) + dh10[:, None] * m0 +
+               dh11[:, None] * m1) / self.step / SECS_PER_DAY
+        pos = np.swapaxes(pos, 1, 2)
+        vel = np.swapaxes(vel, 1, 2)
+        if t.isscalar:
+            return pos[..., 0], vel[..., 0]
+        return pos, vel
+
+
+# One interpolator per kernel file
+_posvel_interpolators = {}
+
+
+def get_posvel_interpolator(ephem, path=None, link=None,
+                            step=DEFAULT_POSVEL_STEP):
+    """Return the (shared) PosVelInterpolator for an ephemeris."""
+    kernel = load_kernel(ephem, path=path, link=link)
+    key = (kernel.origin, step)
+    if key not in _posvel_interpolators:
+        _posvel_interpolators[key] = PosVelInterpolator(kernel, step=step)
+    # The kernel may have been reopened by load_kernel
+    _posvel_interpolators[key].kernel = kernel
+    return _posvel_interpolators[key]
+
+
+@contextlib.contextmanager
+def posvel_interpolation(step=DEFAULT_POSVEL_STEP):
+    """Context in which objPosVel_wrt_SSB interpolates the ephemeris.
+
+    Inside the context, positions and velocities are computed with a
+    PosVelInterpolator of the given grid step (in days), shared by all
+    calls with the same ephemeris.  step=None evaluates the kernel at
+    every time, as outside of the context.
+    """
+    global _posvel_interp_step
+    old = _posvel_interp_step
+    _posvel_interp_step = step
+    try:
+        yield
+    finally:
+        _posvel_interp_step = old
+
+
+def objPosVels_wrt_SSB(objnames, t, ephem, path=None, link=None,
+                       step=DEFAULT_POSVEL_STEP):
+    """Positions and velocities of several solar system bodies wrt the SSB.
+
+    This is the vectorized form of objPosVel_wrt_SSB, evaluating all the
+    bodies at once with a PosVelInterpolator (see get_posvel_interpolator).
+
+    Parameters
+    ----------
+    objnames: list of str
+        Solar system object names.
+    t: Astropy.time.Time object
+        TDB times.
+    ephem: str
+        The ephem to for computing solar system object position and velocity
+    path: str optional
+        The data directory point to a local ephemeris.
+    link: str optional
+        The link where to download the ephemeris.
+    step: float optional
+        The spacing of the interpolation grid, in days.
+
+    Returns
+    -------
+    dict of PosVel objects, indexed by object name
+    """
+    objnames = [o.lower() for o in objnames]
+    interp = get_posvel_interpolator(ephem, path=path, link=link, step=step)
+    pos, vel = interp.posvel(objnames, t)
+    return dict((o, PosVel(pos[ii] * u.km, vel[ii] * u.km/u.second,
+                           origin='ssb', obj=o))
+                for ii, o in enumerate(objnames))
 
 
 def objPosVel_wrt_SSB(objname, t, ephem, path=None, link=None):
@@ -107,29 +375,17 @@ def objPosVel_wrt_SSB(objname, t, ephem, path=None, link=None):
     Note
     ----
     If both path and link are provided. Path will be first to try.
+
+    Inside a posvel_interpolation() context the ephemeris is interpolated
+    (see objPosVels_wrt_SSB).
     """
     ephem = ephem.lower()
     objname = objname.lower()
+    if _posvel_interp_step is not None:
+        return objPosVels_wrt_SSB([objname], t, ephem, path=path, link=link,
+                                  step=_posvel_interp_step)[objname]
     # Use astropy to compute postion.
-    # If a local path is provided, the local search will be considered first.
-    # If the path is not provided, try link first, then local data file.
-    if path is None:
-        if link is None:
-            link_str = ''
-        else:
-            link_str = link
-        is_load = _load_kernel_link(ephem, link=link_str)
-        if not is_load: # Link does not Try to load from data path.
-            path_str = ''
-            is_load = _load_kernel_local(ephem, path=path_str)
-        if not is_load:
-            raise ValueError("Can not load the ephemeris file '%s.bsp'. " % ephem)
-    else:
-        path_str = path
-        is_load = _load_kernel_local(ephem, path=path_str)
-        if not is_load:
-            raise ValueError("Can not load the ephemeris file '%s.bsp' from the"
-                             " local directory %s." % (ephem, path_str))
+    load_kernel(ephem, path=path, link=link)
     pos, vel = coor.get_body_barycentric_posvel(objname, t)
     return PosVel(pos.xyz, vel.xyz.to(u.km/u.second), origin='ssb', obj=objname)
 
@@ -183,25 +439,7 @@ def get_tdb_tt_ephem_geocenter(tt, ephem, path=None, link=None):
     """
     # Load kernel
     ephem = ephem.lower()
-
-    if path is None:
-        if link is None:
-            link_str = ''
-        else:
-            link_str = link
-        is_load = _load_kernel_link(ephem, link=link_str)
-        if not is_load: # Link does not Try to load from data path.
-            path_str = ''
-            is_load = _load_kernel_local(ephem, path=path_str)
-        if not is_load:
-            raise ValueError("Can not load the ephemeris file '%s.bsp'. " % ephem)
-    else:
-        path_str = path
-        is_load = _load_kernel_local(ephem, path=path_str)
-        if not is_load:
-            raise ValueError("Can not load the ephemeris file '%s.bsp' from the"
-                             " local directory %s." % (ephem, path_str))
-    kernel = coor.solar_system_ephemeris._kernel
+    kernel = load_kernel(ephem, path=path, link=link)
     try:
         # JPL ID defines this column.
         seg = kernel[1000000000, 1000000001]
@@ -1,5 +1,5 @@
 from __future__ import absolute_import, print_function, division
-import re, sys, os, numpy, gzip, copy
+import re, sys, os, numpy, gzip, copy, json, numbers, itertools
 from . import utils
 from .observatory import Observatory, get_observatory
 from . import erfautils
@@ -10,10 +10,11 @@ import astropy.table as table
 import astropy.units as u
 from astropy.coordinates import EarthLocation
 try:
-    from astropy.erfa import DAYSEC as SECS_PER_DAY
+    from astropy.erfa import DAYSEC as SECS_PER_DAY, DJM0
 except ImportError:
-    from astropy._erfa import DAYSEC as SECS_PER_DAY
-from .solar_system_ephemerides import objPosVel_wrt_SSB
+    from astropy._erfa import DAYSEC as SECS_PER_DAY, DJM0
+from .solar_system_ephemerides import objPosVel_wrt_SSB, objPosVels_wrt_SSB, \
+    posvel_interpolation
 from pint import ls, J2000, J2000ld
 from .config import datapath
 from astropy import log
@@ -27,9 +28,13 @@ iers_a_file = None
 iers_a = None
 JD_MJD = 2400000.5
 
+# Source of the TOA table versions, see TOAs.table_changed()
+_table_version_counter = itertools.count(1)
+
 def get_TOAs(timfile, ephem="DE421", include_bipm=True, bipm_version='BIPM2015',
              include_gps=True, planets=False, usepickle=False,
-             tdb_method="astropy"):
+             tdb_method="astropy", columnar=False, usecache=False,
+             cachedir=None):
     """Convenience function to load and prepare TOAs for PINT use.
 
     Loads TOAs from a '.tim' file, applies clock corrections, computes
@@ -38,8 +43,26 @@ def get_TOAs(timfile, ephem="DE421", include_bipm=True, bipm_version='BIPM2015',
 
     Includes options to specify solar system ephemeris [default DE421],
     gps clock corrections [default=True], and BIPM clock corrections
-    [default=True].
+    [default=True].  With columnar=True the '.tim' file is read straight
+    into the TOA table (see TOAs.read_toa_file_columnar), which is much
+    faster for large files.
+
+    With usecache=True the prepared TOAs are kept in a cache directory
+    (cachedir, or the PINT user cache by default), keyed by the contents
+    of the '.tim' file and its INCLUDEs and by all the options above (see
+    pint.toa_cache).  This should be preferred to usepickle, which only
+    compares the modification times of the '.tim' file and its pickle.
     """
+    if usecache:
+        from .toa_cache import TOACache, toa_cache_key
+        cache = TOACache(cachedir)
+        key = toa_cache_key(timfile, ephem=ephem, include_bipm=include_bipm,
+                            bipm_version=bipm_version,
+                            include_gps=include_gps, planets=planets,
+                            tdb_method=tdb_method)
+        t = cache.load(key)
+        if t is not None:
+            return t
     updatepickle = False
     if usepickle:
         picklefile = _check_pickle(timfile)
@@ -48,8 +71,8 @@ def get_TOAs(timfile, ephem="DE421", include_bipm=True, bipm_version='BIPM2015',
         else:
             # Pickle either did not exist or is out of date
             updatepickle = True
-    t = TOAs(timfile)
-    if not any(['clkcorr' in f for f in t.table['flags']]):
+    t = TOAs(timfile, columnar=columnar)
+    if 'clkcorr' not in t.table.colnames:
         t.apply_clock_corrections(include_gps=include_gps,
                                   include_bipm=include_bipm,
                                   bipm_version=bipm_version)
@@ -61,6 +84,8 @@ def get_TOAs(timfile, ephem="DE421", include_bipm=True, bipm_version='BIPM2015',
     if usepickle and updatepickle:
         log.info("Pickling TOAs.")
         t.pickle()
+    if usecache:
+        cache.store(key, t)
     return t
 
 def _check_pickle(toafilename, picklefilename=None):
@@ -108,7 +133,7 @@ def get_TOAs_list(toa_list,ephem="DE421", include_bipm=True,
     [default=True].
     """
     t = TOAs(toalist = toa_list)
-    if not any(['clkcorr' in f for f in t.table['flags']]):
+    if 'clkcorr' not in t.table.colnames:
         t.apply_clock_corrections(include_gps=include_gps,
                                   include_bipm=include_bipm,
                                   bipm_version=bipm_version)
@@ -423,7 +448,8 @@ class TOA(object):
 class TOAs(object):
     """A class of multiple TOAs, loaded from zero or more files."""
 
-    def __init__(self, toafile=None, toalist=None):
+    def __init__(self, toafile=None, toalist=None, columnar=False,
+                 toatable=None):
         # First, just make an empty container
         self.toas = []
         self.commands = []
@@ -442,6 +468,13 @@ class TOAs(object):
             if toafile.endswith('.pickle') or toafile.endswith('pickle.gz'):
                 log.info('Reading TOAs from pickle file')
                 self.read_pickle_file(toafile)
+            elif toafile.endswith('.npz'):
+                log.info('Reading TOAs from npz file')
+                self.read_npz_file(toafile)
+            elif columnar:
+                # Fill the table directly, without making TOA objects
+                self.read_toa_file_columnar(toafile)
+                self.filename = toafile
             else: # Not a pickle file, process as a standard set of TOA lines
                 self.read_toa_file(toafile)
                 self.filename = toafile
@@ -451,19 +484,39 @@ class TOAs(object):
                 log.error('Trying to initialize TOAs from a non-list class')
             self.toas = toalist
 
+        if toatable is not None:
+            # A ready-made table, e.g. from _make_toa_table()
+            self.table = toatable
+            self.filename = toatable.meta.get('filename')
+
         if not hasattr(self, 'table'):
             mjds = self.get_mjds(high_precision=True)
             # The table is grouped by observatory
             self.table = table.Table([numpy.arange(len(mjds)), mjds, self.get_mjds(),
                                       self.get_errors(), self.get_freqs(),
-                                      self.get_obss(), self.get_flags()],
+                                      self.get_obss()],
                                       names=("index", "mjd", "mjd_float", "error",
-                                             "freq", "obs", "flags"),
-                                      meta={'filename':self.filename}).group_by("obs")
-
+                                             "freq", "obs"),
+                                      meta={'filename':self.filename})
+            flag_cols = flags_to_columns(self.get_flags())
+            if flag_cols:
+                self.table.add_columns(flag_cols)
+            self.table = self.table.group_by("obs")
+
+        self.table_changed()
         # We don't need this now that we have a table
         del(self.toas)
 
+    def table_changed(self):
+        """Give the TOA table a new version number.
+
+        The number is stored as table.meta['version'] and is used, with a
+        hash of the table columns, to recognize the TOAs in caches (see
+        TimingModel.delay).  The TOAs methods that change the table call
+        this; call it after changing the table by hand.
+        """
+        self.table.meta['version'] = next(_table_version_counter)
+
     @property
     def ntoas(self):
         return len(self.table) if hasattr(self, "table") else len(self.toas)
@@ -539,11 +592,44 @@ class TOAs(object):
             return self.table['obs']
 
     def get_flags(self):
-        """Return a numpy array of the TOA flags"""
+        """Return a numpy array of the TOA flags, as one dict per TOA.
+
+        The flags are stored in the table as one column per flag (see
+        flags_to_columns), so the dicts are made on demand and changing
+        them does not change the TOAs.  Use get_flag_value() and
+        set_flag_value() to work with a single flag.
+        """
         if hasattr(self, "toas"):
             return numpy.array([t.flags for t in self.toas])
         else:
-            return self.table['flags']
+            return flag_dicts(self.table)
+
+    @property
+    def flag_names(self):
+        """The names of all the flags set on at least one TOA."""
+        return [self.table[c].meta.get('flag', c[len(_flag_prefix):])
+                for c in self.table.colnames if c.startswith(_flag_prefix)]
+
+    def get_flag_value(self, flag):
+        """Return the values of a flag as a numpy masked array.
+
+        TOAs without the flag are masked.  Values of flags that were given
+        with units are returned in the unit of the column.
+        """
+        return flag_values(self.table, flag)
+
+    def set_flag_value(self, flag, values):
+        """Set the values of a flag for all the TOAs.
+
+        values must have one entry per TOA (in table order), and can be a
+        Quantity.  Masked entries (if values is a masked array) remove the
+        flag from those TOAs.
+        """
+        name = flag_column_name(flag)
+        if name in self.table.colnames:
+            self.table.remove_column(name)
+        self.table.add_column(flag_column(flag, values))
+        self.table_changed()
 
     def select(self, selectarray):
         """Apply a boolean selection or mask array to the TOA table."""
@@ -554,6 +640,7 @@ class TOAs(object):
             self.table_selects.append(copy.deepcopy(self.table))
             # Our TOA table must be grouped by observatory for phase calcs
             self.table = self.table[selectarray].group_by('obs')
+            self.table_changed()
         else:
             log.warn("TOA selection not implemented for TOA lists.")
 
@@ -561,6 +648,7 @@ class TOAs(object):
         """Return to previous selected version of the TOA table (stored in stack)."""
         if hasattr(self, "table_selects") and len(self.table_selects):
             self.table = self.table_selects.pop()
+            self.table_changed()
         else:
             log.warn("No previous TOA table found.  No changes made.")
 
@@ -618,6 +706,7 @@ class TOAs(object):
         # This adjustment invalidates the derived columns in the table, so delete
         # and recompute them
         self.table['mjd_float'] = self.get_mjds(high_precision=False)
+        self.table_changed()
         self.compute_TDBs()
         self.compute_posvels(self.ephem, self.planets)
 
@@ -647,12 +736,17 @@ class TOAs(object):
             outf.write('FORMAT 1\n')
         # NOTE(@paulray): This really should REMOVE any(?) clock corrections
         # that have been applied!
-        for toatime,toaerr,freq,obs,flags in zip(self.table['mjd'],self.table['error'].quantity,
-            self.table['freq'].quantity,self.table['obs'],self.table['flags']):
+        if 'clkcorr' in self.table.colnames:
+            clkcorrs = self.table['clkcorr'].quantity
+        else:
+            clkcorrs = numpy.zeros(self.ntoas) * u.s
+        for toatime,toaerr,freq,obs,flags,clkcorr in zip(self.table['mjd'],
+            self.table['error'].quantity, self.table['freq'].quantity,
+            self.table['obs'], self.get_flags(), clkcorrs):
             obs_obj = Observatory.get(obs)
             # Remove clock corrections from the out_put toas
-            if 'clkcorr' in flags:
-                toatime_out = toatime - flags['clkcorr']
+            if clkcorr:
+                toatime_out = toatime - time.TimeDelta(clkcorr)
             else:
                 toatime_out = toatime
             str = format_toa_line(toatime_out, toaerr, freq, obs_obj, name=name,
@@ -668,10 +762,10 @@ class TOAs(object):
 
         Apply clock corrections to all the TOAs where corrections are
         available.  This routine actually changes the value of the TOA,
-        although the correction is also listed as a new flag for the TOA
-        called 'clkcorr' so that it can be reversed if necessary.  This
-        routine also applies all 'TIME' commands and treats them exactly
-        as if they were a part of the observatory clock corrections.
+        although the correction is also stored in a new 'clkcorr' column
+        of the table (in seconds) so that it can be reversed if necessary.
+        This routine also applies all 'TIME' commands and treats them
+        exactly as if they were a part of the observatory clock corrections.
 
         Options to include GPS or BIPM clock corrections are set to True
         by default in order to give the most accurate clock corrections.
@@ -680,40 +774,42 @@ class TOAs(object):
         https://github.com/nanograv/PINT/wiki/Clock-Corrections-and-Timescales-in-PINT
 
         """
-        # First make sure that we haven't already applied clock corrections
-        flags = self.table['flags']
-        # if any([f.has_key('clkcorr') for f in flags]):
-        #     log.warn("Some TOAs have 'clkcorr' flag.  Not applying new clock corrections.")
-        #     return
+        # TIME statements are in sec, they are stored in the 'to' flag
+        time_offsets = flag_values(self.table, 'to').filled(0.0)
         # An array of all the time corrections, one for each TOA
         log.info("Applying clock corrections.")
         corr = numpy.zeros(self.ntoas) * u.s
         times = self.table['mjd']
         for ii, key in enumerate(self.table.groups.keys):
-            grp = self.table.groups[ii]
             obs = self.table.groups.keys[ii]['obs']
             site = get_observatory(obs, include_gps=include_gps,
                                    include_bipm=include_bipm,
                                    bipm_version=bipm_version)
             loind, hiind = self.table.groups.indices[ii:ii+2]
-            # First apply any TIME statements
-            for jj in range(loind, hiind):
-                if 'to' in flags[jj]:
-                    # TIME commands are in sec
-                    # SUGGESTION(@paulray): These time correction units should
-                    # be applied in the parser, not here. In the table the time
-                    # correction should have units.
-                    corr[jj] = flags[jj]['to'] * u.s
-                    times[jj] += time.TimeDelta(corr[jj])
-
-            gcorr = site.clock_corrections(time.Time(grp['mjd']))
-            for jj, cc in enumerate(gcorr):
-                grp['mjd'][jj] += time.TimeDelta(cc)
-            corr[loind:hiind] += gcorr
-            # Now update the flags with the clock correction used
-            for jj in range(loind, hiind):
-                if corr[jj]:
-                    flags[jj]['clkcorr'] = corr[jj]
+            grptimes = _times_to_array(times[loind:hiind])
+            # TIME statements are in sec, and are applied before the clock
+            # corrections are looked up.
+            grpcorr = time_offsets[loind:hiind] * u.s
+            if numpy.any(grpcorr):
+                clktimes = grptimes + time.TimeDelta(grpcorr)
+            else:
+                clktimes = grptimes
+            grpcorr += site.clock_corrections(clktimes)
+            corr[loind:hiind] = grpcorr
+            # One Time addition for the whole group, written back to the
+            # mjd column (one Time per TOA) as a single slice
+            newtimes = numpy.empty(hiind - loind, dtype=object)
+            for jj, t in enumerate(grptimes + time.TimeDelta(grpcorr)):
+                newtimes[jj] = t
+            times[loind:hiind] = newtimes
+        if 'clkcorr' in self.table.colnames:
+            # Corrections applied again add up, keep the total
+            self.table['clkcorr'] += corr.to(u.s).value
+        else:
+            self.table.add_column(table.Column(name='clkcorr',
+                                               data=corr.to(u.s).value,
+                                               unit=u.s))
+        self.table_changed()
         # Updat clock correction info
         self.clock_corr_info.update({'include_bipm':include_bipm,
                                      'bipm_version':bipm_version,
@@ -724,6 +820,10 @@ class TOAs(object):
         This routine creates new columns 'tdb' and 'tdbld' in a TOA table
         for TDB times, using the Observatory locations and IERS A Earth
         rotation corrections for UT1.
+
+        The method and ephem arguments are passed to
+        Observatory.get_TDBs(); method='fast' is the quickest for large
+        numbers of TOAs.
         """
         log.info('Computing TDB columns.')
         if 'tdb' in self.table.colnames:
@@ -734,7 +834,9 @@ class TOAs(object):
             self.table.remove_column('tdbld')
 
         # Compute in observatory groups
-        tdbs = numpy.zeros_like(self.table['mjd'])
+        jd1 = numpy.zeros(self.ntoas)
+        jd2 = numpy.zeros(self.ntoas)
+        formats = numpy.zeros(self.ntoas, dtype=object)
         for ii, key in enumerate(self.table.groups.keys):
             grp = self.table.groups[ii]
             obs = self.table.groups.keys[ii]['obs']
@@ -742,15 +844,24 @@ class TOAs(object):
             site = get_observatory(obs)
             grpmjds = time.Time(grp['mjd'], location=grp['mjd'][0].location)
             grptdbs = site.get_TDBs(grpmjds, method=method, ephem=ephem)
-            tdbs[loind:hiind] = numpy.asarray([t for t in grptdbs])
+            jd1[loind:hiind] = grptdbs.jd1
+            jd2[loind:hiind] = grptdbs.jd2
+            formats[loind:hiind] = grptdbs.format
+
+        # Both columns are filled from the jd1/jd2 arrays in one step; the
+        # tdb column holds one Time per TOA, as the mjd column does.
+        tdbs = _times_from_arrays(jd1, jd2, ['tdb'] * self.ntoas, formats,
+                                  self.table['obs'])
+        # Same as utils.time_to_longdouble
+        tdblds = numpy.longdouble(jd1 - DJM0) + numpy.longdouble(jd2)
 
         # Now add the new columns to the table
         col_tdb = table.Column(name='tdb', data=tdbs)
-        col_tdbld = table.Column(name='tdbld',
-                data=[utils.time_to_longdouble(t) for t in tdbs])
+        col_tdbld = table.Column(name='tdbld', data=tdblds)
         self.table.add_columns([col_tdb, col_tdbld])
+        self.table_changed()
 
-    def compute_posvels(self, ephem="DE421", planets=False):
+    def compute_posvels(self, ephem="DE421", planets=False, interpolate=False):
         """Compute positions and velocities of the observatories and Earth.
 
         Compute the positions and velocities of the observatory (wrt
@@ -758,6 +869,14 @@ class TOAs(object):
         SSB) for each TOA.  The JPL solar system ephemeris can be set
         using the 'ephem' parameter.  The positions and velocities are
         set with PosVel class instances which have astropy units.
+
+        If interpolate is True, the solar system bodies are interpolated
+        from a grid of ephemeris values kept between calls (see
+        pint.solar_system_ephemerides.PosVelInterpolator), and so is the
+        precession-nutation of the Earth used for the observatory
+        positions (see pint.erfautils.xys00a_interpolated).  This agrees
+        with the direct evaluation to better than a mm and is much faster
+        for large numbers of TOAs, like photon event lists.
         """
         # Record the planets choice for this instance
         self.planets = planets
@@ -799,23 +918,39 @@ class TOAs(object):
             loind, hiind = self.table.groups.indices[ii:ii+2]
             site = get_observatory(obs)
             tdb = time.Time(grp['tdb'],precision=9)
-            ssb_obs = site.posvel(tdb,ephem)
+            if interpolate:
+                bodies = ['sun']
+                if planets:
+                    bodies += ['jupiter', 'saturn', 'venus', 'uranus']
+                with posvel_interpolation(), erfautils.xys_interpolation():
+                    ssb_obs = site.posvel(tdb,ephem)
+                body_pvs = objPosVels_wrt_SSB(bodies, tdb, ephem)
+            else:
+                ssb_obs = site.posvel(tdb,ephem)
+                body_pvs = None
             log.debug("SSB obs pos {0}".format(ssb_obs.pos[:,0]))
             ssb_obs_pos[loind:hiind,:] = ssb_obs.pos.T.to(u.km)
             ssb_obs_vel[loind:hiind,:] = ssb_obs.vel.T.to(u.km/u.s)
-            sun_obs = objPosVel_wrt_SSB('sun',tdb,ephem) - ssb_obs
+            if body_pvs is not None:
+                sun_obs = body_pvs['sun'] - ssb_obs
+            else:
+                sun_obs = objPosVel_wrt_SSB('sun',tdb,ephem) - ssb_obs
             obs_sun_pos[loind:hiind,:] = sun_obs.pos.T.to(u.km)
             if planets:
                 for p in ('jupiter', 'saturn', 'venus', 'uranus'):
                     name = 'obs_'+p+'_pos'
                     dest = p
-                    pv = objPosVel_wrt_SSB(dest,tdb,ephem) - ssb_obs
+                    if body_pvs is not None:
+                        pv = body_pvs[dest] - ssb_obs
+                    else:
+                        pv = objPosVel_wrt_SSB(dest,tdb,ephem) - ssb_obs
                     plan_poss[name][loind:hiind,:] = pv.pos.T.to(u.km)
         cols_to_add = [ssb_obs_pos, ssb_obs_vel, obs_sun_pos]
         if planets:
             cols_to_add += plan_poss.values()
         log.info('Adding columns ' + ' '.join([cc.name for cc in cols_to_add]))
         self.table.add_columns(cols_to_add)
+        self.table_changed()
         #update ephemeris info
         self.ephem = ephem
         self.planets = planets
@@ -836,102 +971,690 @@ class TOAs(object):
             self.toas = tmp.toas
         if hasattr(tmp, 'table'):
             self.table = tmp.table.group_by("obs")
+            if 'flags' in self.table.colnames:
+                # Older pickles have a column with one flags dict per TOA,
+                # which may also hold the clock corrections.
+                flags = [dict(f) for f in self.table['flags']]
+                self.table.remove_column('flags')
+                if ('clkcorr' not in self.table.colnames and
+                    any(['clkcorr' in f for f in flags])):
+                    clkcorr = [f.pop('clkcorr', 0.0*u.s) for f in flags]
+                    self.table.add_column(table.Column(name='clkcorr',
+                        data=u.Quantity(clkcorr).to(u.s).value, unit=u.s))
+                flag_cols = flags_to_columns(flags)
+                if flag_cols:
+                    self.table.add_columns(flag_cols)
         self.commands = tmp.commands
 
+    def save_npz(self, filename, meta=None):
+        """Write the TOA table to a numpy .npz file.
+
+        Unlike pickle(), no astropy objects are stored: the Time columns
+        are written as (jd1, jd2) arrays and all other columns (including
+        the flag columns) as plain (possibly long double) arrays.  Any extra
+        JSON-serializable information can be stored with meta and is
+        returned by read_npz_file().
+
+        Parameters
+        ----------
+        filename : str or file
+            File to write to.  A '.npz' extension is not added.
+        meta : dict, optional
+            Extra information to keep with the table.
+        """
+        arrays = {}
+        columns = []
+        for name in self.table.colnames:
+            col = self.table[name]
+            info = {'name': name}
+            if name in _time_columns:
+                arrays['jd1_' + name] = numpy.array([t.jd1 for t in col])
+                arrays['jd2_' + name] = numpy.array([t.jd2 for t in col])
+                arrays['scale_' + name] = numpy.array([t.scale for t in col],
+                                                      dtype=str)
+                arrays['format_' + name] = numpy.array([t.format for t in col],
+                                                       dtype=str)
+                info['kind'] = 'time'
+            elif col.dtype.kind == 'O':
+                log.debug("Not saving object column {0}".format(name))
+                continue
+            else:
+                arrays['col_' + name] = numpy.asarray(col)
+                info['kind'] = 'array'
+                if col.unit is not None:
+                    info['unit'] = col.unit.to_string()
+                if col.meta:
+                    info['meta'] = dict(col.meta)
+            columns.append(info)
+        state = {'columns': columns,
+                 'table_meta': dict(self.table.meta),
+                 'filename': self.filename,
+                 'commands': self.commands,
+                 'ephem': self.ephem,
+                 'planets': self.planets,
+                 'clock_corr_info': self.clock_corr_info,
+                 'meta': meta if meta is not None else {}}
+        arrays['state'] = numpy.array(json.dumps(state))
+        if hasattr(filename, 'write'):
+            numpy.savez(filename, **arrays)
+        else:
+            with open(filename, 'wb') as f:
+                numpy.savez(f, **arrays)
+
+    def read_npz_file(self, filename):
+        """Read the TOAs from a file written by save_npz().
+
+        Returns the extra information that was stored with the table.
+        """
+        log.info("Reading TOAs from '%s'..." % filename)
+        with numpy.load(filename, allow_pickle=False) as f:
+            state = json.loads(str(f['state']))
+            cols = []
+            for info in state['columns']:
+                name = info['name']
+                if info['kind'] == 'time':
+                    data = _times_from_arrays(f['jd1_' + name],
+                                              f['jd2_' + name],
+                                              f['scale_' + name],
+                                              f['format_' + name],
+                                              f['col_obs'])
+                    cols.append(table.Column(name=name, data=data))
+                else:
+                    cols.append(table.Column(name=name, data=f['col_' + name],
+                                             unit=info.get('unit', None),
+                                             meta=info.get('meta', None)))
+        self.table = table.Table(cols, meta=state['table_meta']).group_by('obs')
+        self.filename = state['filename']
+        self.commands = [(list(c), n) for c, n in state['commands']]
+        self.ephem = state['ephem']
+        self.planets = state['planets']
+        self.clock_corr_info = state['clock_corr_info']
+        return state['meta']
+
     def read_toa_file(self, filename, process_includes=True, top=True):
         """Read the given filename and return a list of TOA objects.
 
         Will process INCLUDEd files unless process_includes is False.
         """
-        ntoas = 0
         if top:
             self.toas = []
             self.commands = []
-            self.cdict = {"EFAC": 1.0, "EQUAD": 0.0*u.us,
-                          "EMIN": 0.0*u.us, "EMAX": numpy.inf*u.us,
-                          "FMIN": 0.0*u.MHz, "FMAX": numpy.inf*u.MHz,
-                          "INFO": None, "SKIP": False,
-                          "TIME": 0.0, "PHASE": 0,
-                          "PHA1": None, "PHA2": None,
-                          "MODE": 1, "JUMP": [False, 0],
-                          "FORMAT": "Unknown", "END": False}
-        with open(filename, "r") as f:
-            for l in f.readlines():
-                MJD, d = parse_TOA_line(l, fmt=self.cdict["FORMAT"])
-                if d["format"] == "Command":
-                    cmd = d["Command"][0]
-                    self.commands.append((d["Command"], ntoas))
-                    if cmd == "SKIP":
-                        self.cdict[cmd] = True
-                        continue
-                    elif cmd == "NOSKIP":
-                        self.cdict["SKIP"] = False
-                        continue
-                    elif cmd == "END":
-                        self.cdict[cmd] = True
-                        break
-                    elif cmd in ("TIME", "PHASE"):
-                        self.cdict[cmd] += float(d["Command"][1])
-                    elif cmd in ("EMIN", "EMAX","EQUAD"):
-                        self.cdict[cmd] = float(d["Command"][1])*u.us
-                    elif cmd in ("FMIN", "FMAX","EQUAD"):
-                        self.cdict[cmd] = float(d["Command"][1])*u.MHz
-                    elif cmd in ("EFAC", \
-                                 "PHA1", "PHA2"):
-                        self.cdict[cmd] = float(d["Command"][1])
-                        if cmd in ("PHA1", "PHA2", "TIME", "PHASE"):
-                            d[cmd] = d["Command"][1]
-                    elif cmd == "INFO":
-                        self.cdict[cmd] = d["Command"][1]
-                        d[cmd] = d["Command"][1]
-                    elif cmd == "FORMAT":
-                        if d["Command"][1] == "1":
-                            self.cdict[cmd] = "Tempo2"
-                    elif cmd == "JUMP":
-                        if self.cdict[cmd][0]:
-                            self.cdict[cmd][0] = False
-                            self.cdict[cmd][1] += 1
-                        else:
-                            self.cdict[cmd][0] = True
-                    elif cmd == "INCLUDE" and process_includes:
-                        # Save FORMAT in a tmp
-                        fmt = self.cdict["FORMAT"]
-                        self.cdict["FORMAT"] = "Unknown"
-                        log.info("Processing included TOA file {0}".format(d["Command"][1]))
-                        self.read_toa_file(d["Command"][1], top=False)
-                        # re-set FORMAT
-                        self.cdict["FORMAT"] = fmt
-                    else:
-                        continue
-                if (self.cdict["SKIP"] or
-                    d["format"] in ("Blank", "Unknown", "Comment", "Command")):
-                    continue
-                elif self.cdict["END"]:
-                    if top:
-                        # Clean up our temporaries used when reading TOAs
-                        del self.cdict
-                    return
-                else:
-                    newtoa = TOA(MJD, **d)
-                    if ((self.cdict["EMIN"] > newtoa.error) or
-                        (self.cdict["EMAX"] < newtoa.error) or
-                        (self.cdict["FMIN"] > newtoa.freq) or
-                        (self.cdict["FMAX"] < newtoa.freq)):
-                        continue
-                    else:
-                        newtoa.error *= self.cdict["EFAC"]
-                        newtoa.error = numpy.hypot(newtoa.error,
-                                                   self.cdict["EQUAD"])
-                        if self.cdict["INFO"]:
-                            newtoa.flags["info"] = self.cdict["INFO"]
-                        if self.cdict["JUMP"][0]:
-                            newtoa.flags["jump"] = self.cdict["JUMP"][1]
-                        if self.cdict["PHASE"] != 0:
-                            newtoa.flags["phase"] = self.cdict["PHASE"]
-                        if self.cdict["TIME"] != 0.0:
-                            newtoa.flags["to"] = self.cdict["TIME"]
-                        self.toas.append(newtoa)
-                        ntoas += 1
-            if top:
-                # Clean up our temporaries used when reading TOAs
-                del self.cdict
+            self.cdict = _new_command_state()
+        for MJD, d in _iter_toa_lines(filename, self.cdict, self.commands,
+                                      process_includes=process_includes):
+            self.toas.append(TOA(MJD, **d))
+        if top:
+            # Clean up our temporaries used when reading TOAs
+            del self.cdict
+
+    def read_toa_file_columnar(self, filename, process_includes=True):
+        """Read the given filename directly into the TOA table.
+
+        This follows exactly the same rules as read_toa_file() (tempo
+        commands, INCLUDEs, error and frequency cuts), but no per-line TOA
+        objects or flag dicts are made: the runs of TOA lines between
+        commands are tokenized into arrays (see _tokenize_toa_lines) and a
+        single array-valued Time is built per observatory.  The 'mjd'
+        column of the table still holds one Time per TOA, as for the
+        other readers.
+        """
+        self.commands = []
+        cdict = _new_command_state()
+        blocks = list(_iter_toa_blocks(filename, cdict, self.commands,
+                                       process_includes=process_includes))
+        cat = lambda k, dtype: numpy.concatenate(
+            [numpy.zeros(0, dtype=dtype)] + [b[k] for b in blocks])
+        self.table = _make_toa_table(cat("mjd_int", numpy.float64),
+                                     cat("mjd_frac", numpy.float64),
+                                     cat("error", numpy.float64),
+                                     cat("freq", numpy.float64),
+                                     cat("obs", str), [],
+                                     filename=filename,
+                                     flag_arrays=_concatenate_flags(blocks))
+
+
+_time_columns = ('mjd', 'tdb')
+
+
+_flag_prefix = 'flag_'
+
+
+def flag_column_name(flag):
+    """Return the name of the TOA table column holding the given flag."""
+    return _flag_prefix + flag
+
+
+def flags_to_columns(flags):
+    """Convert a list of per-TOA flags dicts into typed table columns.
+
+    One column is made per flag name (see flag_column_name).  Flags
+    whose values are all integers or all real numbers get a float64
+    column, with NaN for the TOAs that do not have the flag, and flags
+    given as Quantities keep their unit.  All other flags get a string
+    column, with '' for missing values.  The kind of each flag ('int',
+    'float' or 'str') is kept in the column meta so that flag_dicts() can
+    give back the original values.
+
+    Columns can not be masked here, since astropy would then turn every
+    column of the TOA table into a MaskedColumn.
+    """
+    names = []
+    for f in flags:
+        for k in f:
+            if k not in names:
+                names.append(k)
+    cols = []
+    for name in names:
+        present = [f[name] for f in flags if name in f]
+        unit = None
+        if all([hasattr(v, 'unit') for v in present]):
+            unit = present[0].unit
+            kind = 'float'
+            values = [f[name].to(unit).value if name in f else numpy.nan
+                      for f in flags]
+        elif all([isinstance(v, numbers.Integral) for v in present]):
+            kind = 'int'
+        elif all([isinstance(v, numbers.Real) for v in present]):
+            kind = 'float'
+        else:
+            kind = 'str'
+        if kind == 'str':
+            data = numpy.array([str(f[name]) if name in f else ''
+                                for f in flags], dtype=str)
+        elif unit is not None:
+            data = numpy.array(values, dtype=numpy.float64)
+        else:
+            data = numpy.array([f.get(name, numpy.nan) for f in flags],
+                               dtype=numpy.float64)
+        cols.append(table.Column(name=flag_column_name(name), data=data,
+                                 unit=unit, meta={'flag': name,
+                                                  'kind': kind}))
+    return cols
+
+
+def flag_column(flag, values):
+    """Make the TOA table column of a flag from an array of values.
+
+    values can be a Quantity, and masked entries (if values is a masked
+    array) are stored as missing.  The column follows the same
+    conventions as the ones made by flags_to_columns.
+    """
+    mask = numpy.ma.getmaskarray(values)
+    unit = getattr(values, 'unit', None)
+    data = numpy.ma.getdata(values.value if unit is not None else values)
+    if data.dtype.kind in 'iub':
+        kind = 'int'
+    elif data.dtype.kind == 'f':
+        kind = 'float'
+    else:
+        kind = 'str'
+    if kind == 'str':
+        data = numpy.where(mask, '', data.astype(str))
+    else:
+        data = numpy.where(mask, numpy.nan, data.astype(numpy.float64))
+    return table.Column(name=flag_column_name(flag), data=data, unit=unit,
+                        meta={'flag': flag, 'kind': kind})
+
+
+def flag_values(toa_table, flag):
+    """Return the values of a flag from a TOA table as a masked array.
+
+    Entries of TOAs that do not have the flag are masked; if no TOA has
+    it, everything is masked.
+    """
+    name = flag_column_name(flag)
+    if name not in toa_table.colnames:
+        return numpy.ma.masked_all(len(toa_table))
+    data = numpy.asarray(toa_table[name])
+    if data.dtype.kind in 'US':
+        missing = data == ''
+    else:
+        missing = numpy.isnan(data)
+    return numpy.ma.MaskedArray(data, mask=missing)
+
+
+def flag_dicts(toa_table):
+    """Return the flags of a TOA table as one dict per TOA.
+
+    This is the inverse of flags_to_columns.
+    """
+    dicts = [dict() for ii in range(len(toa_table))]
+    for name in toa_table.colnames:
+        if not name.startswith(_flag_prefix):
+            continue
+        col = toa_table[name]
+        flag = col.meta.get('flag', name[len(_flag_prefix):])
+        kind = col.meta.get('kind', 'str' if col.dtype.kind in 'US'
+                            else 'float')
+        values = flag_values(toa_table, flag)
+        convert = {'int': int, 'float': float, 'str': str}[kind]
+        for d, v, m in zip(dicts, values.data, values.mask):
+            if not m:
+                v = convert(v)
+                d[flag] = v * col.unit if col.unit is not None else v
+    out = numpy.empty(len(dicts), dtype=object)
+    out[:] = dicts
+    return out
+
+
+def _toa_list_from_table(toa_table):
+    """Make a list of TOA objects from a TOA table.
+
+    The TOAs are in the order of the 'index' column, i.e. the order the
+    table was made in, and carry the flags of flag_dicts().
+    """
+    flags = flag_dicts(toa_table)
+    errors = toa_table['error'].quantity
+    freqs = toa_table['freq'].quantity
+    toalist = []
+    for ii in numpy.argsort(toa_table['index'], kind='mergesort'):
+        toalist.append(TOA(toa_table['mjd'][ii], error=errors[ii],
+                           obs=toa_table['obs'][ii], freq=freqs[ii],
+                           **flags[ii]))
+    return toalist
+
+
+def _times_to_array(times):
+    """Join scalar Times of one scale and format into an array-valued Time.
+
+    The Time is built from the jd1/jd2 arrays, and each time keeps its own
+    location, since moving observatories have a different one per TOA.
+    """
+    first = times[0]
+    jd1 = numpy.array([t.jd1 for t in times])
+    jd2 = numpy.array([t.jd2 for t in times])
+    location = first.location
+    if location is not None:
+        unit = location.x.unit
+        xyz = numpy.array([[t.location.x.to(unit).value,
+                            t.location.y.to(unit).value,
+                            t.location.z.to(unit).value] for t in times])
+        if numpy.any(xyz != xyz[0]):
+            location = EarthLocation.from_geocentric(xyz[:, 0], xyz[:, 1],
+                                                     xyz[:, 2], unit=unit)
+    t = time.Time(jd1, jd2, format='jd', scale=first.scale,
+                  location=location, precision=first.precision)
+    t.format = first.format
+    return t
+
+
+def _times_from_arrays(jd1, jd2, scales, formats, obss):
+    """Rebuild an object array of Time from (jd1, jd2) arrays.
+
+    One Time is made for each combination of observatory, scale and
+    format, with the observatory location attached as in the TOA class.
+    """
+    out = numpy.empty(len(jd1), dtype=object)
+    keys = numpy.array([o + ':' + s + ':' + f for o, s, f in
+                        zip(obss, scales, formats)], dtype=str)
+    for key in numpy.unique(keys):
+        idx = numpy.flatnonzero(keys == key)
+        obs, scale, fmt = key.rsplit(':', 2)
+        t = time.Time(jd1[idx], jd2[idx], format='jd', scale=scale,
+                      precision=9)
+        loc = get_observatory(obs).earth_location_itrf(time=t)
+        t = time.Time(t, location=loc, precision=9)
+        t.format = fmt
+        for jj, tt in zip(idx, t):
+            out[jj] = tt
+    return out
+
+
+def _new_command_state():
+    """Return the initial tempo command state used when reading TOA files."""
+    return {"EFAC": 1.0, "EQUAD": 0.0*u.us,
+            "EMIN": 0.0*u.us, "EMAX": numpy.inf*u.us,
+            "FMIN": 0.0*u.MHz, "FMAX": numpy.inf*u.MHz,
+            "INFO": None, "SKIP": False,
+            "TIME": 0.0, "PHASE": 0,
+            "PHA1": None, "PHA2": None,
+            "MODE": 1, "JUMP": [False, 0],
+            "FORMAT": "Unknown", "END": False}
+
+
+def _apply_toa_command(fields, cdict):
+    """Update the reading state cdict for a tempo command line.
+
+    fields is the split command line.  INCLUDE is left to the caller.
+    Returns False if reading has to stop (END), True otherwise.
+    """
+    cmd = fields[0]
+    if cmd == "SKIP":
+        cdict[cmd] = True
+    elif cmd == "NOSKIP":
+        cdict["SKIP"] = False
+    elif cmd == "END":
+        cdict[cmd] = True
+        return False
+    elif cmd in ("TIME", "PHASE"):
+        cdict[cmd] += float(fields[1])
+    elif cmd in ("EMIN", "EMAX", "EQUAD"):
+        cdict[cmd] = float(fields[1])*u.us
+    elif cmd in ("FMIN", "FMAX"):
+        cdict[cmd] = float(fields[1])*u.MHz
+    elif cmd in ("EFAC", "PHA1", "PHA2"):
+        cdict[cmd] = float(fields[1])
+    elif cmd == "INFO":
+        cdict[cmd] = fields[1]
+    elif cmd == "FORMAT":
+        if fields[1] == "1":
+            cdict[cmd] = "Tempo2"
+    elif cmd == "JUMP":
+        if cdict[cmd][0]:
+            cdict[cmd][0] = False
+            cdict[cmd][1] += 1
+        else:
+            cdict[cmd][0] = True
+    return True
+
+
+def _iter_toa_lines(filename, cdict, commands, process_includes=True):
+    """Walk a TOA file and yield (MJD, dict) for every TOA that is kept.
+
+    The tempo commands are processed as they are found, updating cdict
+    and appending to the commands list.  The yielded dict is ready to be
+    passed on as TOA(MJD, **d): the error (us) already has EFAC and EQUAD
+    applied and the INFO/JUMP/PHASE/TIME state is added as flags.
+    """
+    ntoas = 0
+    with open(filename, "r") as f:
+        lines = f.readlines()
+    for l in lines:
+        MJD, d = parse_TOA_line(l, fmt=cdict["FORMAT"])
+        if d["format"] == "Command":
+            commands.append((d["Command"], ntoas))
+            if d["Command"][0] == "INCLUDE":
+                if process_includes:
+                    # Save FORMAT in a tmp
+                    fmt = cdict["FORMAT"]
+                    cdict["FORMAT"] = "Unknown"
+                    log.info("Processing included TOA file {0}".format(d["Command"][1]))
+                    for MJDi, di in _iter_toa_lines(d["Command"][1], cdict,
+                                                    commands):
+                        yield MJDi, di
+                    # re-set FORMAT
+                    cdict["FORMAT"] = fmt
+            elif not _apply_toa_command(d["Command"], cdict):
+                break
+            continue
+        if (cdict["SKIP"] or
+            d["format"] in ("Blank", "Unknown", "Comment")):
+            continue
+        elif cdict["END"]:
+            return
+        else:
+            # Same conventions as the TOA class: error in us, frequency
+            # in MHz with 0 meaning infinite frequency.
+            error = d["error"] * u.us
+            freq = d["freq"] * u.MHz
+            if freq == 0.0*u.MHz:
+                freq = numpy.inf*u.MHz
+            if ((cdict["EMIN"] > error) or
+                (cdict["EMAX"] < error) or
+                (cdict["FMIN"] > freq) or
+                (cdict["FMAX"] < freq)):
+                continue
+            d["error"] = numpy.hypot(error * cdict["EFAC"],
+                                     cdict["EQUAD"]).to(u.us).value
+            if cdict["INFO"]:
+                d["info"] = cdict["INFO"]
+            if cdict["JUMP"][0]:
+                d["jump"] = cdict["JUMP"][1]
+            if cdict["PHASE"] != 0:
+                d["phase"] = cdict["PHASE"]
+            if cdict["TIME"] != 0.0:
+                d["to"] = cdict["TIME"]
+            ntoas += 1
+            yield MJD, d
+
+
+def _iter_toa_blocks(filename, cdict, commands, process_includes=True):
+    """Walk a TOA file and yield the kept TOAs as blocks of arrays.
+
+    This follows the same rules as _iter_toa_lines, but the runs of TOA
+    lines between two commands are collected and tokenized together by
+    _tokenize_toa_lines, which gives the dicts of arrays yielded here.
+    """
+    ntoas = 0
+    with open(filename, "r") as f:
+        lines = f.readlines()
+    block, block_fmt = [], None
+    for l in lines + [None]:
+        fmt = "Command" if l is None else toa_format(l, cdict["FORMAT"])
+        if fmt in ("Blank", "Unknown", "Comment"):
+            continue
+        if fmt in ("Parkes", "ITOA"):
+            raise RuntimeError(
+                "TOA format '%s' not implemented yet" % fmt)
+        is_toa = fmt != "Command" and not cdict["SKIP"]
+        if block and not (is_toa and fmt == block_fmt):
+            arrays = _tokenize_toa_lines(block, block_fmt, cdict)
+            ntoas += len(arrays["mjd_int"])
+            yield arrays
+            block = []
+        if l is None or (is_toa and cdict["END"]):
+            break
+        if is_toa:
+            block.append(l)
+            block_fmt = fmt
+        elif fmt == "Command":
+            fields = l.split()
+            commands.append((fields, ntoas))
+            if fields[0] == "INCLUDE":
+                if process_includes:
+                    fmt = cdict["FORMAT"]
+                    cdict["FORMAT"] = "Unknown"
+                    log.info("Processing included TOA file {0}".format(fields[1]))
+                    for arrays in _iter_toa_blocks(fields[1], cdict,
+                                                   commands):
+                        yield arrays
+                    cdict["FORMAT"] = fmt
+            elif not _apply_toa_command(fields, cdict):
+                break
+
+
+def _parse_flag_tokens(tokens):
+    """Convert the string values of a flag as parse_TOA_line does.
+
+    The values become integers if they all are, else floats if they all
+    are, else strings (numbers written as parse_TOA_line would read them).
+    """
+    tokens = numpy.asarray(tokens, dtype=str)
+    for dtype in (numpy.int64, numpy.float64):
+        try:
+            return tokens.astype(dtype)
+        except (ValueError, OverflowError):
+            pass
+    uniq, inv = numpy.unique(tokens, return_inverse=True)
+    values = []
+    for v in uniq:
+        try:
+            v = str(int(v))
+        except ValueError:
+            try:
+                v = str(float(v))
+            except ValueError:
+                pass
+        values.append(v)
+    return numpy.array(values, dtype=str)[inv]
+
+
+def _floats_or_zero(strings):
+    """Convert strings to floats, with 0.0 for the ones that are not."""
+    try:
+        return numpy.asarray(strings, dtype=str).astype(numpy.float64)
+    except ValueError:
+        out = numpy.zeros(len(strings))
+        for ii, v in enumerate(strings):
+            try:
+                out[ii] = float(v)
+            except ValueError:
+                pass
+        return out
+
+
+def _tokenize_toa_lines(lines, fmt, cdict):
+    """Tokenize a run of TOA lines of one format into arrays.
+
+    The fields are converted a column at a time rather than a line at a
+    time: the MJDs are split into integer and fractional days, the
+    observatory codes are looked up once per code, and each flag becomes
+    one masked array (see _parse_flag_tokens).  The error and frequency
+    cuts, EFAC/EQUAD and the INFO/JUMP/PHASE/TIME flags of the current
+    command state cdict are applied as in _iter_toa_lines.
+
+    Returns a dict with the 'mjd_int', 'mjd_frac', 'error' (us), 'freq'
+    (MHz), 'obs' and 'flags' (name to masked array) of the kept TOAs.
+    """
+    n = len(lines)
+    flags = {"format": numpy.repeat(fmt, n)}
+    if fmt == "Princeton":
+        codes = numpy.array([l[0].upper() for l in lines], dtype=str)
+        freqs = numpy.array([l[15:24] for l in lines], dtype=str)
+        mjds = numpy.array([l[24:44] for l in lines], dtype=str)
+        errors = numpy.array([l[44:53] for l in lines], dtype=str)
+        flags["ddm"] = _floats_or_zero([l[68:78] for l in lines])
+    else:
+        fields = [l.split() for l in lines]
+        names, freqs, mjds, errors, codes = \
+            [numpy.array(c, dtype=str) for c in
+             zip(*[f[:5] for f in fields])]
+        codes = numpy.char.upper(codes)
+        flags["name"] = names
+        # Gather the values of each flag with the lines they are on
+        tokens = {}
+        for ii, f in enumerate(fields):
+            for k, v in zip(f[5::2], f[6::2]):
+                tokens.setdefault(k.lstrip('-'), ([], []))
+                tokens[k.lstrip('-')][0].append(ii)
+                tokens[k.lstrip('-')][1].append(v)
+        for k, (idx, values) in tokens.items():
+            values = _parse_flag_tokens(values)
+            flag = numpy.ma.masked_all(n, dtype=values.dtype)
+            flag[idx] = values
+            flags[k] = flag
+    mjd_parts = numpy.char.partition(numpy.char.strip(mjds), '.')
+    mjd_int = mjd_parts[:, 0].astype(numpy.float64)
+    mjd_frac = numpy.char.add('0.', mjd_parts[:, 2]).astype(numpy.float64)
+    errors = errors.astype(numpy.float64)
+    freqs = freqs.astype(numpy.float64)
+    freqs[freqs == 0.0] = numpy.inf
+    obss = numpy.empty(n, dtype=object)
+    for code in numpy.unique(codes):
+        obss[codes == code] = get_obs(code)
+
+    keep = ~((cdict["EMIN"].to(u.us).value > errors) |
+             (cdict["EMAX"].to(u.us).value < errors) |
+             (cdict["FMIN"].to(u.MHz).value > freqs) |
+             (cdict["FMAX"].to(u.MHz).value < freqs))
+    if cdict["INFO"]:
+        flags["info"] = numpy.repeat(cdict["INFO"], n)
+    if cdict["JUMP"][0]:
+        flags["jump"] = numpy.repeat(cdict["JUMP"][1], n)
+    if cdict["PHASE"] != 0:
+        flags["phase"] = numpy.repeat(float(cdict["PHASE"]), n)
+    if cdict["TIME"] != 0.0:
+        flags["to"] = numpy.repeat(float(cdict["TIME"]), n)
+    return {"mjd_int": mjd_int[keep], "mjd_frac": mjd_frac[keep],
+            "error": numpy.hypot(errors[keep] * cdict["EFAC"],
+                                 cdict["EQUAD"].to(u.us).value),
+            "freq": freqs[keep],
+            "obs": obss[keep].astype(str),
+            "flags": dict((k, numpy.ma.asarray(v)[keep])
+                          for k, v in flags.items())}
+
+
+def _concatenate_flags(blocks):
+    """Join the flag arrays of blocks from _tokenize_toa_lines.
+
+    TOAs of blocks without a flag get masked values.  A flag that is a
+    string in any block becomes a string everywhere, as in
+    flags_to_columns.
+    """
+    names = []
+    for b in blocks:
+        for k in b["flags"]:
+            if k not in names:
+                names.append(k)
+    flag_arrays = {}
+    for name in names:
+        parts = [b["flags"].get(name) for b in blocks]
+        if any(p is not None and p.dtype.kind in 'US' for p in parts):
+            dtype = str
+        elif any(p is not None and p.dtype.kind == 'f' for p in parts):
+            dtype = numpy.float64
+        else:
+            dtype = numpy.int64
+        parts = [numpy.ma.masked_all(len(b["mjd_int"]), dtype=dtype)
+                 if p is None else p.astype(dtype)
+                 for b, p in zip(blocks, parts)]
+        flag_arrays[name] = numpy.ma.concatenate(parts)
+    return flag_arrays
+
+
+def _make_toa_table(mjd1, mjd2, errors, freqs, obss, flags, scale=None,
+                    filename=None, flag_arrays=None):
+    """Build a TOA table straight from arrays.
+
+    Parameters
+    ----------
+    mjd1, mjd2 : numpy.ndarray
+        The two parts of the MJD of each TOA (usually the integer and the
+        fractional day).
+    errors : numpy.ndarray
+        TOA uncertainties in us.
+    freqs : numpy.ndarray
+        Observing frequencies in MHz (0 means infinite frequency).
+    obss : numpy.ndarray
+        Observatory names or codes.
+    flags : list of dict
+        The flags of each TOA.
+    scale : str, optional
+        Time scale of the MJDs.  Defaults to the timescale of each site.
+    filename : str, optional
+        Stored in the table metadata.
+    flag_arrays : dict, optional
+        Flags given as one array (or Quantity) of values per flag name,
+        added to the table with flag_column().  This avoids making a dict
+        per TOA when all the TOAs have the same flags (e.g. photons).
+
+    Returns
+    -------
+    astropy.table.Table
+        A table with the same columns as the one made by TOAs() from a
+        list of TOA objects, grouped by observatory.
+    """
+    ntoas = len(mjd1)
+    freqs = numpy.where(freqs == 0.0, numpy.inf, freqs)
+    obss = numpy.asarray(obss)
+    site_names = numpy.empty(ntoas, dtype=object)
+    mjds = numpy.empty(ntoas, dtype=object)
+    mjd_float = numpy.zeros(ntoas, dtype=numpy.float64)
+    for obs in numpy.unique(obss):
+        idx = numpy.flatnonzero(obss == obs)
+        site = get_observatory(obs)
+        grpscale = site.timescale if scale is None else scale
+        # Note that when scale is UTC, must use pulsar_mjd format!
+        fmt = 'pulsar_mjd' if grpscale.lower() == 'utc' else 'mjd'
+        t = time.Time(mjd1[idx], mjd2[idx], scale=grpscale, format=fmt,
+                      precision=9)
+        loc = site.earth_location_itrf(time=t)
+        t = time.Time(t, location=loc, precision=9)
+        mjd_float[idx] = t.mjd
+        site_names[idx] = site.name
+        # The mjd column holds one Time per TOA, like the TOA list path
+        for jj, tt in zip(idx, t):
+            mjds[jj] = tt
+    tbl = table.Table([numpy.arange(ntoas), mjds, mjd_float * u.day,
+                       errors * u.us, freqs * u.MHz,
+                       numpy.array(site_names, dtype=str)],
+                      names=("index", "mjd", "mjd_float", "error",
+                             "freq", "obs"),
+                      meta={'filename':filename})
+    flag_cols = flags_to_columns(flags)
+    if flag_arrays is not None:
+        for flag in sorted(flag_arrays):
+            flag_cols.append(flag_column(flag, flag_arrays[flag]))
+    if flag_cols:
+        tbl.add_columns(flag_cols)
+    return tbl.group_by("obs")
@@ -0,0 +1,198 @@
+"""Content-addressed cache of prepared TOAs.
+
+Preparing TOAs from a '.tim' file (clock corrections, TDBs, observatory
+positions and velocities) is expensive, so get_TOAs(usecache=True) keeps
+the result in a cache directory.  The cache key is a hash of the contents
+of the '.tim' file and all files it INCLUDEs, together with the options
+used for the preparation (ephemeris, clock options, TDB method...).  The
+clock files that were used are recorded in each entry and checked when the
+entry is loaded, so an updated clock file also invalidates the cache.
+
+Entries are stored with TOAs.save_npz() and evicted least-recently-used
+first once the cache directory grows beyond a given size, so a single
+directory can be shared between users and processes.
+"""
+from __future__ import absolute_import, print_function, division
+import os
+import hashlib
+import json
+import numpy
+from astropy import log
+from .config import cachepath
+from .observatory import get_observatory
+
+__all__ = ['TOACache', 'toa_cache_key', 'tim_file_dependencies']
+
+# Bump this when the layout of the cached tables changes
+CACHE_FORMAT_VERSION = 2
+
+# Default maximum total size of the cache directory, in bytes
+DEFAULT_MAX_SIZE = 2 * 1024**3
+
+
+def _file_digest(filename):
+    """Return the SHA1 hex digest of the contents of a file."""
+    h = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def tim_file_dependencies(timfile):
+    """Return the list of files read when loading a '.tim' file.
+
+    The list starts with timfile itself, followed by every INCLUDEd
+    file (recursively) in the order they are found.  INCLUDE paths are
+    taken relative to the current directory, as in TOAs.read_toa_file().
+    """
+    files = [timfile]
+    with open(timfile, 'r') as f:
+        for l in f:
+            if l.startswith('INCLUDE'):
+                fields = l.split()
+                if len(fields) > 1:
+                    files.extend(tim_file_dependencies(fields[1]))
+    return files
+
+
+def toa_cache_key(timfile, **options):
+    """Compute the cache key for the TOAs prepared from timfile.
+
+    The key is a SHA1 hash of the contents of timfile and of all the
+    files it INCLUDEs, together with the preparation options (any
+    JSON-serializable keyword arguments).
+    """
+    h = hashlib.sha1()
+    h.update(('pint-toa-cache-%d\n' % CACHE_FORMAT_VERSION).encode())
+    for fn in tim_file_dependencies(timfile):
+        h.update(_file_digest(fn).encode())
+    h.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def _clock_files(toas):
+    """Return the clock files used for the clock corrections of toas."""
+    files = []
+    for obs in sorted(toas.observatories):
+        site = get_observatory(obs, **toas.clock_corr_info)
+        for attr in ('_clock', '_gps_clock', '_bipm_clock'):
+            clk = getattr(site, attr, None)
+            if clk is not None and clk.filename not in files:
+                files.append(clk.filename)
+    return files
+
+
+class TOACache(object):
+    """A directory of prepared TOA tables, indexed by toa_cache_key().
+
+    Parameters
+    ----------
+    cachedir : str, optional
+        The cache directory.  Defaults to the 'toas' directory in the
+        PINT user cache directory (see pint.config.cachepath).
+    max_size : int, optional
+        Maximum total size, in bytes, of the cache files.  The least
+        recently used entries are removed when this is exceeded.
+    """
+    def __init__(self, cachedir=None, max_size=DEFAULT_MAX_SIZE):
+        if cachedir is None:
+            cachedir = cachepath('toas')
+        elif not os.path.isdir(cachedir):
+            os.makedirs(cachedir)
+        self.cachedir = cachedir
+        self.max_size = max_size
+
+    def path(self, key):
+        """Return the file name of the cache entry for key."""
+        return os.path.join(self.cachedir, key + '.npz')
+
+    def load(self, key):
+        """Return the TOAs cached under key, or None.
+
+        Entries whose clock files have changed (or disappeared) since
+        they were written are removed and None is returned.
+        """
+        from .toa import TOAs
+        fn = self.path(key)
+        if not os.path.isfile(fn):
+            return None
+        try:
+            with numpy.load(fn, allow_pickle=False) as f:
+                meta = json.loads(str(f['state']))['meta']
+            for fname, digest in meta.get('clock_files', []):
+                if not os.path.isfile(fname) or _file_digest(fname) != digest:
+                    log.info("Clock file {0} changed, discarding cached "
+                             "TOAs".format(fname))
+                    self._remove(fn)
+                    return None
+            t = TOAs(fn)
+        except Exception as e:
+            log.warn("Unable to read TOA cache file {0}: {1}".format(fn, e))
+            self._remove(fn)
+            return None
+        # Mark as recently used for the eviction
+        try:
+            os.utime(fn, None)
+        except OSError:
+            pass
+        log.info("Using cached TOAs from {0}".format(fn))
+        return t
+
+    def store(self, key, toas):
+        """Write toas to the cache under key and apply the size limit."""
+        clock_files = [(fn, _file_digest(fn)) for fn in _clock_files(toas)]
+        fn = self.path(key)
+        # Write to a temporary file and rename it, so that other processes
+        # sharing the directory never see a partial entry.
+        tmp = '{0}.{1}.tmp'.format(fn, os.getpid())
+        toas.save_npz(tmp, meta={'clock_files': clock_files})
+        try:
+            os.rename(tmp, fn)
+        except OSError:
+            # On Windows rename fails if the entry exists, e.g. written
+            # meanwhile by another process; replace it.
+            self._remove(fn)
+            try:
+                os.rename(tmp, fn)
+            except OSError as e:
+                log.warn("Unable to write TOA cache file {0}: {1}".format(
+                    fn, e))
+                self._remove(tmp)
+                return
+        log.info("Cached TOAs in {0}".format(fn))
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_size."""
+        entries = []
+        for fn in os.listdir(self.cachedir):
+            if not fn.endswith('.npz'):
+                continue
+            full = os.path.join(self.cachedir, fn)
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, full))
+        total = sum(e[1] for e in entries)
+        for mtime, size, full in sorted(entries):
+            if total <= self.max_size:
+                break
+            log.info("Removing TOA cache file {0}".format(full))
+            self._remove(full)
+            total -= size
+
+    def clear(self):
+        """Remove all the entries of the cache."""
+        for fn in os.listdir(self.cachedir):
+            if fn.endswith('.npz'):
+                self._remove(os.path.join(self.cachedir, fn))
+
+    @staticmethod
+    def _remove(fn):
+        try:
+            os.remove(fn)
+        except OSError:
+            # Already removed by another process
+            pass
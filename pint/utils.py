@@ -296,6 +296,19 @@ def has_astropy_unit(x):
     return hasattr(x, 'unit') and isinstance(x.unit, u.core.UnitBase)
 
 
+def column_value(col, unit):
+    """Return the data of a table column (or Quantity) as a plain array in unit.
+
+    No Quantity is built for the column, and the data is only scaled when
+    it is not already in the requested unit.
+    """
+    col_unit = getattr(col, 'unit', None)
+    data = np.asarray(col)
+    if col_unit is None or col_unit == unit:
+        return data
+    return data * u.Unit(col_unit).to(unit)
+
+
 def longdouble2string(x):
     """Convert numpy longdouble to string"""
     return repr(x)
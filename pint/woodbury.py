@@ -0,0 +1,163 @@
+"""TOA covariance matrices stored as a diagonal plus low-rank terms.
+
+The noise models give the TOA covariance as
+
+    C = N + sum_i U_i diag(phi_i) U_i^T
+
+with N the diagonal of the (scaled) TOA variances and U_i the basis
+matrices of the correlated noise (ECORR quantization matrices, Fourier
+bases for red noise...).  WoodburyCovariance solves linear systems with C
+and computes its log-determinant with the Woodbury identity, without ever
+forming an ntoa x ntoa matrix.
+
+Bases whose columns have disjoint supports, like the ECORR quantization
+matrices, make N + U diag(phi) U^T block diagonal with one rank-1 block per
+column.  These are inverted exactly with the Sherman-Morrison formula at a
+cost linear in the number of TOAs.  The remaining bases are stacked into a
+single matrix F and handled with the Woodbury identity, which needs the
+Cholesky factorization of a (nbasis x nbasis) matrix only.
+"""
+from __future__ import absolute_import, print_function, division
+import numpy as np
+import scipy.linalg as sl
+import scipy.sparse as sps
+
+__all__ = ['WoodburyCovariance', 'has_disjoint_columns']
+
+
+def has_disjoint_columns(U):
+    """Return True if no row of U has more than one non-zero element."""
+    return np.all(np.count_nonzero(U, axis=1) <= 1)
+
+
+class WoodburyCovariance(object):
+    """A covariance matrix N + sum_i U_i diag(phi_i) U_i^T.
+
+    Parameters
+    ----------
+    Nvec : array
+        The diagonal N, e.g. the squared scaled TOA uncertainties.
+    """
+    def __init__(self, Nvec):
+        self.Nvec = np.asarray(Nvec, dtype=np.float64)
+        self.ntoas = len(self.Nvec)
+        # Sherman-Morrison part: column and value of each TOA in the
+        # disjoint bases (column -1 for TOAs in none of them)
+        self._epoch_col = -np.ones(self.ntoas, dtype=int)
+        self._epoch_val = np.zeros(self.ntoas)
+        self._epoch_phi = np.zeros(0)
+        # Woodbury part
+        self._F = np.zeros((self.ntoas, 0))
+        self._phi = np.zeros(0)
+        self._factor = None
+
+    def add_basis(self, U, phi):
+        """Add the term U diag(phi) U^T to the covariance.
+
+        U is taken in the block diagonal (Sherman-Morrison) part if its
+        columns have disjoint supports that do not overlap the ones added
+        before, and in the low-rank (Woodbury) part otherwise.  U may be a
+        scipy.sparse matrix.
+        """
+        phi = np.asarray(phi, dtype=np.float64)
+        if sps.issparse(U):
+            Uc = U.tocoo()
+            Uc.eliminate_zeros()
+            rows, cols, vals = Uc.row, Uc.col, Uc.data
+            if len(np.unique(rows)) == len(rows) and \
+                    np.all(self._epoch_col[rows] < 0):
+                self.add_epochs(rows, cols, vals, phi)
+                return
+            U = U.toarray()
+        U = np.asarray(U, dtype=np.float64)
+        if has_disjoint_columns(U):
+            rows, cols = np.nonzero(U)
+            if np.all(self._epoch_col[rows] < 0):
+                self.add_epochs(rows, cols, U[rows, cols], phi)
+                return
+        self._F = np.hstack((self._F, U))
+        self._phi = np.concatenate((self._phi, phi))
+        self._factor = None
+
+    def add_epochs(self, rows, cols, vals, phi):
+        """Add a basis with disjoint columns given as sparse entries.
+
+        rows[k], cols[k] and vals[k] are the row, column and value of the
+        non-zero elements of the basis, every row appearing at most once;
+        phi has one weight per column.
+        """
+        rows = np.asarray(rows, dtype=int)
+        if np.any(self._epoch_col[rows] >= 0):
+            raise ValueError("The epochs overlap the ones already added.")
+        self._epoch_col[rows] = np.asarray(cols, dtype=int) + \
+            len(self._epoch_phi)
+        self._epoch_val[rows] = vals
+        self._epoch_phi = np.concatenate((self._epoch_phi,
+                                          np.asarray(phi, dtype=np.float64)))
+        self._factor = None
+
+    def _epoch_matrix(self):
+        """The disjoint bases as a sparse (ntoas x nepochs) matrix."""
+        rows = np.nonzero(self._epoch_col >= 0)[0]
+        return sps.csr_matrix((self._epoch_val[rows],
+                               (rows, self._epoch_col[rows])),
+                              shape=(self.ntoas, len(self._epoch_phi)))
+
+    def _setup(self):
+        if self._factor is not None:
+            return
+        Ninv = 1.0 / self.Nvec
+        Us = self._epoch_matrix()
+        # Sherman-Morrison for each epoch: s_k = u_k^T N^-1 u_k
+        s = Us.multiply(Us).T.dot(Ninv)
+        g = self._epoch_phi / (1.0 + self._epoch_phi * s)
+        self._Us, self._Ninv, self._g = Us, Ninv, g
+        self._logdet_D = np.sum(np.log(self.Nvec)) + \
+            np.sum(np.log1p(self._epoch_phi * s))
+        # Woodbury for the remaining bases:
+        # Sigma = phi^-1 + F^T D^-1 F
+        if len(self._phi):
+            DinvF = self._solve_D(self._F)
+            Sigma = np.dot(self._F.T, DinvF)
+            Sigma[np.diag_indices_from(Sigma)] += 1.0 / self._phi
+            self._DinvF = DinvF
+            self._cf = sl.cho_factor(Sigma)
+            self._logdet_Sigma = 2 * np.sum(np.log(np.diag(self._cf[0])))
+        self._factor = True
+
+    def _solve_D(self, x):
+        """Solve with the diagonal plus disjoint bases part of C."""
+        Ninv = self._Ninv if x.ndim == 1 else self._Ninv[:, None]
+        Nx = Ninv * x
+        if self._Us.shape[1] == 0:
+            return Nx
+        a = self._Us.T.dot(Nx)
+        a = a * (self._g if x.ndim == 1 else self._g[:, None])
+        return Nx - Ninv * self._Us.dot(a)
+
+    def solve(self, x):
+        """Return C^-1 x, x being a vector or a (ntoas x k) matrix."""
+        self._setup()
+        x = np.asarray(x, dtype=np.float64)
+        y = self._solve_D(x)
+        if len(self._phi):
+            # F^T D^-1 x = (D^-1 F)^T x since D is symmetric
+            y = y - np.dot(self._DinvF,
+                           sl.cho_solve(self._cf, np.dot(self._DinvF.T, x)))
+        return y
+
+    def logdet(self):
+        """Return log(det(C))."""
+        self._setup()
+        result = self._logdet_D
+        if len(self._phi):
+            result += self._logdet_Sigma + np.sum(np.log(self._phi))
+        return result
+
+    def todense(self):
+        """Return C as a dense matrix, mostly for testing."""
+        Us = self._epoch_matrix().toarray()
+        C = np.diag(self.Nvec)
+        C += np.dot(Us * self._epoch_phi[None, :], Us.T)
+        C += np.dot(self._F * self._phi[None, :], self._F.T)
+        return C
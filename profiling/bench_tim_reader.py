@@ -0,0 +1,54 @@
+"""Compare the time needed to read a .tim file with the TOA-object reader
+and with the columnar reader.
+
+Usage: python bench_tim_reader.py [timfile] [--repeat N]
+
+If no file is given, the NANOGrav 9-year B1855+09 TOAs from the test data
+are used.
+"""
+from __future__ import print_function, division
+import argparse
+import os
+import time
+
+import numpy as np
+import astropy.units as u
+import pint.toa as toa
+
+datadir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                       'tests', 'datafile')
+
+
+def time_reader(timfile, columnar, repeat):
+    best = np.inf
+    for ii in range(repeat):
+        t0 = time.time()
+        t = toa.TOAs(timfile, columnar=columnar)
+        best = min(best, time.time() - t0)
+    return best, t
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the .tim readers.")
+    parser.add_argument("timfile", nargs='?',
+                        default=os.path.join(datadir,
+                                             "B1855+09_NANOGrav_9yv1.tim"))
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of runs of each reader (best is kept)")
+    args = parser.parse_args()
+
+    # Load the clock and observatory information once, outside the timing
+    toa.TOAs(args.timfile, columnar=True)
+
+    t_old, old = time_reader(args.timfile, False, args.repeat)
+    t_new, new = time_reader(args.timfile, True, args.repeat)
+    old.table.sort('index')
+    new.table.sort('index')
+    dt = np.array([(a - b).to(u.ns).value
+                   for a, b in zip(old.table['mjd'], new.table['mjd'])])
+    print("File: {0} ({1} TOAs)".format(args.timfile, new.ntoas))
+    print("TOA object reader: {0:.3f} s".format(t_old))
+    print("Columnar reader:   {0:.3f} s".format(t_new))
+    print("Speedup:           {0:.1f}x".format(t_old / t_new))
+    print("Max |MJD difference|: {0:.3g} ns".format(np.abs(dt).max()
+                                                     if len(dt) else 0.0))
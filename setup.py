@@ -87,6 +87,7 @@ cmdclass.update(versioneer.get_cmdclass())
 console_scripts = [ 'photonphase=pint.scripts.photonphase:main',
                     'event_optimize=pint.scripts.event_optimize:main',
                     'pintempo=pint.scripts.pintempo:main', 
+                    'pintbatch=pint.scripts.pintbatch:main', 
                     'zima=pint.scripts.zima:main', 
                     'pintbary=pint.scripts.pintbary:main', 
                     'fermiphase=pint.scripts.fermiphase:main' ]
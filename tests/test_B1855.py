@@ -52,5 +52,33 @@ class TestB1855(unittest.TestCase):
             else:
                 continue
 
+    def test_delay_cache(self):
+        m = self.modelB1855
+        t = self.toasB1855.table
+        m.clear_delay_cache()
+        d0 = m.delay(t)
+        dm_cache = m._delay_cache[list(m._delay_cache.keys())[-1]]
+        astrometry = dm_cache['AstrometryEquatorial'][1]
+        # Spin parameters do not change any delay
+        f0 = m.F0.value
+        m.F0.value = f0 * (1 + 1e-9)
+        assert np.all(m.delay(t) == d0)
+        assert dm_cache['AstrometryEquatorial'][1] is astrometry
+        m.F0.value = f0
+        # Changing DM recomputes the dispersion and the binary delays only
+        dm = m.DM.value
+        m.DM.value = dm + 1e-3
+        d1 = m.delay(t)
+        assert dm_cache['AstrometryEquatorial'][1] is astrometry
+        m.use_delay_cache = False
+        try:
+            assert np.all(d1 == m.delay(t))
+        finally:
+            m.use_delay_cache = True
+            m.DM.value = dm
+        assert np.all(m.delay(t) == d0)
+    def test_unitless_funcs(self):
+        tdu.check_unitless_funcs(self.modelB1855, self.toasB1855.table)
+
 if __name__ == '__main__':
     pass
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+from __future__ import division, print_function
+import os
+import unittest
+import pint.batch
+from pinttestdata import testdir, datadir
+
+parfile = os.path.join(datadir, 'NGC6440E.par')
+timfile = os.path.join(datadir, 'NGC6440E.tim')
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_fit_pulsars(self):
+        pairs = [(parfile, timfile), (parfile, 'no_such_file.tim')]
+        for processes in (1, 2):
+            results = list(pint.batch.fit_pulsars(pairs, processes=processes,
+                                                  fitter='wls'))
+            self.assertEqual(len(results), 2)
+            res = dict((r['tim'], r) for r in results)
+            ok = res[timfile]
+            self.assertIsNone(ok['error'])
+            self.assertTrue(ok['rms'] < 34.0)
+            self.assertTrue('F0' in ok['parfile'])
+            for stage in ('load', 'prepare', 'fit'):
+                self.assertTrue(ok['timings'][stage] >= 0)
+            self.assertIsNotNone(res['no_such_file.tim']['error'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Tests of the binary delay Jacobian block"""
+import pint.models.model_builder as mb
+import pint.toa as toa
+import astropy.units as u
+import numpy as np
+import os, unittest
+
+from pinttestdata import testdir, datadir
+
+os.chdir(datadir)
+
+class TestBinaryJacobian(unittest.TestCase):
+    """Compare the derivatives computed together with the ones computed
+    one parameter at a time."""
+    @classmethod
+    def setUpClass(self):
+        self.cases = [
+            ('B1855+09_NANOGrav_dfg+12_modified_DD.par',
+             'B1855+09_NANOGrav_dfg+12.tim', 'DE405'),
+            ('B1953+29_NANOGrav_dfg+12_TAI_FB90.par',
+             'B1953+29_NANOGrav_dfg+12.tim', 'DE405'),
+            ('J0613-0200_NANOGrav_dfg+12_TAI_FB90.par',
+             'J0613-0200_NANOGrav_dfg+12.tim', 'DE405'),
+            ('J1853+1303_NANOGrav_11yv0.gls.par',
+             'J1853+1303_NANOGrav_11yv0.tim', 'DE421'),
+            ('J1713+0747_NANOGrav_11yv0.gls.par',
+             'J1713+0747_NANOGrav_11yv0_short.tim', 'DE421')]
+
+    def test_jacobian_block(self):
+        for par, tim, ephem in self.cases:
+            m = mb.get_model(par)
+            t = toa.get_TOAs(tim, ephem=ephem, planets=False)
+            binary = [c for c in m.DelayComponent_list
+                      if hasattr(c, 'binary_instance')][0]
+            acc_delay = m.delay(t.table, binary.__class__.__name__, False)
+            params = [p for p in binary.params
+                      if p in binary.deriv_funcs and
+                      getattr(m, p).value is not None]
+            block = binary.d_delay_d_params(t.table, params, acc_delay)
+            for p in params:
+                single = binary.d_binary_delay_d_xxxx(t.table, p, acc_delay)
+                msg = "{0} derivative mismatch for {1}".format(p, par)
+                assert single.unit == block[p].unit, msg
+                assert np.allclose(block[p].value, single.value, rtol=1e-12,
+                                   atol=0), msg
+            assert binary.binary_instance._memo is None
+
+if __name__ == '__main__':
+    unittest.main()
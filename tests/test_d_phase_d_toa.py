@@ -4,6 +4,9 @@ import pint.toa as toa
 import numpy as np
 import pint.utils as ut
 import os, unittest
+import copy
+import astropy.units as u
+import astropy.time as time
 from pinttestdata import testdir, datadir
 os.chdir(datadir)
 
@@ -26,5 +29,19 @@ class TestD_phase_d_toa(unittest.TestCase):
         diff = pint_d_phase_d_toa.value - tempo_d_phase_d_toa
         relative_diff = diff/tempo_d_phase_d_toa
         assert np.all(relative_diff < 1e-8), 'd_phae_d_toa test filed.'
+
+    def test_finite_difference(self):
+        pint_d_phase_d_toa = self.modelB1855.d_phase_d_toa(self.toasB1855)
+        ts = copy.deepcopy(self.toasB1855)
+        h = 1.0 * u.s
+        ts.adjust_TOAs(time.TimeDelta([-h.value] * ts.ntoas * u.s))
+        phase0 = self.modelB1855.phase(ts.table)
+        ts.adjust_TOAs(time.TimeDelta([2 * h.value] * ts.ntoas * u.s))
+        phase1 = self.modelB1855.phase(ts.table)
+        dp = phase1 - phase0
+        fd = (dp.int + dp.frac).value / (2 * h.value)
+        relative_diff = (pint_d_phase_d_toa.value - fd) / fd
+        assert np.all(np.abs(relative_diff) < 1e-8)
+
 if __name__ == '__main__':
     pass
@@ -1,5 +1,7 @@
 import pint.models.parameter as pa
 import astropy.units as u
+import numpy as np
+from pint import dimensionless_cycles
 
 def num_diff_phase(toas, pint_param, model, h=None):
     par = getattr(model, pint_param)
@@ -79,3 +81,22 @@ def get_derivative_params(model):
             h = 1e-2
         test_params[p] = h
     return test_params
+
+def check_unitless_funcs(model, toas):
+    """Compare the registered value functions with the Quantity ones."""
+    delay = model.delay(toas)
+    for cp in model.DelayComponent_list:
+        for df in cp.delay_funcs_component:
+            if df.__name__ not in cp.value_funcs:
+                continue
+            d = df(toas, delay).to(u.s).value
+            dv = cp.value_funcs[df.__name__](toas, delay.to(u.s).value)
+            assert np.abs(d - dv).max() < 1e-12, df.__name__
+    for cp in model.PhaseComponent_list:
+        for pf in cp.phase_funcs_component:
+            if pf.__name__ not in cp.value_funcs:
+                continue
+            with u.set_enabled_equivalencies(dimensionless_cycles):
+                ph = pf(toas, delay).to(u.cycle).value
+            phv = cp.value_funcs[pf.__name__](toas, delay.to(u.s).value)
+            assert np.abs(ph - phv).max() < 1e-9, pf.__name__
@@ -44,6 +44,19 @@ class TestDMX(unittest.TestCase):
                 tol = 1e-3
             log.debug( "derivative relative diff for %s, %lf"%('d_delay_d_'+p, np.nanmax(relative_diff).value))
             assert np.nanmax(relative_diff) < tol, msg
+    def test_batched_derivatives(self):
+        params = ['DM', 'DMX_0001', 'DMX_0002', 'DMX_0003']
+        batch = self.DMXm.d_delay_d_params(self.toas.table, params)
+        for p in params:
+            single = self.DMXm.d_delay_d_param(self.toas.table, p)
+            assert np.all(batch[p] == single)
+        delay = self.DMXm.delay(self.toas.table)
+        M, pars, units, _ = self.DMXm.designmatrix(self.toas.table)
+        for ii, p in enumerate(pars):
+            if p == 'Offset':
+                continue
+            q = -self.DMXm.d_phase_d_param(self.toas.table, delay, p)
+            assert np.allclose(M[:, ii] * self.DMXm.F0.value, q.value)
 
 if __name__ == '__main__':
     pass
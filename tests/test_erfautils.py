@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+
+import unittest
+import numpy as np
+import astropy.units as u
+import astropy.time as time
+from astropy.coordinates import EarthLocation
+from pint import erfautils
+
+
+class TestXYSInterpolation(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        mjd = np.random.uniform(53000.0, 57000.0, 10000)
+        self.t = time.Time(mjd, scale='utc', format='mjd')
+        self.loc = EarthLocation.from_geocentric(882589.65, -4924872.32,
+                                                 3943729.348, unit=u.m)
+
+    def test_xys(self):
+        tt = self.t.tt
+        X, Y, S = erfautils.erfa.xys00a(tt.jd1, tt.jd2)
+        Xi, Yi, Si = erfautils.xys00a_interpolated(tt.jd1, tt.jd2,
+                                                   tolerance=1e-11)
+        for a, b in ((X, Xi), (Y, Yi), (S, Si)):
+            assert np.abs(a - b).max() < 2e-11
+
+    def test_posvel(self):
+        pv = erfautils.gcrs_posvel_from_itrf(self.loc, self.t)
+        with erfautils.xys_interpolation():
+            pvi = erfautils.gcrs_posvel_from_itrf(self.loc, self.t)
+        assert pv.pos.shape == (3, 10000)
+        assert np.abs(pv.pos - pvi.pos).max() < 1 * u.mm
+        assert np.abs(pv.vel - pvi.vel).max() < 1 * u.um / u.s
+
+
+class TestFastTDB(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        mjd = np.random.uniform(53000.0, 57000.0, 10000)
+        self.t = time.Time(mjd, scale='utc', format='mjd')
+        self.loc = EarthLocation.from_geocentric(882589.65, -4924872.32,
+                                                 3943729.348, unit=u.m)
+
+    def test_fast_tdb(self):
+        t = time.Time(self.t, location=self.loc)
+        tdb = erfautils.fast_tdb(t)
+        assert tdb.scale == 'tdb'
+        assert np.abs((tdb - t.tdb).to(u.ns)).max() < 0.1 * u.ns
+        # Without a location, astropy 2.x puts the time at geodetic (0, 0, 0)
+        tdb0 = erfautils.fast_tdb(self.t)
+        assert np.abs((tdb0 - self.t.tdb).to(u.ns)).max() < 0.1 * u.ns
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,7 +25,7 @@ class TestFD(unittest.TestCase):
         #NOTE : This prescision is a lower then 1e-7 seconds level, due to some
         # early parks clock corrections are treated differently.
         # TEMPO2: Clock correction = clock0 + clock1 (in the format of general2)
-        # PINT : Clock correction = toas.table['flags']['clkcorr']
+        # PINT : Clock correction = toas.table['clkcorr']
         # Those two clock correction difference are causing the trouble.
         assert np.all(resDiff< 5e-6) , \
             "PINT and tempo Residual difference is too big. "
@@ -8,9 +8,11 @@ except ImportError:
 import unittest
 import numpy as np
 import astropy.units as u
+from astropy.coordinates import SkyCoord
 import pint.scripts.fermiphase as fermiphase
 from pint.observatory.fermi_obs import FermiObs
-from pint.fermi_toas import load_Fermi_TOAs
+from pint.fermi_toas import load_Fermi_TOAs, get_Fermi_TOAs, iter_Fermi_TOAs
+from pint.event_toas import get_event_phases
 import pint.toa as toa
 import pint.models
 from pinttestdata import testdir, datadir
@@ -49,6 +51,53 @@ class TestFermiPhase(unittest.TestCase):
         phss = modelin.phase(ts.table)[1]
         phases = np.where(phss < 0.0 * u.cycle, phss + 1.0 * u.cycle, phss)
 
+    def test_array_loader(self):
+        # The array loader must give the same TOAs as the TOA list one
+        tl = load_Fermi_TOAs(eventfile, weightcolumn='CALC',
+                             targetcoord=self._targetcoord())
+        ts = toa.TOAs(toalist=tl)
+        ta = get_Fermi_TOAs(eventfile, weightcolumn='CALC',
+                            targetcoord=self._targetcoord())
+        assert ta.ntoas == ts.ntoas
+        dt = [(a - b).to(u.ns).value
+              for a, b in zip(ta.table['mjd'], ts.table['mjd'])]
+        assert np.all(np.abs(dt) < 1.0)
+        assert np.allclose(ta.get_flag_value('weight'),
+                           ts.get_flag_value('weight'))
+        assert np.allclose(ta.get_flag_value('energy'),
+                           ts.get_flag_value('energy'))
+        assert ta.table['flag_energy'].unit == u.MeV
+
+    def test_chunks(self):
+        # Small blocks must give the same phases, in the same rows, as a
+        # single block
+        modelin = pint.models.get_model(parfile)
+        kw = dict(weightcolumn='CALC', targetcoord=self._targetcoord(),
+                  minweight=0.1)
+        results = []
+        for chunksize in [10000000, 1000]:
+            rows, iphases, phases = [], [], []
+            for r, ts, (iphss, phss) in get_event_phases(
+                    iter_Fermi_TOAs(eventfile, chunksize=chunksize, **kw),
+                    modelin, ephem='DE405'):
+                rows.append(r)
+                iphases.append(iphss.value)
+                phases.append(phss.value)
+            rows = np.concatenate(rows)
+            order = np.argsort(rows)
+            results.append((len(phases), rows[order],
+                            np.concatenate(iphases)[order],
+                            np.concatenate(phases)[order]))
+        assert results[0][0] == 1 and results[1][0] > 1
+        assert np.all(results[0][1] == results[1][1])
+        assert np.all(results[0][2] == results[1][2])
+        assert np.abs(results[0][3] - results[1][3]).max() < 1e-9
+
+    def _targetcoord(self):
+        modelin = pint.models.get_model(parfile)
+        return SkyCoord(modelin.RAJ.quantity, modelin.DECJ.quantity,
+                        frame='icrs')
+
 
 
 if __name__ == '__main__':
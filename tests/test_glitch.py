@@ -7,6 +7,8 @@ import matplotlib.pyplot as plt
 import astropy.units as u
 import sys
 import os
+import shutil
+import tempfile
 import unittest
 import numpy as np
 from pinttestdata import testdir, datadir
@@ -21,6 +23,18 @@ class TestGlitch(unittest.TestCase):
         self.m = pint.models.get_model(parfile)
         self.t = pint.toa.get_TOAs(timfile,ephem="DE405", include_bipm=False)
         self.f = pint.fitter.PowellFitter(self.t, self.m)
+        # Same model with a JUMP, to sweep phase jumps too
+        self.tmpdir = tempfile.mkdtemp()
+        jparfile = os.path.join(self.tmpdir, 'prefixtest_jump.par')
+        with open(parfile) as f, open(jparfile, 'w') as fout:
+            fout.write(f.read())
+            fout.write('JUMP mjd 55000 56000 1e-4 0\n')
+        self.mj = pint.models.get_model(jparfile)
+
+    @classmethod
+    def tearDownClass(self):
+        shutil.rmtree(self.tmpdir)
+
     def test_glitch(self):
         print("Test prefix parameter via a glitch model")
         rs = pint.residuals.resids(self.t, self.m).phase_resids
@@ -50,6 +64,28 @@ class TestGlitch(unittest.TestCase):
                 errormsg += " %lf" % np.nanmax(np.abs(r_diff.value))
                 assert np.nanmax(np.abs(r_diff.value)) < 1e-3, errormsg
 
+    def test_phase_sweep(self):
+        params = ['F0', 'F1', 'GLF0_1', 'GLPH_2', 'JUMP1']
+        m = self.mj
+        sweep = m.phase_sweep(self.t.table, params)
+        base = np.array([getattr(m, p).value for p in params])
+        batch = base * (1 + np.array([[0.0], [1e-9], [-2e-9]]))
+        phs = sweep.phase(batch)
+        assert phs.frac.shape == (3, self.t.ntoas)
+        try:
+            for ii, vals in enumerate(batch):
+                for p, v in zip(params, vals):
+                    getattr(m, p).value = v
+                ref = m.phase(self.t.table)
+                diff = (phs.int[ii] - ref.int) + (phs.frac[ii] - ref.frac)
+                assert np.abs(diff.value).max() < 1e-8
+        finally:
+            for p, v in zip(params, base):
+                getattr(m, p).value = v
+        one = sweep.phase(base)
+        assert one.frac.shape == (self.t.ntoas,)
+        self.assertRaises(ValueError, m.phase_sweep, self.t.table,
+                          ['RAJ'])
 
 
 if __name__ == '__main__':
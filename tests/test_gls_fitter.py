@@ -1,10 +1,14 @@
 #! /usr/bin/env python
-import time, sys, os, unittest
+import time, sys, os, unittest, copy
 import pint.models.model_builder as mb
 from pint.phase import Phase
 from pint import toa
 from pint.fitter import WlsFitter, GLSFitter
+from pint.likelihood import NoiseLikelihood
 import numpy as np
+import scipy.linalg as sl
+import scipy.sparse as sps
+from pint.models.noise_model import create_quantization_matrix, harmonics
 import astropy.units as u
 import json
 
@@ -52,3 +56,91 @@ class TestGLS(unittest.TestCase):
         self.fit(full_cov=True)
         chi22 = self.f.resids.chi2
         assert np.allclose(chi21, chi22)
+
+    def test_woodbury_covariance(self):
+        cov = self.m.woodbury_covariance(self.t.table)
+        dense = self.m.covariance_matrix(self.t.table)
+        assert np.allclose(cov.todense(), dense, rtol=1e-10, atol=0)
+        x = np.random.randn(self.t.ntoas, 3)
+        cf = sl.cho_factor(dense)
+        assert np.allclose(cov.solve(x), sl.cho_solve(cf, x), rtol=1e-6)
+        logdet = 2 * np.sum(np.log(np.diag(cf[0])))
+        assert np.abs(cov.logdet() - logdet) < 1e-6 * np.abs(logdet)
+
+    def test_quantization_matrix(self):
+        t = np.array([10.1, 0.0, 5.0, 0.9, 1.2, 10.0, 0.5])
+        U = create_quantization_matrix(t, dt=1, nmin=2)
+        ref = np.zeros((7, 2))
+        ref[[1, 3, 6], 0] = 1
+        ref[[0, 5], 1] = 1
+        assert np.all(U == ref)
+        Us = create_quantization_matrix(t, dt=1, nmin=2, sparse=True)
+        assert sps.issparse(Us)
+        assert np.all(Us.toarray() == ref)
+
+    def test_ecorr_basis_sparse(self):
+        ec = self.m.components['EcorrNoise']
+        U, w = ec.ecorr_basis_weight_pair(self.t.table)
+        assert sps.issparse(U)
+        assert U.shape == (self.t.ntoas, len(w))
+        # every TOA is in one epoch at most
+        assert np.all(np.asarray(U.sum(axis=1)).ravel() <= 1)
+        assert np.all(np.asarray(U.sum(axis=0)).ravel() >= 2)
+
+    def test_ecorr_basis_dense(self):
+        # Same matrix as the dense one built per ECORR selection
+        ec = self.m.components['EcorrNoise']
+        U, w = ec.ecorr_basis_weight_pair(self.t.table)
+        t = (self.t.table['tdbld'].quantity * u.day).to(u.s).value
+        ref = np.zeros(U.shape)
+        ref_w = np.zeros(len(w))
+        col = 0
+        selected = []
+        for e in ec.get_ecorrs():
+            mask = e.select_toa_mask(self.t.table)
+            Ue = create_quantization_matrix(t[mask])
+            ref[mask, col:col + Ue.shape[1]] = Ue
+            ref_w[col:col + Ue.shape[1]] = e.quantity.to(u.s).value ** 2
+            col += Ue.shape[1]
+            selected.append(mask)
+        assert 0 in np.concatenate(selected)
+        assert col == U.shape[1]
+        U = U.toarray()
+        for ii in range(self.t.ntoas):
+            assert np.all(U[ii] == ref[ii]), ii
+        assert np.all(w == ref_w)
+
+    def test_fourier_basis(self):
+        rn = self.m.components['PLRedNoise']
+        F, f = rn.pl_rn_basis(self.t.table)
+        assert rn.pl_rn_basis(self.t.table)[0] is F
+        t = (self.t.table['tdbld'].quantity * u.day).to(u.s).value
+        assert np.allclose(F[:, ::2], np.sin(2*np.pi*t[:, None]*f[None, ::2]),
+                           rtol=0, atol=1e-9)
+        assert np.allclose(F[:, 1::2], np.cos(2*np.pi*t[:, None]*f[None, ::2]),
+                           rtol=0, atol=1e-9)
+        theta = np.random.uniform(-100, 100, 1000)
+        for k, sk, ck in harmonics(theta, 50):
+            assert np.abs(sk - np.sin(k*theta)).max() < 1e-11
+            assert np.abs(ck - np.cos(k*theta)).max() < 1e-11
+
+    def test_noise_likelihood(self):
+        m = copy.deepcopy(self.m)
+        lik = NoiseLikelihood(self.t, m)
+        r, M = lik.residuals, lik.M
+
+        def dense_loglike():
+            cf = sl.cho_factor(m.covariance_matrix(self.t.table))
+            cr, cM = sl.cho_solve(cf, r), sl.cho_solve(cf, M)
+            mf = sl.cho_factor(np.dot(M.T, cM))
+            logdet = 2 * np.sum(np.log(np.diag(cf[0]))) + \
+                2 * np.sum(np.log(np.diag(mf[0])))
+            d = np.dot(M.T, cr)
+            return -0.5 * (np.dot(r, cr) - np.dot(d, sl.cho_solve(mf, d)) +
+                           logdet + len(r) * np.log(2 * np.pi))
+
+        values = [getattr(m, pn).value for pn in lik.params]
+        assert np.isclose(lik.loglikelihood(), dense_loglike(), rtol=1e-9)
+        for pn, dv in [('ECORR1', 0.2), ('TNRedAmp', 0.3), ('EFAC1', 0.1)]:
+            values[lik.params.index(pn)] += dv
+            assert np.isclose(lik(values), dense_loglike(), rtol=1e-9)
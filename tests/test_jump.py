@@ -4,7 +4,8 @@ import pint.toa as toa
 import astropy.units as u
 from pint.residuals import resids
 import numpy as np
-import os, unittest
+import os, unittest, copy
+from pint.models.jump import DelayJump
 from pinttestdata import testdir, datadir
 import test_derivative_utils as tdu
 import logging
@@ -40,5 +41,45 @@ class TestJUMP(unittest.TestCase):
             #print "Diff Max is :", np.abs(diff).max()
             msg = 'Derivative test failed at d_phase_d_%s with max relative difference %lf' % (p, np.nanmax(relative_diff).value)
             assert np.nanmax(relative_diff) < 0.001, msg
+
+    def test_unitless_funcs(self):
+        assert len(self.JUMPm.jumps) > 1
+        tdu.check_unitless_funcs(self.JUMPm, self.toas.table)
+        # The selected TOAs get the jump phase, the others none
+        t = self.toas.table
+        delay = self.JUMPm.delay(t).to(u.s).value
+        jphase = self.JUMPm.jump_phase_value(t, delay)
+        assert jphase.shape == (len(t),)
+        mask = np.zeros(len(t), dtype=bool)
+        for j in self.JUMPm.jumps:
+            mask[getattr(self.JUMPm, j).select_toa_mask(t)] = True
+        assert np.all(jphase[~mask] == 0.0)
+        assert np.all(jphase[mask] != 0.0)
+
+    def test_delay_jump_flag_changed(self):
+        # Changing a flag in place must not return stale cached delays
+        m = copy.deepcopy(self.JUMPm)
+        t = copy.deepcopy(self.toas)
+        fe = t.table['flag_fe']
+        dj = DelayJump()
+        dj.JUMP1.key = '-fe'
+        dj.JUMP1.key_value = [str(fe[0])]
+        dj.JUMP1.value = 1e-3
+        dj.setup()
+        m.add_component(dj)
+        d0 = m.delay(t.table).to(u.s).value
+        selected = np.array(fe == fe[0])
+        other = fe[fe != fe[0]][0]
+        fe[0] = other
+        d1 = m.delay(t.table).to(u.s).value
+        assert np.isclose(d0[0] - d1[0], -1e-3, rtol=0, atol=1e-9)
+        assert np.all(d1[1:] == d0[1:])
+        # The same through TOAs.set_flag_value, which drops the jump everywhere
+        t.set_flag_value('fe', np.full(len(t.table), other))
+        d2 = m.delay(t.table).to(u.s).value
+        assert np.allclose(d2[selected] - d0[selected], 1e-3, rtol=0, atol=1e-9)
+        assert np.all(d2[~selected] == d0[~selected])
+
+
 if __name__ == '__main__':
     pass
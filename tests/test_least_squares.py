@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+
+import unittest
+import numpy as np
+from pint import least_squares
+
+
+class TestLeastSquares(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        self.M = np.random.randn(200, 5) * np.array([1, 1e3, 1e-3, 10, 1])
+        self.r = np.random.randn(200)
+
+    def test_lstsq(self):
+        M = self.M.copy()
+        fac = least_squares.normalize_columns(M)
+        assert np.allclose(np.sum(M**2, axis=0), 1)
+        x0 = np.linalg.lstsq(self.M, self.r, rcond=None)[0]
+        Sigma0 = np.linalg.inv(np.dot(self.M.T, self.M))
+        for method in ['qr', 'svd']:
+            x, Sigma = least_squares.lstsq(M, self.r, method=method)
+            assert np.allclose(x / fac, x0, rtol=1e-10)
+            assert np.allclose(Sigma / np.outer(fac, fac), Sigma0, rtol=1e-8)
+        A = np.dot(M.T, M)
+        x, Sigma = least_squares.normal_solve(A, np.dot(M.T, self.r))
+        assert np.allclose(x / fac, x0, rtol=1e-8)
+
+    def test_threshold(self):
+        M = self.M.copy()
+        M[:, 4] = M[:, 0]
+        least_squares.normalize_columns(M)
+        x0 = np.dot(np.linalg.pinv(M), self.r)
+        for method in ['qr', 'svd']:
+            x, Sigma = least_squares.lstsq(M, self.r, method=method,
+                                           threshold=True)
+            assert np.all(np.isfinite(x)) and np.all(np.isfinite(Sigma))
+            assert np.allclose(np.dot(M, x), np.dot(M, x0), atol=1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
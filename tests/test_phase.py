@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+
+import unittest
+import numpy as np
+import astropy.units as u
+from pint.phase import Phase, PhaseAccumulator
+
+
+class TestPhaseAccumulator(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        self.terms = [np.random.uniform(-1e10, 1e10, 100).astype(np.longdouble),
+                      np.random.uniform(-3, 3, 100),
+                      np.random.uniform(-0.7, 0.7, 100)]
+
+    def test_sum(self):
+        ref = Phase(np.zeros(100), np.zeros(100))
+        acc = PhaseAccumulator(100)
+        for t in self.terms:
+            ref += Phase(t)
+            acc.add(t)
+        phs = acc.phase()
+        assert np.all(phs.int == ref.int)
+        assert np.abs(phs.frac - ref.frac).max() < 1e-9 * u.cycle
+        assert np.all(np.abs(phs.frac) <= 0.5 * u.cycle)
+
+    def test_add_phase(self):
+        acc = PhaseAccumulator(100)
+        acc.add_phase(Phase(self.terms[0]))
+        acc.add(self.terms[1])
+        ref = Phase(self.terms[0]) + Phase(self.terms[1])
+        phs = acc.phase()
+        assert np.all(phs.int == ref.int)
+        assert np.abs(phs.frac - ref.frac).max() < 1e-9 * u.cycle
+
+
+if __name__ == '__main__':
+    unittest.main()
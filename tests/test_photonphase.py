@@ -1,13 +1,17 @@
 #!/usr/bin/env python
 from __future__ import division, print_function
-import sys, os
+import sys, os, tempfile, shutil
 try:
     from StringIO import StringIO
 except ImportError:
     from io import StringIO
 import unittest
 import numpy as np
+import astropy.io.fits as pyfits
 import pint.scripts.photonphase as photonphase
+from pint.event_toas import iter_event_TOAs, get_event_phases
+import pint.models
+from pint.observatory.rxte_obs import RXTEObs
 from pinttestdata import testdir, datadir
 
 parfile = os.path.join(datadir, 'J1513-5908_PKS_alldata_white.par')
@@ -29,5 +33,72 @@ class TestPhotonPhase(unittest.TestCase):
         self.assertTrue(v>725)
         photonphase.sys.stdout = saved_stdout
 
+    def test_maxmjd(self):
+        RXTEObs(name='RXTE', FPorbname=orbfile, tt2tdb_mode='none')
+        rows, ts = next(iter_event_TOAs(eventfile, 'rxte'))
+        rows = rows[np.asarray(ts.table['index'])]
+        mjds = np.asarray(ts.table['mjd_float'])
+        maxmjd = np.median(mjds)
+        kept = np.concatenate([r for r, t in
+                               iter_event_TOAs(eventfile, 'rxte',
+                                               chunksize=5000,
+                                               maxmjd=maxmjd)])
+        assert np.all(np.sort(kept) == np.sort(rows[mjds < maxmjd]))
+
+        saved_stdout, photonphase.sys.stdout = photonphase.sys.stdout, StringIO('_')
+        cmd = '{0} {1} --orbfile={2} --maxMJD={3!r}'.format(eventfile, parfile,
+                                                          orbfile, float(maxmjd))
+        photonphase.main(cmd.split())
+        lines = photonphase.sys.stdout.getvalue()
+        photonphase.sys.stdout = saved_stdout
+        used = [l.split() for l in lines.split('\n') if l.startswith('Used')]
+        assert int(used[0][1]) == len(kept)
+        assert int(used[0][3]) == len(rows)
+
+    def test_chunks(self):
+        # Small blocks must give the same phases, in the same rows, as a
+        # single block
+        RXTEObs(name='RXTE', FPorbname=orbfile, tt2tdb_mode='none')
+        model = pint.models.get_model(parfile)
+        nevents = pyfits.getheader(eventfile, 1)['NAXIS2']
+        results = []
+        for chunksize in [nevents, 4000]:
+            iphases = np.zeros(nevents)
+            phases = np.zeros(nevents)
+            used = np.zeros(nevents, dtype=bool)
+            nchunks = 0
+            for rows, ts, (iphss, phss) in get_event_phases(
+                    iter_event_TOAs(eventfile, 'rxte', chunksize=chunksize),
+                    model, planets=True):
+                assert not np.any(used[rows])
+                iphases[rows] = iphss.value
+                phases[rows] = phss.value
+                used[rows] = True
+                nchunks += 1
+            assert np.all(used)
+            results.append((nchunks, iphases, phases))
+        assert results[0][0] == 1
+        assert results[1][0] == (nevents + 3999) // 4000
+        assert np.all(results[0][1] == results[1][1])
+        assert np.abs(results[0][2] - results[1][2]).max() < 1e-9
+
+        outdir = tempfile.mkdtemp()
+        saved_stdout, photonphase.sys.stdout = photonphase.sys.stdout, StringIO('_')
+        try:
+            outfiles = []
+            for chunksize in [100000, 4000]:
+                outfiles.append(os.path.join(outdir,
+                                             'photontest_%d.fits' % chunksize))
+                cmd = '--outfile {3} {0} {1} --orbfile={2} --chunksize={4}'.format(
+                    eventfile, parfile, orbfile, outfiles[-1], chunksize)
+                photonphase.main(cmd.split())
+            ph1 = pyfits.getdata(outfiles[0], 1)['PULSE_PHASE']
+            ph2 = pyfits.getdata(outfiles[1], 1)['PULSE_PHASE']
+            assert np.abs(ph1 - ph2).max() < 1e-6
+        finally:
+            photonphase.sys.stdout = saved_stdout
+            shutil.rmtree(outdir)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,9 @@ from __future__ import division, absolute_import, print_function
 import unittest
 from astropy.coordinates import solar_system_ephemeris
 from pint.solar_system_ephemerides import objPosVel_wrt_SSB, objPosVel
+from pint.solar_system_ephemerides import objPosVels_wrt_SSB, posvel_interpolation
+from pint.solar_system_ephemerides import load_kernel, loaded_kernel_files
+import astropy.units as u
 import numpy as np
 import astropy.time as time
 import os
@@ -66,3 +69,26 @@ class TestSolarSystemDynamic(unittest.TestCase):
         assert a.vel.shape == (3, 10000)
         print("value {0}, path {1}".format(solar_system_ephemeris._value,path))
         assert solar_system_ephemeris._value == path
+
+    def test_kernel_shared(self):
+        path = datapath('de432s.bsp')
+        k = load_kernel('de432s', path=path)
+        assert load_kernel('de432s', path=path) is k
+        assert path in loaded_kernel_files()
+        objPosVel_wrt_SSB('earth', self.tdb_time, 'de432s', path=path)
+        assert solar_system_ephemeris._kernel is k
+
+    def test_interpolation(self):
+        objs = ['earth', 'sun'] + self.planets
+        pvs = objPosVels_wrt_SSB(objs, self.tdb_time, 'de421')
+        for obj in objs:
+            a = objPosVel_wrt_SSB(obj, self.tdb_time, 'de421')
+            b = pvs[obj]
+            assert b.obj == obj
+            assert b.pos.shape == (3, 10000)
+            # Sub-mm agreement with the direct evaluation
+            assert np.abs(a.pos - b.pos).max() < 1 * u.mm
+            assert np.abs(a.vel - b.vel).max() < 1 * u.um / u.s
+        with posvel_interpolation():
+            c = objPosVel_wrt_SSB('earth', self.tdb_time, 'de421')
+        assert np.abs(c.pos - pvs['earth'].pos).max() == 0 * u.km
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+from pint import toa
+from pint.toa_cache import TOACache, toa_cache_key, tim_file_dependencies
+import os
+import shutil
+import tempfile
+import numpy as np
+import astropy.units as u
+
+import unittest
+from pinttestdata import datadir
+os.chdir(datadir)
+
+class TestTOACache(unittest.TestCase):
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.t = toa.get_TOAs("test1.tim", include_bipm=False, usecache=True,
+                              cachedir=self.cachedir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir)
+
+    def test_dependencies(self):
+        assert tim_file_dependencies("test1.tim") == ["test1.tim", "test2.tim"]
+
+    def test_key(self):
+        k1 = toa_cache_key("test1.tim", ephem="DE421")
+        assert k1 == toa_cache_key("test1.tim", ephem="DE421")
+        assert k1 != toa_cache_key("test1.tim", ephem="DE436")
+        assert k1 != toa_cache_key("test2.tim", ephem="DE421")
+
+    def test_roundtrip(self):
+        assert len(os.listdir(self.cachedir)) == 1
+        t2 = toa.get_TOAs("test1.tim", include_bipm=False, usecache=True,
+                          cachedir=self.cachedir)
+        assert t2.ntoas == self.t.ntoas
+        assert t2.commands == self.t.commands
+        self.t.table.sort('index')
+        t2.table.sort('index')
+        assert np.all(t2.table['tdbld'] == self.t.table['tdbld'])
+        assert np.all(t2.table['ssb_obs_pos'] == self.t.table['ssb_obs_pos'])
+        for a, b in zip(self.t.table['mjd'], t2.table['mjd']):
+            assert a.scale == b.scale
+            assert abs((a - b).to(u.ns).value) < 1e-6
+        for a, b in zip(self.t.get_flags(), t2.get_flags()):
+            assert a == b
+
+    def test_eviction(self):
+        cache = TOACache(self.cachedir, max_size=0)
+        cache.evict()
+        assert len(os.listdir(self.cachedir)) == 0
+
+if __name__ == '__main__':
+    unittest.main()
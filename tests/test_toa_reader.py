@@ -1,5 +1,9 @@
 from pint import toa
 import os
+import numpy as np
+import astropy.units as u
+import astropy.time as time
+from astropy.coordinates import EarthLocation
 
 from pinttestdata import testdir, datadir
 os.chdir(datadir)
@@ -15,21 +19,79 @@ class TestTOAReader:
     def test_count(self):
         assert self.x.ntoas == 9
     def test_info(self):
-        assert self.x.table[0]['flags']["info"] == "test1"
+        assert self.x.get_flags()[0]["info"] == "test1"
     def test_jump(self):
-        assert self.x.table[0]['flags']["jump"] == 0
+        assert self.x.get_flags()[0]["jump"] == 0
     def test_info_2(self):
-        assert self.x.table[3]['flags']["info"] == "test2"
+        assert self.x.get_flags()[3]["info"] == "test2"
     def test_time(self):
-        assert self.x.table[3]['flags']["to"] == 1.0
+        assert self.x.get_flags()[3]["to"] == 1.0
     def test_jump_2(self):
-        assert "jump" not in self.x.table[4]['flags']
+        assert "jump" not in self.x.get_flags()[4]
     def test_time_2(self):
-        assert "time" not in self.x.table[4]['flags']
+        assert "time" not in self.x.get_flags()[4]
     def test_jump_3(self):
-        assert self.x.table[-1]['flags']["jump"] == 1
+        assert self.x.get_flags()[-1]["jump"] == 1
     def test_obs(self):
         assert self.x.table[1]["obs"]=="gbt"
+    def test_clkcorr(self):
+        # The TIME offset is included in the clock correction
+        assert abs(self.x.table[3]['clkcorr'] - 1.0) < 1e-3
+        assert abs(self.x.table[0]['clkcorr']) < 1e-3
+        assert "clkcorr" not in self.x.get_flags()[0]
+    def test_flag_columns(self):
+        assert self.x.table['flag_fe'].dtype.kind == 'U'
+        jump = self.x.get_flag_value('jump')
+        assert jump[0] == 0 and jump[-1] == 1
+        assert jump.mask[4]
+        assert isinstance(self.x.get_flags()[0]['jump'], int)
+        assert 'flags' not in self.x.table.colnames
+    def test_set_flag(self):
+        w = np.linspace(0, 1, self.x.ntoas)
+        self.x.set_flag_value('weight', w)
+        assert np.all(self.x.get_flag_value('weight') == w)
+        assert self.x.get_flags()[2]['weight'] == w[2]
+
+def test_times_to_array():
+    # Each time keeps its own location, as for moving observatories
+    locs = [EarthLocation.from_geocentric(6378137.0 + 1000.0 * ii, 0.0, 0.0,
+                                          unit=u.m) for ii in range(3)]
+    ts = [time.Time(55000 + ii, 0.25, format='mjd', scale='tt',
+                    location=loc, precision=9) for ii, loc in enumerate(locs)]
+    t = toa._times_to_array(ts)
+    assert t.scale == 'tt' and t.format == 'mjd'
+    for ii in range(3):
+        assert (t[ii] - ts[ii]).to(u.ns).value == 0.0
+        assert t.location[ii].x == locs[ii].x
+
+class TestColumnarTOAReader:
+    def setUp(self):
+        self.x = toa.TOAs("test1.tim")
+        self.y = toa.TOAs("test1.tim", columnar=True)
+        self.x.table.sort('index')
+        self.y.table.sort('index')
+    def test_commands(self):
+        assert self.y.commands == self.x.commands
+    def test_count(self):
+        assert self.y.ntoas == self.x.ntoas
+    def test_mjds(self):
+        for a, b in zip(self.x.table['mjd'], self.y.table['mjd']):
+            assert a.scale == b.scale
+            assert abs((a - b).to(u.ns).value) < 1e-3
+        assert np.all(self.x.table['mjd_float'] == self.y.table['mjd_float'])
+    def test_columns(self):
+        for c in ('error', 'freq', 'obs'):
+            assert np.all(self.x.table[c] == self.y.table[c])
+    def test_flags(self):
+        for a, b in zip(self.x.get_flags(), self.y.get_flags()):
+            assert a == b
+
+class TestColumnarTOAReaderPrinceton(TestColumnarTOAReader):
+    def setUp(self):
+        self.x = toa.TOAs("NGC6440E.tim")
+        self.y = toa.TOAs("NGC6440E.tim", columnar=True)
+        self.x.table.sort('index')
+        self.y.table.sort('index')
 
 if __name__ == '__main__':
     t = TestTOAReader()
@@ -1,11 +1,11 @@
 #! /usr/bin/env python
-import time, sys, os, unittest
+import time, sys, os, unittest, copy
 import pint.models.model_builder as mb
 from pint.phase import Phase
 from pint import toa
-from pint.fitter import WlsFitter
+from pint.fitter import WlsFitter, IncrementalWlsFitter, LMFitter
 import matplotlib.pyplot as plt
-import numpy
+import numpy as np
 
 from pinttestdata import testdir, datadir
 
@@ -41,3 +41,48 @@ class Testwls(unittest.TestCase):
             tol = 2.6
             msg = "Fitting parameter " + p + " failed. with chi2_red " + str(chi2_red)
             assert chi2_red < tol, msg
+
+    def test_incremental_fitter(self):
+        self.perturb_param('F1', 0.001)
+        self.f.set_fitparams('F0', 'F1', 'RAJ', 'DECJ')
+        model = copy.deepcopy(self.f.model)
+        self.f.fit_toas()
+        mjd = self.t.get_mjds().value
+        split = np.median(mjd)
+        blocks = []
+        for sel in (mjd < split, mjd >= split):
+            t = copy.deepcopy(self.t)
+            t.select(sel)
+            blocks.append(t)
+        fi = IncrementalWlsFitter(blocks[0], model)
+        key = fi.add_toas(blocks[1])
+        fi.fit_toas()
+        for pn in ['F0', 'F1', 'RAJ', 'DECJ']:
+            p, pi = getattr(self.f.model, pn), getattr(fi.model, pn)
+            assert np.abs(p.value - pi.value) < 1e-3 * p.uncertainty_value, pn
+            assert np.isclose(p.uncertainty_value, pi.uncertainty_value,
+                              rtol=1e-6), pn
+        # toas and resids cover all the blocks and follow the fit
+        assert fi.toas.ntoas == self.t.ntoas
+        assert np.isclose(fi.resids.chi2, self.f.resids.chi2, rtol=1e-3)
+        # Removing a block and adding it back gives the same fit
+        fi.remove_toas(key)
+        fi.add_toas(blocks[1])
+        fi.relinearize()
+        fi.fit_toas()
+        for pn in ['F0', 'F1', 'RAJ', 'DECJ']:
+            p, pi = getattr(self.f.model, pn), getattr(fi.model, pn)
+            assert np.abs(p.value - pi.value) < 1e-2 * p.uncertainty_value, pn
+
+    def test_lm_fitter(self):
+        f = LMFitter(self.t, self.m)
+        for p in ['ECC', 'OM', 'T0', 'F1']:
+            f.reset_model()
+            par = getattr(f.model, p)
+            par.value = (1 + self.per_param[p]) * par.value
+            f.set_fitparams(p)
+            f.fit_toas()
+            msg = "LM fit of " + p + " failed: " + f.fitresult.message
+            assert f.fitresult.success, msg
+            assert f.resids.chi2_reduced < 2.6, msg
+            assert f.fitresult.nfev >= f.fitresult.nit + 1, msg